@@ -0,0 +1,626 @@
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+import numpy as np
+
+
+class Voice:
+    """Un son en cours de lecture, partagé entre les sorties (chacune avance à son rythme)"""
+
+    def __init__(self, samples, roles, fade_in_frames, fade_out_frames, serial, tail_frames=0, gain=1.0):
+        self.samples = samples  # (frames, channels) float32, lecture seule
+        self.length = len(samples)
+        self.serial = serial  # Ordre de démarrage (pour voler le plus ancien)
+        self.gain = gain  # Gain propre au son (normalisation de loudness), appliqué dans la pondération du mix
+        self.fade_out_frames = max(1, fade_out_frames)
+        self.trigger_time = None  # perf_counter() du déclenchement, remis à None au premier bloc
+
+        # Fade-in de 10ms pour éliminer le "pop" au démarrage
+        # (appliqué sur une copie du début : le buffer du cache est partagé)
+        self.head_len = min(fade_in_frames, self.length)
+        curve = np.linspace(0, 1, self.head_len, dtype=np.float32).reshape(-1, 1)
+        self.head = samples[:self.head_len] * curve
+
+        # Fondu de fin (trim non destructif), sur une copie de la fin, sans chevaucher le début
+        tail_len = max(0, min(tail_frames, self.length - self.head_len))
+        self.tail_start = self.length - tail_len
+        curve = np.linspace(1, 0, tail_len, dtype=np.float32).reshape(-1, 1)
+        self.tail = samples[self.tail_start:] * curve
+
+        # État par sortie : position et facteur de fade
+        self.pos = {role: 0 for role in roles}
+        self.fade = {role: 1.0 for role in roles}
+        self.done = {role: False for role in roles}
+
+        self.stopping = False
+        self.fade_out = False  # Fade out progressif (sinon coupure franche)
+
+    def stop(self, fade=True):
+        self.fade_out = fade
+        self.stopping = True
+
+    @property
+    def finished(self):
+        return all(self.done.values())
+
+    def _step_fade(self, role, frames):
+        """
+        Avance le fade de sortie d'un bloc. Retourne (gain début, gain fin) du bloc,
+        ou None si le silence est atteint.
+        """
+        start = self.fade[role]
+        if not self.stopping:
+            return (start, start)
+        if start == 0.0:
+            # Silence atteint : on coupe
+            self.done[role] = True
+            return None
+        if self.fade_out:
+            end = max(0.0, start - frames / self.fade_out_frames)
+        else:
+            # Coupure "franche" : rampe vers 0 sur un seul bloc (évite le clic)
+            end = 0.0
+        self.fade[role] = end
+        return (start, end)
+
+    def read(self, role, dest):
+        """
+        Copie le prochain bloc dans dest (frames, channels) et retourne le couple
+        (gain début, gain fin) de la rampe de fade à appliquer sur le bloc,
+        ou None si ce voice est terminé pour cette sortie.
+        """
+        if self.done[role]:
+            return None
+
+        ramp = self._step_fade(role, len(dest))
+        if ramp is None:
+            return None
+
+        n = self._fill(role, dest)
+        if n is None:
+            self.done[role] = True
+            return None
+        if n < len(dest):
+            dest[n:] = 0
+        return ramp
+
+    def skip(self, role, frames):
+        """Avance sans rien copier (sortie muette : les positions doivent continuer)"""
+        if self.done[role] or self._step_fade(role, frames) is None:
+            return
+        if not self._advance(role, frames):
+            self.done[role] = True
+
+    def _advance(self, role, frames):
+        pos = self.pos[role]
+        if pos >= self.length:
+            return False
+        self.pos[role] = min(self.length, pos + frames)
+        return True
+
+    def _fill(self, role, dest):
+        """Copie jusqu'à len(dest) frames dans dest, retourne le nombre copié (None = fin du son)"""
+        pos = self.pos[role]
+        n = min(len(dest), self.length - pos)
+        if n <= 0:
+            return None
+
+        if n == len(dest):
+            np.copyto(dest, self.samples[pos:pos + n])  # Bloc complet : pas de vue de dest à créer
+        else:
+            dest[:n] = self.samples[pos:pos + n]
+        if pos < self.head_len:
+            head_end = min(pos + n, self.head_len)
+            dest[:head_end - pos] = self.head[pos:head_end]
+        if pos + n > self.tail_start:
+            tail_begin = max(pos, self.tail_start)
+            dest[tail_begin - pos:n] = self.tail[tail_begin - self.tail_start:pos + n - self.tail_start]
+
+        self.pos[role] = pos + n
+        return n
+
+    def release(self):
+        """Le voice a quitté le mixeur (volé, moteur reconstruit) : plus rien ne le lira"""
+        for role in self.done:
+            self.done[role] = True
+
+
+class StreamingVoice(Voice):
+    """
+    Voice décodé au fil de l'eau (miniaudio.stream_file) pour les longs sons.
+    Un thread producteur remplit un buffer circulaire borné, les sorties le consomment
+    chacune à leur position : la mémoire reste constante quelle que soit la durée.
+    """
+
+    def __init__(self, path, samplerate, channels, roles, fade_in_frames, fade_out_frames, serial,
+                 buffer_sec=2.0, chunk_frames=4096, start_frame=0, length=None, tail_frames=0, gain=1.0):
+        self.serial = serial
+        self.gain = gain
+        self.fade_out_frames = max(1, fade_out_frames)
+        self.trigger_time = None
+        self.pos = {role: 0 for role in roles}
+        self.fade = {role: 1.0 for role in roles}
+        self.done = {role: False for role in roles}
+        self.stopping = False
+        self.fade_out = False
+
+        self.channels = channels
+        self.chunk_frames = chunk_frames
+        self.capacity = max(int(samplerate * buffer_sec), chunk_frames * 2)
+        self.ring = np.zeros((self.capacity, channels), dtype=np.float32)
+        self.write_pos = 0  # Position absolue (frames écrites depuis le début)
+        self.eof = False
+
+        # Fade-in appliqué à la volée sur les premières frames
+        self.head_len = fade_in_frames
+        self.ramp = np.linspace(0, 1, fade_in_frames, dtype=np.float32).reshape(-1, 1)
+
+        # Trim non destructif : début (seek), nombre de frames à lire et fondu de fin
+        self.start_frame = start_frame
+        self.length = length  # None = jusqu'à la fin du fichier
+        tail_frames = min(tail_frames, length) if length is not None else 0
+        self.tail_start = length - tail_frames if length is not None else None
+        self.tail_ramp = np.linspace(1, 0, tail_frames, dtype=np.float32).reshape(-1, 1)
+
+        self.ready = threading.Event()  # Premier bloc décodé (ou fin/erreur)
+        self._space = threading.Event()  # Signalé par les sorties quand elles libèrent de la place
+        self._thread = threading.Thread(target=self._produce, args=(path, samplerate), daemon=True)
+        self._thread.start()
+
+    def _min_read_pos(self):
+        positions = [self.pos[r] for r in self.pos if not self.done[r]]
+        return min(positions) if positions else self.write_pos
+
+    def _produce(self, path, samplerate):
+        import miniaudio
+        try:
+            stream = miniaudio.stream_file(path, output_format=miniaudio.SampleFormat.FLOAT32,
+                                           nchannels=self.channels, sample_rate=samplerate,
+                                           frames_to_read=self.chunk_frames, seek_frame=self.start_frame)
+            for chunk in stream:
+                data = np.frombuffer(chunk, dtype=np.float32).reshape(-1, self.channels)
+                if self.length is not None:
+                    data = data[:self.length - self.write_pos]
+                n = len(data)
+                if n == 0:
+                    break
+
+                # Attendre que les sorties aient libéré assez de place
+                while True:
+                    if self.finished:
+                        return
+                    self._space.clear()
+                    if self.capacity - (self.write_pos - self._min_read_pos()) >= n:
+                        break
+                    self._space.wait(0.05)
+
+                start = self.write_pos % self.capacity
+                first = min(n, self.capacity - start)
+                self.ring[start:start + first] = data[:first]
+                if first < n:
+                    self.ring[:n - first] = data[first:]
+                # Publier après l'écriture des données
+                self.write_pos += n
+                self.ready.set()
+        except Exception as e:
+            print(f"Erreur streaming audio: {e}")
+        finally:
+            self.eof = True
+            self.ready.set()
+
+    def _fill(self, role, dest):
+        pos = self.pos[role]
+        n = min(len(dest), self.write_pos - pos)
+        if n <= 0:
+            # Fin du fichier, ou buffer vide (le producteur n'a pas suivi) -> silence
+            return None if self.eof else 0
+
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        if first == len(dest):
+            np.copyto(dest, self.ring[start:start + first])
+        else:
+            dest[:first] = self.ring[start:start + first]
+            if first < n:
+                dest[first:n] = self.ring[:n - first]
+
+        if pos < self.head_len:
+            head_end = min(pos + n, self.head_len)
+            dest[:head_end - pos] *= self.ramp[pos:head_end]
+        if self.tail_start is not None and pos + n > self.tail_start:
+            tail_begin = max(pos, self.tail_start)
+            dest[tail_begin - pos:n] *= self.tail_ramp[tail_begin - self.tail_start:pos + n - self.tail_start]
+
+        self.pos[role] = pos + n
+        self._space.set()
+        return n
+
+    def _advance(self, role, frames):
+        pos = self.pos[role]
+        if pos >= self.write_pos and self.eof:
+            return False
+        self.pos[role] = min(self.write_pos, pos + frames)
+        self._space.set()
+        return True
+
+
+class _MixBuffers:
+    """
+    Buffers préalloués d'une sortie : le callback ne fait aucune allocation NumPy par bloc.
+    Toutes les opérations portent sur des tableaux de même forme (ou np.dot avec out=) :
+    un scalaire Python ou un broadcast ferait passer NumPy par un itérateur alloué à chaque appel.
+    """
+
+    def __init__(self, voices, frames, channels, gain):
+        self.frames = frames
+        self.scratch = np.zeros((voices, frames, channels), dtype=np.float32)
+        self.rows = list(self.scratch)  # Vues par voice, créées une fois (indexer crée une vue à chaque bloc)
+        self.flat = self.scratch.reshape(voices, -1)  # Vue 2D pour le np.dot final
+        self.out = np.zeros((frames, channels), dtype=np.float32)  # Mix, recopié dans outdata
+        self.out_flat = self.out.reshape(-1)
+        self.weights = np.zeros(voices, dtype=np.float32)
+        self.gain = np.zeros(voices, dtype=np.float32)  # Gain de sortie répété par voice
+        self.unit_ramp = np.repeat(np.linspace(0, 1, frames, dtype=np.float32).reshape(-1, 1), channels, axis=1)
+        self.ramp = np.empty((frames, channels), dtype=np.float32)
+        self.ramp_start = np.empty((frames, channels), dtype=np.float32)
+        # Niveau par slot (sortie principale, politique 'quietest') : moyenne de |x| du bloc, via un produit scalaire
+        self.flat_rows = list(self.flat)
+        self.magnitude = np.zeros(frames * channels, dtype=np.float32)
+        self.mean = np.full(frames * channels, 1.0 / (frames * channels), dtype=np.float32)
+        self.levels = np.zeros(voices, dtype=np.float32)
+        self.level_cells = [self.levels[i, ...] for i in range(voices)]  # Vues 0-d : cibles out= de np.dot
+        self.prev_gain = gain  # Gain du bloc précédent (rampe si le volume change)
+
+    def fill_ramp(self, start, end):
+        """ramp = rampe linéaire de start à end sur le bloc (en place)"""
+        self.ramp.fill(end - start)
+        self.ramp_start.fill(start)
+        np.multiply(self.ramp, self.unit_ramp, out=self.ramp)
+        np.add(self.ramp, self.ramp_start, out=self.ramp)
+        return self.ramp
+
+    def measure_level(self, i):
+        """levels[i] = niveau moyen de la ligne i du scratch (après rampe de fondu, avant gain du voice)"""
+        np.abs(self.flat_rows[i], out=self.magnitude)
+        np.dot(self.magnitude, self.mean, out=self.level_cells[i])
+
+
+class LatencyHistogram:
+    """Histogramme de latences (ms) déclenchement -> premier sample, enregistrable depuis le callback"""
+
+    EDGES_MS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 500)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.EDGES_MS) + 1)  # Dernier bucket : > 500 ms
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        self.counts[bisect_left(self.EDGES_MS, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def reset(self):
+        self.__init__()
+
+    def summary(self):
+        """Dict lisible : buckets '<=Xms' -> nombre, moyenne, max"""
+        labels = [f"<={e}ms" for e in self.EDGES_MS] + [f">{self.EDGES_MS[-1]}ms"]
+        return {
+            'count': self.total,
+            'mean_ms': self.sum_ms / self.total if self.total else 0.0,
+            'max_ms': self.max_ms,
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class AudioEngine:
+    """
+    Moteur audio : un stream PortAudio persistant (mode callback) par périphérique cible.
+    Les streams ne sont recréés que si les périphériques changent ou disparaissent,
+    la lecture d'un son ne fait donc plus qu'occuper un slot du pool de voices.
+    Les voices actifs sont sommés en une seule opération NumPy par bloc.
+    """
+
+    FADE_IN_SEC = 0.01
+    FADE_OUT_SEC = 0.2
+    STEAL_POLICIES = ('oldest', 'quietest')
+
+    def __init__(self, blocksize=512, max_voices=8, steal_policy='oldest'):
+        self.blocksize = blocksize
+        self.max_voices = max(1, int(max_voices))
+        self.steal_policy = steal_policy if steal_policy in self.STEAL_POLICIES else 'oldest'
+        self.samplerate = None
+        self.channels = None
+
+        self.main_device = None
+        self.monitor_device = None
+
+        # Gains par sortie ('main' = câble virtuel, 'monitor' = casque)
+        self.gains = {'main': 1.0, 'monitor': 0.0}
+
+        self._streams = {}  # role -> sd.OutputStream
+        self._slots = [None] * self.max_voices  # Pool fixe de voices
+        self._stolen = [None] * self.max_voices  # Voice volé dans chaque slot, le temps de son fondu de sortie
+        self._serial = 0
+        self._mix = {}  # role -> _MixBuffers réutilisés à chaque bloc
+        self.latency = LatencyHistogram()  # Touche -> premier sample envoyé au DAC (sortie principale)
+        self._lock = threading.Lock()  # Protège la (re)construction des streams et l'attribution des slots
+        self._closing = False
+        self._needs_rebuild = False
+
+    # --- Gestion des streams ---
+
+    def set_devices(self, main_device, monitor_device):
+        """Définit les périphériques cibles et reconstruit les streams si besoin"""
+        with self._lock:
+            if (main_device == self.main_device and monitor_device == self.monitor_device
+                    and self._streams_ok_locked()):
+                return
+            self.main_device = main_device
+            self.monitor_device = monitor_device
+            self._rebuild_locked()
+
+    def ensure_running(self):
+        """Vérifie que les streams tournent toujours (périphérique débranché...) et les recrée sinon"""
+        with self._lock:
+            if not self._streams_ok_locked():
+                self._rebuild_locked()
+        return bool(self._streams)
+
+    def _streams_ok_locked(self):
+        if self._needs_rebuild or not self._streams:
+            return False
+        return all(s.active for s in self._streams.values())
+
+    def _rebuild_locked(self):
+        import sounddevice as sd
+
+        self._close_streams_locked()
+        self._needs_rebuild = False
+        # Les voices en cours sont au format de l'ancien stream
+        self._release_all_locked()
+        self._slots = [None] * self.max_voices
+        self._stolen = [None] * self.max_voices
+        self._mix = {}
+
+        main = self.main_device if self.main_device is not None else sd.default.device[1]
+        mon = self.monitor_device if self.monitor_device is not None else sd.default.device[1]
+
+        try:
+            info = sd.query_devices(main)
+            self.samplerate = int(info['default_samplerate'])
+            self.channels = max(1, min(2, info['max_output_channels']))
+        except Exception as e:
+            print(f"Erreur query device: {e}")
+            return
+
+        targets = [('main', main)]
+        if mon != main:
+            targets.append(('monitor', mon))
+
+        for role, device in targets:
+            try:
+                stream = sd.OutputStream(
+                    samplerate=self.samplerate,
+                    device=device,
+                    channels=self.channels,
+                    dtype='float32',
+                    blocksize=self.blocksize,
+                    latency='low',
+                    callback=lambda outdata, frames, t, status, r=role: self._callback(r, outdata, frames, t, status),
+                    finished_callback=self._on_stream_finished,
+                )
+                stream.start()
+                self._streams[role] = stream
+            except Exception as e:
+                print(f"Erreur {role} stream: {e}")
+
+    def _close_streams_locked(self):
+        self._closing = True
+        try:
+            for s in self._streams.values():
+                try:
+                    s.stop()
+                    s.close()
+                except Exception:
+                    pass
+            self._streams = {}
+        finally:
+            self._closing = False
+
+    def _on_stream_finished(self):
+        """Appelé par PortAudio quand un stream s'arrête (erreur, périphérique disparu)"""
+        if not self._closing:
+            self._needs_rebuild = True
+
+    def close(self):
+        with self._lock:
+            self._close_streams_locked()
+            self._release_all_locked()
+            self._slots = [None] * self.max_voices
+            self._stolen = [None] * self.max_voices
+
+    def _release_all_locked(self):
+        for v in (*self._slots, *self._stolen):
+            if v is not None:
+                v.release()
+
+    # --- Mixeur ---
+
+    def set_gain(self, role, gain):
+        self.gains[role] = float(gain)
+
+    def set_max_voices(self, max_voices):
+        """Change la taille du pool (les sons en cours sont conservés dans la limite du pool)"""
+        with self._lock:
+            max_voices = max(1, int(max_voices))
+            active = [v for v in self._slots if v is not None and not v.finished]
+            active.sort(key=lambda v: v.serial)
+            for v in (*active[:-max_voices], *self._stolen):
+                if v is not None:
+                    v.release()
+            active = active[-max_voices:]
+            self.max_voices = max_voices
+            self._slots = active + [None] * (max_voices - len(active))
+            self._stolen = [None] * max_voices
+            self._mix = {}
+
+    def set_steal_policy(self, policy):
+        if policy in self.STEAL_POLICIES:
+            self.steal_policy = policy
+
+    def _pick_slot_locked(self):
+        """Retourne l'index d'un slot libre, ou du voice à voler si le pool est plein"""
+        for i, v in enumerate(self._slots):
+            if v is None or v.finished:
+                return i
+
+        if self.steal_policy == 'quietest':
+            # Niveau du dernier bloc rendu sur la sortie principale (mesuré par le callback) x gain du son
+            mix = self._mix.get('main')
+            key = lambda i: ((mix.levels[i] if mix is not None else 1.0) * self._slots[i].gain
+                             * min(self._slots[i].fade.values(), default=0.0))
+        else:
+            key = lambda i: self._slots[i].serial
+        return min(range(len(self._slots)), key=key)
+
+    def play(self, samples, trigger_time=None, fade_in_sec=0.0, fade_out_sec=0.0, gain=1.0):
+        """
+        Ajoute un son (float32, au format du moteur) au mixeur.
+        trigger_time (time.perf_counter() à l'appui de la touche) sert à mesurer la latence.
+        fade_in_sec / fade_out_sec : fondus du trim (le fade-in anti-pop reste le minimum).
+        gain : gain linéaire du son (loudness précalculée), sans coût supplémentaire au mixage.
+        """
+        with self._lock:
+            self._serial += 1
+            voice = Voice(samples, tuple(self._streams),
+                          int(self.samplerate * max(self.FADE_IN_SEC, fade_in_sec)),
+                          int(self.samplerate * self.FADE_OUT_SEC), self._serial,
+                          tail_frames=int(self.samplerate * fade_out_sec), gain=gain)
+            voice.trigger_time = trigger_time
+            self._assign_locked(voice)
+        return voice
+
+    def play_stream(self, path, buffer_sec=2.0, trigger_time=None, start_frame=0, length=None,
+                    fade_in_sec=0.0, fade_out_sec=0.0, gain=1.0):
+        """
+        Joue un long fichier en streaming (décodage progressif, mémoire bornée).
+        start_frame / length (frames au format du moteur) : portion à jouer (trim).
+        """
+        with self._lock:
+            self._serial += 1
+            voice = StreamingVoice(path, self.samplerate, self.channels, tuple(self._streams),
+                                   int(self.samplerate * max(self.FADE_IN_SEC, fade_in_sec)),
+                                   int(self.samplerate * self.FADE_OUT_SEC), self._serial,
+                                   buffer_sec=buffer_sec, start_frame=start_frame, length=length,
+                                   tail_frames=int(self.samplerate * fade_out_sec), gain=gain)
+            voice.trigger_time = trigger_time
+        # Attendre le premier bloc pour ne pas démarrer sur un buffer vide
+        voice.ready.wait(1.0)
+        with self._lock:
+            self._assign_locked(voice)
+        return voice
+
+    def _assign_locked(self, voice):
+        i = self._pick_slot_locked()
+        old = self._slots[i]
+        self._slots[i] = voice
+        if old is not None and not old.finished:
+            # Voice volé : rampe vers 0 sur un bloc (sur sa propre ligne du mix) plutôt qu'une coupure sèche.
+            # Écrit APRÈS le slot : le callback lit _stolen[i] avant _slots[i], il ne peut pas mixer old deux fois
+            previous = self._stolen[i]
+            if previous is not None:
+                previous.release()
+            old.stop(fade=False)
+            self._stolen[i] = old
+        mix = self._mix.get('main')
+        if mix is not None and i < len(mix.levels):
+            mix.levels[i] = 1.0  # Pas encore entendu : ne pas le voler en premier
+
+    def stop_all(self, fade=True):
+        for v in self._slots:
+            if v is not None:
+                v.stop(fade)
+
+    def active_voices(self):
+        return sum(1 for v in self._slots if v is not None and not v.finished)
+
+    def _callback(self, role, outdata, frames, time_info, status):
+        """Callback PortAudio : mixe les voices actifs dans outdata, sans allocation de tableau"""
+        slots = self._slots
+        stolen = self._stolen
+        nslots = len(slots)
+        gain = self.gains[role]
+        mix = self._mix.get(role)
+        if mix is None or mix.frames != frames or len(mix.weights) != nslots + len(stolen):
+            mix = _MixBuffers(nslots + len(stolen), frames, outdata.shape[1], gain)
+            self._mix[role] = mix
+
+        # Fast path : sortie muette -> silence, mais les voices doivent continuer d'avancer
+        if gain == 0.0 and mix.prev_gain == 0.0:
+            for v in slots:
+                if v is not None:
+                    v.skip(role, frames)
+            for v in stolen:
+                if v is not None:
+                    v.skip(role, frames)
+            outdata.fill(0)
+            return
+
+        # Chaque voice actif copie son bloc dans sa ligne du buffer : lignes 0..nslots-1 pour les slots,
+        # puis une ligne par voice volé en cours de fondu. Parcours à rebours : _stolen[i] est lu avant
+        # _slots[i], dans l'ordre inverse de leur écriture par _assign_locked
+        weights = mix.weights
+        weights.fill(0)
+        active = False
+        rows = mix.rows
+        # Niveaux pour le vol du voice le plus faible (lus sous verrou par _pick_slot_locked)
+        measure = role == 'main' and self.steal_policy == 'quietest'
+        for i in range(len(weights) - 1, -1, -1):
+            v = slots[i] if i < nslots else stolen[i - nslots]
+            if v is None:
+                continue
+            row = rows[i]
+            fade = v.read(role, row)
+            if fade is None:
+                if measure and i < nslots:
+                    mix.levels[i] = 0.0  # Plus rien sur cette sortie : la ligne du scratch est périmée
+                continue
+            start, end = fade
+            if start == end:
+                weights[i] = start * v.gain
+            else:
+                # Rampe de fade par sample (pas de marche d'escalier d'un bloc à l'autre)
+                np.multiply(row, mix.fill_ramp(start, end), out=row)
+                weights[i] = v.gain
+            if measure and i < nslots:
+                mix.measure_level(i)
+            if role == 'main' and v.trigger_time is not None:
+                # Premier bloc de ce voice : temps écoulé + délai jusqu'au DAC
+                dac_delay = time_info.outputBufferDacTime - time_info.currentTime
+                self.latency.record((perf_counter() - v.trigger_time + max(0.0, dac_delay)) * 1000)
+                v.trigger_time = None
+            active = True
+
+        # Fast path : aucun voice -> silence
+        if not active:
+            outdata.fill(0)
+            mix.prev_gain = gain
+            return
+
+        # Somme pondérée de tous les voices en une seule opération
+        if gain == mix.prev_gain:
+            mix.gain.fill(gain)
+            np.multiply(weights, mix.gain, out=weights)
+            np.dot(weights, mix.flat, out=mix.out_flat)
+        else:
+            # Le volume a changé : rampe de gain sur le bloc pour éviter le "zipper noise"
+            np.dot(weights, mix.flat, out=mix.out_flat)
+            np.multiply(mix.out, mix.fill_ramp(mix.prev_gain, gain), out=mix.out)
+            mix.prev_gain = gain
+        np.copyto(outdata, mix.out)
@@ -8,26 +8,412 @@ import numpy as np
 import threading
 import time
 
+import os
 import uuid
 import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Essayer d'importer depuis le même dossier ou via src
 try:
     from utils import center_window
+    from peaks import PeakPyramid
+    from dsp import detect_cues
 except ImportError:
     from src.utils import center_window
+    from src.peaks import PeakPyramid
+    from src.dsp import detect_cues
+
+def trim_file(path, start_ms, end_ms, fade_in_ms=10, fade_out_ms=0):
+    """
+    Réécrit le fichier avec seulement [start_ms, end_ms] (et les fondus).
+    Utilisé pour "appliquer" un trim non destructif au fichier. Retourne True si succès.
+    Choisit le chemin le moins coûteux selon le format :
+    - WAV / FLAC / AIFF : copie de la plage de samples via soundfile (exact au sample, sans perte)
+    - MP3 sans fondu : copie des frames MP3 concernées, sans ré-encodage (délai/padding gapless)
+    - sinon : FFmpeg (ré-encodage), puis pydub en dernier recours
+    """
+    path = Path(path)
+    try:
+        if _soundfile_trim(path, start_ms, end_ms, fade_in_ms, fade_out_ms):
+            return True
+    except Exception as e:
+        print(f"Erreur trim soundfile '{path}': {e}")
+    # Le fade-in anti-pop de 10ms est de toute façon appliqué à la lecture
+    if path.suffix.lower() == '.mp3' and fade_in_ms <= 10 and fade_out_ms <= 0:
+        try:
+            if _mp3_frame_trim(path, start_ms, end_ms):
+                return True
+        except Exception as e:
+            print(f"Erreur trim MP3 '{path}': {e}")
+    if _ffmpeg_trim(path, start_ms, end_ms, fade_in_ms, fade_out_ms):
+        return True
+    # Fallback sur pydub si FFmpeg échoue
+    try:
+        segment = AudioSegment.from_file(str(path))[int(start_ms):int(end_ms)]
+        segment = segment.fade_in(int(fade_in_ms)).fade_out(int(fade_out_ms))
+        temp_output = path.parent / f"temp_trim_{uuid.uuid4().hex[:8]}{path.suffix}"
+        segment.export(str(temp_output), format=path.suffix[1:])
+        temp_output.replace(path)
+        return True
+    except Exception as e:
+        print(f"Erreur trim '{path}': {e}")
+        return False
+
+
+# Formats PCM / sans perte réécrits directement par soundfile, et type de lecture sans perte par sous-type
+_SOUNDFILE_FORMATS = ('WAV', 'WAVEX', 'FLAC', 'AIFF')
+_SOUNDFILE_DTYPES = {'PCM_S8': 'int16', 'PCM_U8': 'int16', 'PCM_16': 'int16',
+                     'PCM_24': 'int32', 'PCM_32': 'int32', 'FLOAT': 'float32', 'DOUBLE': 'float64'}
+
+
+def _apply_edge_fades(data, pos, total, fade_in, fade_out):
+    """Fondus linéaires sur un bloc (data commence à la frame pos d'un extrait de total frames)"""
+    n = len(data)
+    if pos >= fade_in and pos + n <= total - fade_out:
+        return
+    idx = np.arange(pos, pos + n, dtype=np.float64)
+    gain = np.ones(n)
+    if fade_in:
+        gain = np.minimum(gain, idx / fade_in)
+    if fade_out:
+        gain = np.minimum(gain, (total - 1 - idx) / fade_out)
+    gain = np.clip(gain, 0.0, 1.0).reshape(-1, 1)
+    if np.issubdtype(data.dtype, np.integer):
+        data[:] = np.round(data * gain).astype(data.dtype)
+    else:
+        data *= gain.astype(data.dtype)
+
+
+def _soundfile_trim(path, start_ms, end_ms, fade_in_ms, fade_out_ms, block_frames=65536):
+    """Copie par blocs de la plage de samples (WAV/FLAC/AIFF), même format et sous-type. False si non supporté"""
+    try:
+        info = sf.info(str(path))
+    except Exception:
+        return False
+    if info.format not in _SOUNDFILE_FORMATS:
+        return False
+    dtype = _SOUNDFILE_DTYPES.get(info.subtype, 'float32')
+    rate = info.samplerate
+    start = max(0, int(round(start_ms * rate / 1000)))
+    end = min(info.frames, int(round(end_ms * rate / 1000)))
+    total = end - start
+    if total <= 0:
+        return False
+    fade_in = min(total, int(fade_in_ms * rate / 1000))
+    fade_out = min(total - fade_in, int(fade_out_ms * rate / 1000))
+    
+    temp_output = path.parent / f"temp_trim_{uuid.uuid4().hex[:8]}{path.suffix}"
+    try:
+        with sf.SoundFile(str(path)) as src, \
+                sf.SoundFile(str(temp_output), 'w', samplerate=rate, channels=info.channels,
+                             format=info.format, subtype=info.subtype) as dst:
+            src.seek(start)
+            pos = 0
+            while pos < total:
+                data = src.read(min(block_frames, total - pos), dtype=dtype, always_2d=True)
+                if not len(data):
+                    break
+                _apply_edge_fades(data, pos, total, fade_in, fade_out)
+                dst.write(data)
+                pos += len(data)
+        temp_output.replace(path)
+        return True
+    except Exception:
+        temp_output.unlink(missing_ok=True)
+        raise
+
+
+# MP3 (Layer III) : débits (kbps) et fréquences par version MPEG (bits de version de l'en-tête)
+_MP3_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),      # MPEG1
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),          # MPEG2
+    0: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),          # MPEG2.5
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _id3v2_size(data):
+    """Taille du tag ID3v2 en tête de fichier (0 si absent)"""
+    if data[:3] != b'ID3' or len(data) < 10:
+        return 0
+    return 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+
+
+_MP3_DECODER_DELAY = 529  # Retard du banc de filtres, ajouté par les décodeurs au délai du tag LAME
+
+
+def _mp3_side_info_length(version, mono):
+    if version == 3:
+        return 17 if mono else 32
+    return 9 if mono else 17
+
+
+def _lame_tag(data, tag, end):
+    """(délai, padding) en samples lus dans l'extension LAME d'une frame Xing/Info, None si absente"""
+    flags = int.from_bytes(data[tag + 4:tag + 8], 'big')
+    pos = tag + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+    if pos + 24 > end or not data[pos]:
+        return None
+    return data[pos + 21] << 4 | data[pos + 22] >> 4, (data[pos + 22] & 0x0F) << 8 | data[pos + 23]
+
+
+def _mp3_frames(data):
+    """
+    Liste des frames audio MP3 : (offset, longueur, main_data_begin, début des données principales),
+    et le format du flux (dict rate, spf, version, header, gapless).
+    Ignore le tag ID3v2 de tête, la frame Xing/Info (son délai/padding LAME est gardé dans 'gapless')
+    et le tag ID3v1 de fin.
+    """
+    pos = _id3v2_size(data)
+    end = len(data) - 128 if data[-128:-125] == b'TAG' else len(data)
+    
+    frames = []
+    fmt = None
+    gapless = None
+    while pos + 4 <= end:
+        b1, b2 = data[pos + 1], data[pos + 2]
+        version = (b1 >> 3) & 3
+        valid = (data[pos] == 0xFF and (b1 & 0xE0) == 0xE0 and version != 1
+                 and (b1 >> 1) & 3 == 1                       # Layer III
+                 and 0 < (b2 >> 4) < 15 and (b2 >> 2) & 3 != 3)
+        if not valid:
+            pos += 1  # Resynchronisation
+            continue
+        rate = _MP3_SAMPLE_RATES[version][(b2 >> 2) & 3]
+        bitrate = _MP3_BITRATES[version][b2 >> 4] * 1000
+        padding = (b2 >> 1) & 1
+        spf = 1152 if version == 3 else 576
+        length = (144 if version == 3 else 72) * bitrate // rate + padding
+        if pos + length > end:
+            break  # Dernière frame tronquée
+        
+        side = pos + 4 + (0 if b1 & 1 else 2)  # CRC optionnel
+        side_length = _mp3_side_info_length(version, data[pos + 3] >> 6 == 3)
+        if not frames and data[side + side_length:side + side_length + 4] in (b'Xing', b'Info'):
+            # Frame d'en-tête : son nombre de frames serait faux après la coupe, elle est réécrite
+            gapless = _lame_tag(data, side + side_length, pos + length)
+            pos += length
+            continue
+        if fmt is None:
+            fmt = {'rate': rate, 'spf': spf, 'version': version, 'header': data[pos:pos + 4]}
+        elif (fmt['rate'], fmt['spf']) != (rate, spf):
+            return None, None  # Flux hétérogène : laisser FFmpeg gérer
+        main_data_begin = (data[side] << 1 | data[side + 1] >> 7) if version == 3 else data[side]
+        frames.append((pos, length, main_data_begin, side + side_length))
+        pos += length
+    if fmt is not None:
+        fmt['gapless'] = gapless
+    return frames, fmt
+
+
+def _mp3_header(fmt, min_length):
+    """En-tête (sans CRC) au format du flux, au plus petit débit dont la frame fait au moins min_length octets"""
+    version, rate = fmt['version'], fmt['rate']
+    for index, bitrate in enumerate(_MP3_BITRATES[version]):
+        length = (144 if version == 3 else 72) * bitrate * 1000 // rate
+        if index and length >= min_length:
+            b1, b2, b3 = fmt['header'][1] | 1, index << 4 | (fmt['header'][2] & 0x0C), fmt['header'][3]
+            return bytes((0xFF, b1, b2, b3)), length
+    return None, 0
+
+
+def _mp3_silent_frame(fmt, reservoir):
+    """
+    Frame autonome qui décode en silence (informations annexes à zéro : main_data_begin = 0,
+    aucune donnée utile) et dont les octets de fin servent de réservoir de bits à la frame suivante.
+    """
+    side_length = _mp3_side_info_length(fmt['version'], fmt['header'][3] >> 6 == 3)
+    header, length = _mp3_header(fmt, 4 + side_length + len(reservoir))
+    if header is None:
+        return None
+    return header + bytes(length - 4 - len(reservoir)) + reservoir
+
+
+def _lame_crc(data):
+    """CRC-16 (polynôme 0x8005, réfléchi) utilisé par le tag LAME"""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def _mp3_info_frame(fmt, frame_sizes, delay, padding):
+    """Frame Xing + extension LAME : nombre de frames, table de recherche, délai et padding gapless"""
+    side_length = _mp3_side_info_length(fmt['version'], fmt['header'][3] >> 6 == 3)
+    # Xing (4 + 4 + 4 + 4 + 100 + 4) + LAME (36)
+    header, length = _mp3_header(fmt, 4 + side_length + 156)
+    if header is None:
+        return None
+    total = length + sum(frame_sizes)
+    offsets = [length]
+    for size in frame_sizes[:-1]:
+        offsets.append(offsets[-1] + size)
+    toc = bytes(min(255, offsets[i * len(frame_sizes) // 100] * 256 // total) for i in range(100))
+    
+    xing = (b'Xing' + (0x0F).to_bytes(4, 'big') + len(frame_sizes).to_bytes(4, 'big')
+            + total.to_bytes(4, 'big') + toc + bytes(4))
+    lame = (b'LAME3.100' + bytes(12)
+            + bytes((delay >> 4, (delay & 0x0F) << 4 | padding >> 8, padding & 0xFF))
+            + bytes(4) + total.to_bytes(4, 'big') + bytes(2))
+    frame = bytearray(header + bytes(side_length) + xing + lame)
+    frame += bytes(length - len(frame) - 2)
+    # CRC du tag : tous les octets de la frame qui le précèdent
+    tag_crc = len(header) + side_length + len(xing) + len(lame)
+    frame[tag_crc:tag_crc] = _lame_crc(frame[:tag_crc]).to_bytes(2, 'big')
+    return bytes(frame)
+
+
+def _mp3_reservoir(data, frames, index):
+    """Octets de données principales des frames précédentes dont dépend la frame index (réservoir de bits)"""
+    needed = frames[index][2]
+    chunks, size = [], 0
+    for offset, length, _, main_data in reversed(frames[:index]):
+        if size >= needed:
+            break
+        chunks.append(data[main_data:offset + length])
+        size += offset + length - main_data
+    reservoir = b''.join(reversed(chunks))
+    return reservoir[len(reservoir) - needed:].rjust(needed, b'\0') if needed else b''
+
+
+def _mp3_frame_trim(path, start_ms, end_ms):
+    """
+    Coupe MP3 sans ré-encodage, exacte au sample pour les décodeurs gapless (FFmpeg, miniaudio...).
+    Les frames couvrant la sélection sont copiées telles quelles, précédées d'une frame silencieuse qui
+    porte le réservoir de bits de la première ; une nouvelle frame Xing/LAME indique le délai et le
+    padding à retirer au décodage. False si le fichier n'est pas analysable.
+    """
+    data = path.read_bytes()
+    frames, fmt = _mp3_frames(data)
+    if not frames:
+        return False
+    rate, spf = fmt['rate'], fmt['spf']
+    
+    # Position des samples du son dans le flux décodé brut (sans tag, les décodeurs ne retirent rien)
+    total = len(frames) * spf
+    offset = 0
+    if fmt['gapless']:
+        offset = fmt['gapless'][0] + _MP3_DECODER_DELAY
+        total -= fmt['gapless'][0] + fmt['gapless'][1]
+    start = max(0, int(round(start_ms * rate / 1000)))
+    end = min(total, int(round(end_ms * rate / 1000)))
+    if end <= start:
+        return False
+    
+    # Première frame copiée : deux granules (576 samples) avant celui du 1er sample, pour que le
+    # recouvrement de l'IMDCT et le banc de filtres de synthèse soient justes au point de coupe
+    first = max(0, (start + offset) // spf - 1152 // spf)
+    last = min(len(frames), (end + offset - 1) // spf + 1)
+    lead = _mp3_silent_frame(fmt, _mp3_reservoir(data, frames, first))
+    if lead is None:
+        return False
+    
+    # Le nouveau flux commence une frame (la frame silencieuse) avant `first`
+    delay = start + offset - (first - 1) * spf - _MP3_DECODER_DELAY
+    padding = (last - first + 1) * spf - delay - (end - start)
+    if not (0 <= delay < 4096 and _MP3_DECODER_DELAY <= padding < 4096):
+        return False
+    frame_sizes = [len(lead)] + [length for _, length, _, _ in frames[first:last]]
+    info = _mp3_info_frame(fmt, frame_sizes, delay, padding)
+    if info is None:
+        return False
+    
+    head = data[:_id3v2_size(data)]
+    tail = data[-128:] if data[-128:-125] == b'TAG' else b''
+    body = b''.join(data[pos:pos + length] for pos, length, _, _ in frames[first:last])
+    
+    temp_output = path.parent / f"temp_trim_{uuid.uuid4().hex[:8]}{path.suffix}"
+    try:
+        temp_output.write_bytes(head + info + lead + body + tail)
+        temp_output.replace(path)
+        return True
+    except Exception:
+        temp_output.unlink(missing_ok=True)
+        raise
+
+
+def _ffmpeg_trim(path, start_ms, end_ms, fade_in_ms, fade_out_ms):
+    """
+    Coupe avec FFmpeg (ré-encodage). Retourne True si succès, False sinon.
+    """
+    temp_output = None
+    try:
+        # Vérifier que ffmpeg est disponible
+        ffmpeg_path = shutil.which('ffmpeg')
+        if not ffmpeg_path:
+            return False
+        
+        # Créer un fichier temporaire pour la sortie
+        temp_output = path.parent / f"temp_trim_{uuid.uuid4().hex[:8]}{path.suffix}"
+        
+        start_sec = start_ms / 1000
+        duration_sec = (end_ms - start_ms) / 1000
+        
+        # Déterminer le codec en fonction de l'extension
+        ext = path.suffix.lower()
+        if ext == '.mp3':
+            codec_args = ['-c:a', 'libmp3lame', '-q:a', '2']  # Qualité VBR haute
+        elif ext == '.wav':
+            codec_args = ['-c:a', 'pcm_s16le']
+        elif ext in ['.ogg', '.opus']:
+            codec_args = ['-c:a', 'libopus', '-b:a', '192k']
+        elif ext == '.flac':
+            codec_args = ['-c:a', 'flac']
+        elif ext == '.aac' or ext == '.m4a':
+            codec_args = ['-c:a', 'aac', '-b:a', '192k']
+        else:
+            codec_args = ['-c:a', 'libmp3lame', '-q:a', '2']  # Fallback MP3
+        
+        # Fade-in (10ms minimum pour éviter le pop) et fade-out éventuel
+        fades = [f'afade=t=in:st=0:d={max(fade_in_ms, 10) / 1000:.3f}']
+        if fade_out_ms > 0:
+            fades.append(f'afade=t=out:st={max(0.0, duration_sec - fade_out_ms / 1000):.3f}:d={fade_out_ms / 1000:.3f}')
+        
+        cmd = [
+            ffmpeg_path, '-y',
+            '-ss', f'{start_sec:.3f}',
+            '-i', str(path),
+            '-t', f'{duration_sec:.3f}',
+            *codec_args,                      # Ré-encoder pour coupe propre
+            '-af', ','.join(fades),
+            str(temp_output)
+        ]
+        
+        subprocess.run(
+            cmd, 
+            capture_output=True, 
+            check=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+        )
+        
+        # Remplacer le fichier original par le fichier trimmé
+        temp_output.replace(path)
+        return True
+        
+    except Exception:
+        # Nettoyer le fichier temporaire en cas d'erreur
+        if temp_output is not None and temp_output.exists():
+            temp_output.unlink(missing_ok=True)
+        return False
+
 
 class WaveformTimeline(ctk.CTkCanvas):
-    """Widget de timeline audio avec waveform, sélection, règle et curseur de lecture"""
+    """Widget de timeline audio avec waveform, sélection, règle et curseur de lecture (zoom: Ctrl+molette)"""
+    
+    MIN_VIEW_MS = 50  # Zoom maximum (durée visible minimale)
+    SNAP_PX = 8       # Distance (pixels) à laquelle une poignée s'aimante sur une attaque
     
-    def __init__(self, master, audio_segment, height=200, bg_color="#2b2b2b", wave_color="#0078D4", select_color="#4f4f4f", **kwargs):
+    def __init__(self, master, peaks, height=200, bg_color="#2b2b2b", wave_color="#0078D4", select_color="#4f4f4f", **kwargs):
         super().__init__(master, height=height, bg=bg_color, highlightthickness=0, borderwidth=0, **kwargs)
         # Forcer la configuration pour être sûr
         self.configure(highlightthickness=0, borderwidth=0)
         
-        self.audio = audio_segment
-        self.duration_ms = len(self.audio)
+        # Pyramide de pics (PeakPyramid) : pas de samples complets en mémoire
+        self.peaks = peaks
+        self.duration_ms = max(1, int(peaks.duration_ms))
         self.height = height
         
         # Couleurs et Styles
@@ -35,6 +421,8 @@ class WaveformTimeline(ctk.CTkCanvas):
         self.select_color = select_color
         self.handle_color = "#ffffff"
         self.handle_hover_color = "#cccccc"
+        self.region_color = "#d18b2b"
+        self.onset_color = "#e8e8e8"
         self.playhead_color = "#ff4444"
         self.ruler_color = "#888888"
         self.ruler_text_color = "#aaaaaa"
@@ -49,12 +437,21 @@ class WaveformTimeline(ctk.CTkCanvas):
         self.dragging = None  # 'start', 'end', or 'playhead'
         self.hovering = None
         
+        # Régions marquées [(début ms, fin ms)], triées : exportées chacune comme un son
+        self.regions = []
+        
+        # Attaques détectées (ms, triées) : repères sur la règle et aimantation des poignées
+        self.onsets_ms = np.zeros(0)
+        
+        # Fenêtre visible (zoom / défilement)
+        self.view_start_ms = 0
+        self.view_end_ms = self.duration_ms
+        
         # Marge pour la règle (en haut)
         self.ruler_height = 25
         
-        # Samples pour la waveform
-        self.samples = None
-        self.generate_waveform_data()
+        # Enveloppe en cache : (largeur, début vue, fin vue, mins, maxs)
+        self._envelope = None
         
         # Bindings
         self.bind("<Configure>", self.on_resize)
@@ -62,37 +459,70 @@ class WaveformTimeline(ctk.CTkCanvas):
         self.bind("<B1-Motion>", self.on_drag)
         self.bind("<ButtonRelease-1>", self.on_release)
         self.bind("<Motion>", self.on_mouse_move)
+        self.bind("<Double-Button-1>", self.on_double_click)
+        self.bind("<Button-3>", self.on_right_click)
+        # Molette : défilement, Ctrl+molette : zoom autour du curseur
+        self.bind("<MouseWheel>", lambda e: self.on_wheel(e, -1 if e.delta > 0 else 1))
+        self.bind("<Control-MouseWheel>", lambda e: self.on_zoom(e, 1 if e.delta > 0 else -1))
+        self.bind("<Button-4>", lambda e: self.on_wheel(e, -1))
+        self.bind("<Button-5>", lambda e: self.on_wheel(e, 1))
+        self.bind("<Control-Button-4>", lambda e: self.on_zoom(e, 1))
+        self.bind("<Control-Button-5>", lambda e: self.on_zoom(e, -1))
 
-        
-    def generate_waveform_data(self):
-        """Convertit l'audio en array numpy pour la visualisation"""
-        # Convertir en mono
-        samples = np.array(self.audio.set_channels(1).get_array_of_samples())
-        
-        # Normaliser
-        if samples.dtype == np.int16:
-            samples = samples / 32768.0
-        elif samples.dtype == np.int32:
-            samples = samples / 2147483648.0
-            
-        self.samples = samples
+    def set_peaks(self, peaks):
+        """Remplace la pyramide (ex: chargement progressif) et redessine"""
+        self.peaks = peaks
+        self._envelope = None
+        duration_ms = max(1, int(peaks.duration_ms))
+        if duration_ms != self.duration_ms:
+            # Durée réelle connue en fin de décodage (estimation parfois approximative)
+            if self.end_ms >= self.duration_ms or self.end_ms > duration_ms:
+                self.end_ms = duration_ms
+            self.start_ms = min(self.start_ms, max(0, self.end_ms - 100))
+            self.playhead_ms = min(self.playhead_ms, duration_ms)
+            self.regions = [(start, min(end, duration_ms)) for start, end in self.regions if start < duration_ms]
+            self.duration_ms = duration_ms
+            self.view_start_ms, self.view_end_ms = 0, duration_ms
+        self.draw()
         
     def ms_to_x(self, ms):
-        """Convertit millisecondes en pixels"""
-        return (ms / self.duration_ms) * self.width
+        """Convertit millisecondes en pixels (dans la fenêtre visible)"""
+        return ((ms - self.view_start_ms) / (self.view_end_ms - self.view_start_ms)) * self.width
         
     def x_to_ms(self, x):
         """Convertit pixels en millisecondes"""
-        return max(0, min(self.duration_ms, int((x / self.width) * self.duration_ms)))
+        ms = self.view_start_ms + (x / self.width) * (self.view_end_ms - self.view_start_ms)
+        return max(0, min(self.duration_ms, int(ms)))
         
     def on_resize(self, event):
         self.width = event.width
         self.draw()
+
+    def set_view(self, start_ms, end_ms):
+        """Change la fenêtre visible (bornée à [0, durée])"""
+        span = max(min(self.MIN_VIEW_MS, self.duration_ms), min(self.duration_ms, end_ms - start_ms))
+        start_ms = max(0, min(start_ms, self.duration_ms - span))
+        if (start_ms, start_ms + span) != (self.view_start_ms, self.view_end_ms):
+            self.view_start_ms = start_ms
+            self.view_end_ms = start_ms + span
+            self.draw()
+
+    def on_zoom(self, event, direction):
+        """Zoom (direction > 0) ou dézoom centré sur la souris"""
+        anchor = self.view_start_ms + (event.x / self.width) * (self.view_end_ms - self.view_start_ms)
+        factor = 0.8 if direction > 0 else 1.25
+        self.set_view(anchor - (anchor - self.view_start_ms) * factor,
+                      anchor + (self.view_end_ms - anchor) * factor)
+
+    def on_wheel(self, event, direction):
+        """Défilement horizontal (10% de la vue par cran)"""
+        step = (self.view_end_ms - self.view_start_ms) * 0.1 * direction
+        self.set_view(self.view_start_ms + step, self.view_end_ms + step)
         
     def draw(self):
         self.delete("all")
         
-        if self.samples is None or self.width <= 0:
+        if self.peaks is None or self.width <= 0:
             return
             
         # 1. Dessiner la Waveform
@@ -101,81 +531,162 @@ class WaveformTimeline(ctk.CTkCanvas):
         # 2. Dessiner la Règle temporelle
         self.draw_ruler()
 
-        # 3. Dessiner l'Overlay (zones non sélectionnées assombries)
+        # 3. Dessiner les régions marquées et les attaques
+        self.draw_regions()
+        self.draw_onsets()
+
+        # 4. Dessiner l'Overlay (zones non sélectionnées assombries)
         self.draw_overlay()
         
-        # 4. Dessiner les Handles (Poignées)
+        # 5. Dessiner les Handles (Poignées)
         self.draw_handles()
 
-        # 5. Dessiner la Tête de lecture
+        # 6. Dessiner la Tête de lecture
         self.draw_playhead()
         
+    def compute_envelope(self, width):
+        """Min/max par colonne de pixels pour la fenêtre visible, lus dans la pyramide de pics"""
+        rate = self.peaks.sample_rate
+        return self.peaks.envelope(int(self.view_start_ms * rate / 1000),
+                                   int(self.view_end_ms * rate / 1000), width)
+
     def draw_waveform(self):
         # Hauteur disponible pour la waveform (sous la règle)
         wave_h = self.height - self.ruler_height
         mid_y = self.ruler_height + (wave_h / 2)
         scale_y = (wave_h / 2) * 0.95
         
-        # Downsampling AMÉLIORÉ : min/max par pixel pour garder les pics
-        samples_per_pixel = len(self.samples) / max(1, self.width)
+        # Enveloppe min/max par pixel (mise en cache tant que la largeur et la vue ne changent pas)
+        width = int(self.width)
+        key = (width, self.view_start_ms, self.view_end_ms)
+        if self._envelope is None or self._envelope[0] != key:
+            self._envelope = (key, *self.compute_envelope(width))
+        _, mins, maxs = self._envelope
         
-        for pixel_x in range(int(self.width)):
-            # Calculer la plage de samples pour ce pixel
-            start_idx = int(pixel_x * samples_per_pixel)
-            end_idx = int((pixel_x + 1) * samples_per_pixel)
-            end_idx = min(end_idx, len(self.samples))
-            
-            if start_idx >= len(self.samples):
-                break
-                
-            # Prendre le min et max dans cette plage pour garder l'enveloppe
-            chunk = self.samples[start_idx:end_idx]
-            if len(chunk) == 0:
-                continue
-                
-            min_val = np.min(chunk)
-            max_val = np.max(chunk)
-            
-            # Dessiner une ligne du min au max
-            y_min = mid_y - (min_val * scale_y)
-            y_max = mid_y - (max_val * scale_y)
-            
-            # Inverser si nécessaire pour que la ligne soit toujours de haut en bas
-            if y_min > y_max:
-                y_min, y_max = y_max, y_min
-                
-            self.create_line(pixel_x, y_min, pixel_x, y_max, fill=self.wave_color)
+        # Un seul polygone : bord haut (max) de gauche à droite, puis bord bas (min) en retour
+        xs = np.arange(width, dtype=np.float32)
+        coords = np.empty((2 * width, 2), dtype=np.float32)
+        coords[:width, 0] = xs
+        coords[:width, 1] = mid_y - maxs * scale_y
+        coords[width:, 0] = xs[::-1]
+        coords[width:, 1] = (mid_y - mins * scale_y)[::-1]
+        # outline : une ligne reste visible même sur les passages silencieux
+        self.create_polygon(coords.ravel().tolist(), fill=self.wave_color, outline=self.wave_color, tags="waveform")
 
     def draw_ruler(self):
         # Fond de la règle
         self.create_rectangle(0, 0, self.width, self.ruler_height, fill="#222222", outline="")
         
-        # Déterminer l'intervalle des graduations (optimisé selon la durée)
-        duration_sec = self.duration_ms / 1000
+        # Déterminer l'intervalle des graduations (selon la durée visible)
+        view_sec = (self.view_end_ms - self.view_start_ms) / 1000
         
-        if duration_sec < 5: interval = 0.5
-        elif duration_sec < 10: interval = 1
-        elif duration_sec < 30: interval = 2
-        elif duration_sec < 60: interval = 5
+        if view_sec < 0.5: interval = 0.05
+        elif view_sec < 1: interval = 0.1
+        elif view_sec < 2: interval = 0.2
+        elif view_sec < 5: interval = 0.5
+        elif view_sec < 10: interval = 1
+        elif view_sec < 30: interval = 2
+        elif view_sec < 60: interval = 5
         else: interval = 10
         
-        t = 0
-        while t <= duration_sec:
+        # Première graduation visible
+        k = int(self.view_start_ms / 1000 // interval)
+        t = k * interval
+        while t * 1000 <= self.view_end_ms:
             x = self.ms_to_x(t * 1000)
             
             # Grande graduation avec texte
             self.create_line(x, 0, x, self.ruler_height, fill=self.ruler_color)
-            self.create_text(x + 2, self.ruler_height / 2, text=f"{t}s", anchor="w", fill=self.ruler_text_color, font=("Arial", 8))
+            self.create_text(x + 2, self.ruler_height / 2, text=f"{round(t, 3):g}s", anchor="w", fill=self.ruler_text_color, font=("Arial", 8))
             
             # Petites graduations intermédiaires
-            if t + (interval/2) <= duration_sec:
-                x_mid = self.ms_to_x((t + interval/2) * 1000)
-                self.create_line(x_mid, self.ruler_height/2, x_mid, self.ruler_height, fill=self.ruler_color)
+            x_mid = self.ms_to_x((t + interval/2) * 1000)
+            self.create_line(x_mid, self.ruler_height/2, x_mid, self.ruler_height, fill=self.ruler_color)
             
-            t += interval
+            k += 1
+            t = k * interval
             
         self.create_line(0, self.ruler_height, self.width, self.ruler_height, fill=self.ruler_color)
 
+    def draw_regions(self):
+        """Régions marquées : bandeau numéroté sous la règle et bornes en pointillés"""
+        band = 14
+        for number, (start, end) in enumerate(self.regions, start=1):
+            if end < self.view_start_ms or start > self.view_end_ms:
+                continue
+            x1, x2 = self.ms_to_x(start), self.ms_to_x(end)
+            self.create_rectangle(x1, self.ruler_height, x2, self.ruler_height + band,
+                                  fill=self.region_color, outline="", tags="region")
+            self.create_text(max(x1, 0) + 3, self.ruler_height + band / 2, text=str(number), anchor="w",
+                             fill="#ffffff", font=("Arial", 8, "bold"), tags="region")
+            for x in (x1, x2):
+                self.create_line(x, self.ruler_height, x, self.height, fill=self.region_color, dash=(3, 3), tags="region")
+
+    def draw_onsets(self):
+        """Attaques détectées : petits repères en bas de la règle (masqués si trop denses)"""
+        first, last = np.searchsorted(self.onsets_ms, (self.view_start_ms, self.view_end_ms))
+        if last - first > self.width / 4:
+            return
+        for ms in self.onsets_ms[first:last]:
+            x = self.ms_to_x(ms)
+            self.create_line(x, self.ruler_height - 6, x, self.ruler_height, fill=self.onset_color, tags="onset")
+
+    def set_onsets(self, onsets_ms):
+        self.onsets_ms = np.asarray(onsets_ms, dtype=np.float64)
+        self.draw()
+
+    def snap(self, ms):
+        """Attaque la plus proche de ms si elle est à moins de SNAP_PX pixels, sinon ms"""
+        if not len(self.onsets_ms):
+            return ms
+        i = int(np.searchsorted(self.onsets_ms, ms))
+        nearest = min(self.onsets_ms[max(0, i - 1):i + 1], key=lambda onset: abs(onset - ms))
+        tolerance = self.SNAP_PX * (self.view_end_ms - self.view_start_ms) / max(1, self.width)
+        return int(nearest) if abs(nearest - ms) <= tolerance else ms
+
+    # --- Régions ---
+
+    def add_region(self):
+        """Marque la sélection courante comme région. Retourne False si elle l'est déjà"""
+        region = (self.start_ms, self.end_ms)
+        if region in self.regions:
+            return False
+        self.regions.append(region)
+        self.regions.sort()
+        self.draw()
+        self.event_generate("<<RegionsChanged>>")
+        return True
+
+    def region_at(self, ms):
+        """Index de la plus courte région contenant ms, ou None"""
+        found = [(end - start, i) for i, (start, end) in enumerate(self.regions) if start <= ms <= end]
+        return min(found)[1] if found else None
+
+    def remove_region(self, index):
+        del self.regions[index]
+        self.draw()
+        self.event_generate("<<RegionsChanged>>")
+
+    def clear_regions(self):
+        if self.regions:
+            self.regions = []
+            self.draw()
+            self.event_generate("<<RegionsChanged>>")
+
+    def on_double_click(self, event):
+        """Double-clic sur une région : elle devient la sélection"""
+        index = self.region_at(self.x_to_ms(event.x))
+        if index is not None:
+            self.start_ms, self.end_ms = self.regions[index]
+            self.update_visuals()
+            self.event_generate("<<SelectionChanged>>")
+
+    def on_right_click(self, event):
+        """Clic droit sur une région : la supprime"""
+        index = self.region_at(self.x_to_ms(event.x))
+        if index is not None:
+            self.remove_region(index)
+
     def draw_overlay(self):
         x_start = self.ms_to_x(self.start_ms)
         x_end = self.ms_to_x(self.end_ms)
@@ -277,6 +788,8 @@ class WaveformTimeline(ctk.CTkCanvas):
 
     def on_drag(self, event):
         ms = self.x_to_ms(event.x)
+        if self.dragging in ('start', 'end') and not event.state & 0x0001:
+            ms = self.snap(ms)  # Maj enfoncée : pas d'aimantation
         
         if self.dragging == 'start':
             if ms < self.end_ms - 100:
@@ -319,54 +832,178 @@ class WaveformTimeline(ctk.CTkCanvas):
 class AudioTrimDialog(ctk.CTkToplevel):
     """Dialog pour trimmer (couper) un fichier audio - Version Avancée"""
     
-    def __init__(self, parent, audio_path, callback):
+    LOAD_CHUNK_SEC = 0.5      # Taille des blocs décodés
+    LOAD_REFRESH_SEC = 0.15   # Rafraîchissement max de la waveform pendant le chargement
+    
+    def __init__(self, parent, audio_path, callback, trim=None, on_export_regions=None):
         super().__init__(parent)
         self.audio_path = Path(audio_path)
-        self.callback = callback
+        self.callback = callback  # callback(chemin, trim) : trim = dict en secondes ou None
+        self.initial_trim = trim
+        self.on_export_regions = on_export_regions  # on_export_regions([(nom, chemin)]) : une entrée par région
         
         self.title(f"Éditeur Audio - {self.audio_path.name}")
         center_window(self, 900, 550, parent)
         
         self.playing = False
-        self.stop_playback = threading.Event()
         self.playback_start_ms = 0
+        self._preview_stream = None
+        self._preview_generation = 0  # Ignore la fin d'un ancien stream
         
-        # UI de chargement
+        # Décodage progressif (miniaudio, dans le process) : samples float32 (frames, canaux)
+        self.samples = None
+        self.sample_rate = 0
+        self.loaded = False
+        self.stop_loading = threading.Event()
+        self.timeline = None
+        
+        # UI de chargement (jusqu'au premier bloc décodé)
         self.loading_frame = ctk.CTkFrame(self, fg_color="transparent")
         self.loading_frame.pack(expand=True, fill="both")
         
         self.lbl_loading = ctk.CTkLabel(self.loading_frame, text="Chargement de l'audio...", font=("Segoe UI", 16))
         self.lbl_loading.pack(expand=True)
         
-        self.progress = ctk.CTkProgressBar(self.loading_frame, width=200, mode="indeterminate")
+        self.progress = ctk.CTkProgressBar(self.loading_frame, width=200, mode="determinate")
         self.progress.pack(pady=10)
-        self.progress.start()
+        self.progress.set(0)
         
         # Charger en background
         threading.Thread(target=self._load_audio_thread, daemon=True).start()
         
         # Bindings Clavier
         self.bind("<space>", self.toggle_playback)
+        if self.on_export_regions:
+            self.bind("<m>", self.add_region)
         self.focus_set()
         
     def _load_audio_thread(self):
         try:
-            self.audio = AudioSegment.from_file(str(self.audio_path))
-            self.duration_ms = len(self.audio)
+            import miniaudio
+            
+            path = str(self.audio_path)
+            info = miniaudio.get_file_info(path)
+            rate, channels = info.sample_rate, info.nchannels
+            total = max(1, info.num_frames)
+            self.sample_rate = rate
+            self.duration_ms = total * 1000 / rate
+            
+            # Pyramide en cache : éditeur affiché tout de suite, sans attendre le décodage (la waveform
+            # ne lit jamais les samples) ; sinon construite au fil du décodage
+            cached = PeakPyramid.load(self.audio_path)
+            builder = None if cached else PeakPyramid.Builder(rate)
+            if cached:
+                self.after(0, lambda: self._on_load_progress(cached, 0.0))
+            
+            buffer = np.empty((total, channels), dtype=np.float32)
+            pos = 0
+            last_refresh = 0.0
+            for chunk in miniaudio.stream_file(path, output_format=miniaudio.SampleFormat.FLOAT32,
+                                               nchannels=channels, sample_rate=rate,
+                                               frames_to_read=int(rate * self.LOAD_CHUNK_SEC)):
+                if self.stop_loading.is_set():
+                    return
+                data = np.frombuffer(chunk, dtype=np.float32).reshape(-1, channels)
+                if pos + len(data) > len(buffer):
+                    # Nombre de frames sous-estimé (certains MP3 VBR) : agrandir
+                    buffer = np.concatenate((buffer, np.empty((max(len(data), len(buffer)), channels), dtype=np.float32)))
+                buffer[pos:pos + len(data)] = data
+                pos += len(data)
+                if builder is not None:
+                    builder.push(data.mean(axis=1) if channels > 1 else data[:, 0])
+                
+                now = time.perf_counter()
+                if (builder is not None and pos == len(data)) or now - last_refresh >= self.LOAD_REFRESH_SEC:
+                    last_refresh = now
+                    peaks = cached or builder.snapshot(total)
+                    self.after(0, lambda p=peaks, f=min(1.0, pos / total): self._on_load_progress(p, f))
+            
+            self.samples = buffer[:pos]
+            self.duration_ms = pos * 1000 / rate
+            peaks = cached
+            if builder is not None:
+                peaks = builder.finish()
+                peaks.save(self.audio_path)
             
             # Revenir sur le thread principal pour l'UI
-            self.after(0, self._on_load_complete)
+            self.after(0, lambda: self._on_load_complete(peaks))
             
         except Exception as e:
-            self.after(0, lambda: self._on_load_error(e))
+            if not self.stop_loading.is_set():
+                self.after(0, lambda err=e: self._on_load_error(err))
             
     def _on_load_error(self, error):
         messagebox.showerror("Erreur", f"Impossible de charger l'audio:\n{error}")
         self.destroy()
         
-    def _on_load_complete(self):
-        self.loading_frame.destroy()
-        self.setup_ui()
+    def _on_load_progress(self, peaks, fraction):
+        """Appelé sur le thread UI à chaque étape du décodage"""
+        if self.stop_loading.is_set():
+            return
+        if self.timeline is None:
+            # Premier bloc : afficher l'éditeur avec une waveform grossière
+            self.peaks = peaks
+            self.loading_frame.destroy()
+            self.setup_ui()
+        elif peaks is not self.timeline.peaks:
+            self.timeline.set_peaks(peaks)
+        self.load_progress.set(fraction)
+        
+    def _on_load_complete(self, peaks):
+        if self.stop_loading.is_set():
+            return
+        if self.timeline is None:
+            self.peaks = peaks
+            self.loading_frame.destroy()
+            self.setup_ui()
+        else:
+            self.timeline.set_peaks(peaks)
+            self.on_selection_change(None)
+        self.loaded = True
+        self.load_progress.pack_forget()
+        self.btn_play.configure(state="normal")
+        threading.Thread(target=self._analyze_cues_thread, args=(peaks,), daemon=True).start()
+        if self.on_export_regions:
+            self.on_regions_change(None)
+    
+    def _analyze_cues_thread(self, peaks):
+        """Attaques et coupe suggérée, hors du thread Tk (mises en cache avec la pyramide de pics)"""
+        try:
+            if 'onsets' in peaks.extras and 'cues' in peaks.extras:
+                onsets, cues = peaks.extras['onsets'], peaks.extras['cues']
+            else:
+                onsets, start_ms, end_ms = detect_cues(self.samples, self.sample_rate)
+                cues = np.array([start_ms, end_ms])
+                peaks.extras.update(onsets=onsets, cues=cues)
+                peaks.save(self.audio_path)
+            if not self.stop_loading.is_set():
+                self.after(0, lambda: self._on_cues_ready(onsets, float(cues[0]), float(cues[1])))
+        except Exception as e:
+            print(f"Erreur analyse des attaques: {e}")
+
+    def _on_cues_ready(self, onsets, start_ms, end_ms):
+        if self.stop_loading.is_set():
+            return
+        self.timeline.set_onsets(onsets)
+        self.suggested_cut = (int(start_ms), min(int(end_ms), self.timeline.duration_ms))
+        self.btn_suggest.configure(state="normal")
+        # Nouveau son, sélection pas encore touchée : partir directement de la coupe suggérée
+        if not self.initial_trim and self.timeline.get_selection() == (0, self.timeline.duration_ms):
+            self.apply_suggested_cut()
+
+    def apply_suggested_cut(self):
+        start, end = self.suggested_cut
+        if end - start < 100:
+            return
+        self.timeline.start_ms, self.timeline.end_ms = start, end
+        self.timeline.update_visuals()
+        self.on_selection_change(None)
+
+    def destroy(self):
+        self.stop_loading.set()
+        self._close_preview()
+        self.samples = None  # Le buffer PCM ne survit pas à l'éditeur
+        super().destroy()
     
     def setup_ui(self):
         # Container principal avec padding
@@ -380,14 +1017,21 @@ class AudioTrimDialog(ctk.CTkToplevel):
         title = ctk.CTkLabel(top_frame, text="Éditeur de Waveform", font=("Segoe UI", 20, "bold"))
         title.pack(side="left")
         
-        help_text = ctk.CTkLabel(top_frame, text="[Espace] pour Lire/Pause  |  Glissez les barres blanches pour couper", text_color="gray")
+        help_text = ctk.CTkLabel(top_frame, text="[Espace] pour Lire/Pause  |  Glissez les barres blanches pour couper  |  Ctrl+molette pour zoomer  |  Maj pour ne pas aimanter"
+                                 + ("  |  [M] Marquer une région" if self.on_export_regions else ""), text_color="gray")
         help_text.pack(side="right")
         
         # Timeline
-        self.timeline = WaveformTimeline(main_frame, self.audio, height=250, bg_color="#1a1a1a", wave_color="#2b825b")
+        self.timeline = WaveformTimeline(main_frame, self.peaks, height=250, bg_color="#1a1a1a", wave_color="#2b825b")
         self.timeline.pack(fill="x", pady=10, expand=True)
         self.timeline.bind("<<SelectionChanged>>", self.on_selection_change)
         
+        # Trim existant : reprendre les points d'entrée / sortie
+        if self.initial_trim:
+            self.timeline.start_ms = int(self.initial_trim['start'] * 1000)
+            if self.initial_trim.get('end') is not None:
+                self.timeline.end_ms = min(self.timeline.duration_ms, int(self.initial_trim['end'] * 1000))
+        
         # Dashboard (Temps)
         dash_frame = ctk.CTkFrame(main_frame)
         dash_frame.pack(fill="x", pady=10)
@@ -405,8 +1049,37 @@ class AudioTrimDialog(ctk.CTkToplevel):
         controls_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         controls_frame.pack(pady=10)
         
-        self.btn_play = ctk.CTkButton(controls_frame, text="▶ Lire / Stop", command=self.toggle_playback, width=160, height=40, font=("Segoe UI", 13, "bold"))
+        self.btn_play = ctk.CTkButton(controls_frame, text="▶ Lire / Stop", command=self.toggle_playback, width=160, height=40, font=("Segoe UI", 13, "bold"),
+                                      state="disabled")  # Activé une fois le décodage terminé
         self.btn_play.pack(padx=5)
+        
+        # Coupe suggérée (silences de début / fin), disponible une fois l'analyse terminée
+        self.suggested_cut = None
+        self.btn_suggest = ctk.CTkButton(controls_frame, text="✨ Coupe suggérée", command=self.apply_suggested_cut,
+                                         width=160, state="disabled", fg_color="transparent", border_width=1)
+        self.btn_suggest.pack(pady=(5, 0))
+        
+        # Progression réelle du décodage (masquée à la fin)
+        self.load_progress = ctk.CTkProgressBar(controls_frame, width=160, mode="determinate")
+        self.load_progress.pack(pady=(5, 0))
+        self.load_progress.set(0)
+        
+        # Régions : découper un long enregistrement en plusieurs sons en une passe
+        if self.on_export_regions:
+            regions_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+            regions_frame.pack(pady=(0, 10))
+            
+            self.btn_add_region = ctk.CTkButton(regions_frame, text="＋ Marquer la région (M)", command=self.add_region, width=180)
+            self.btn_add_region.pack(side="left", padx=5)
+            
+            self.lbl_regions = ctk.CTkLabel(regions_frame, text="Aucune région", text_color="gray")
+            self.lbl_regions.pack(side="left", padx=10)
+            
+            self.btn_export_regions = ctk.CTkButton(regions_frame, text="📤 Exporter les régions", command=self.export_regions,
+                                                    width=180, state="disabled")
+            self.btn_export_regions.pack(side="left", padx=5)
+            
+            self.timeline.bind("<<RegionsChanged>>", self.on_regions_change)
 
         # Actions Finales
         action_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
@@ -417,6 +1090,20 @@ class AudioTrimDialog(ctk.CTkToplevel):
         
         self.btn_cancel = ctk.CTkButton(action_frame, text="Annuler", command=self.destroy, fg_color="transparent", border_width=1, text_color="gray", height=45)
         self.btn_cancel.pack(side="right", padx=10)
+        
+        # Fondus (appliqués à la lecture, comme la coupe : le fichier reste intact)
+        ctk.CTkLabel(action_frame, text="Fondu entrée (ms)").pack(side="left", padx=(0, 5))
+        self.entry_fade_in = ctk.CTkEntry(action_frame, width=60)
+        self.entry_fade_in.pack(side="left")
+        ctk.CTkLabel(action_frame, text="Fondu sortie (ms)").pack(side="left", padx=(15, 5))
+        self.entry_fade_out = ctk.CTkEntry(action_frame, width=60)
+        self.entry_fade_out.pack(side="left")
+        if self.initial_trim:
+            self.entry_fade_in.insert(0, str(int(self.initial_trim['fade_in'] * 1000)))
+            self.entry_fade_out.insert(0, str(int(self.initial_trim['fade_out'] * 1000)))
+        
+        if self.initial_trim:
+            self.on_selection_change(None)
 
     def on_selection_change(self, event):
         start, end = self.timeline.get_selection()
@@ -425,177 +1112,210 @@ class AudioTrimDialog(ctk.CTkToplevel):
         self.lbl_duration.configure(text=f"Sélection: {(end-start)/1000:.2f}s")
 
     def toggle_playback(self, event=None):
+        if not self.loaded:
+            return
         if self.playing:
             self.stop_audio()
         else:
             self.play_from_cursor()
 
-    def play_audio_thread(self, start_ms, end_ms=None):
+    def play_audio(self, start_ms, end_ms=None):
+        """Prévisualisation : le callback lit directement des vues du buffer décodé (aucune copie)"""
         if self.playing:
-            self.stop_audio()
-            time.sleep(0.1)
+            self._close_preview()
             
-        self.playing = True
-        self.stop_playback.clear()
+        fs = self.sample_rate
+        self._preview_pos = int(start_ms * fs / 1000)
+        self._preview_end = int(end_ms * fs / 1000) if end_ms else len(self.samples)
+        self._preview_clock = None  # (frame du début du bloc, heure DAC du bloc), mis à jour par le callback
+        self._preview_done = False
+        self._preview_generation += 1
+        generation = self._preview_generation
         self.playback_start_ms = start_ms
-        self.btn_play.configure(text="⬛  Stop (Espace)", fg_color="#d13438", hover_color="#a02a2e")
         
-        def run():
+        try:
+            self._preview_stream = sd.OutputStream(samplerate=fs, channels=self.samples.shape[1], dtype='float32',
+                                                   callback=self._preview_callback,
+                                                   finished_callback=lambda: self._on_preview_finished(generation))
+            self._preview_stream.start()
+        except Exception as e:
+            print(f"Erreur lecture: {e}")
+            self._preview_stream = None
+            return
+        
+        self.playing = True
+        self.btn_play.configure(text="⬛  Stop (Espace)", fg_color="#d13438", hover_color="#a02a2e")
+        self._tick()
+
+    def _preview_callback(self, outdata, frames, time_info, status):
+        """Callback audio : copie une tranche du buffer, avance le compteur de frames"""
+        pos = self._preview_pos
+        n = max(0, min(frames, self._preview_end - pos))
+        outdata[:n] = self.samples[pos:pos + n]
+        if n < frames:
+            outdata[n:] = 0
+        self._preview_clock = (pos, time_info.outputBufferDacTime)
+        self._preview_pos = pos + n
+        if n < frames:
+            raise sd.CallbackStop
+
+    def _on_preview_finished(self, generation):
+        # Appelé par sounddevice (hors thread UI) : le ticker s'occupe de l'interface
+        if generation == self._preview_generation:
+            self._preview_done = True
+
+    def _current_preview_ms(self):
+        """Position entendue : frame du dernier bloc + temps écoulé depuis son passage au DAC"""
+        clock = self._preview_clock
+        stream = self._preview_stream
+        if clock is None or stream is None:
+            return self.playback_start_ms
+        block_frame, dac_time = clock
+        frame = block_frame + (stream.time - dac_time) * self.sample_rate
+        frame = max(block_frame, min(frame, self._preview_pos))
+        return frame * 1000 / self.sample_rate
+
+    def _tick(self):
+        """Unique ticker Tk pendant la lecture : déplace la tête de lecture"""
+        if not self.playing:
+            return
+        if self._preview_done:
+            self.timeline.set_playhead(self._preview_end * 1000 / self.sample_rate)
+            self._close_preview()
+            self._reset_play_button()
+            return
+        self.timeline.set_playhead(self._current_preview_ms())
+        self.after(30, self._tick)
+
+    def _close_preview(self):
+        self.playing = False
+        stream, self._preview_stream = self._preview_stream, None
+        if stream is not None:
             try:
-                segment = self.audio[start_ms:end_ms] if end_ms else self.audio[start_ms:]
-                
-                # OPTIMISATION: Extraire directement les samples numpy (pas d'export fichier)
-                samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
-                samples = samples / 32768.0  # Normaliser int16 -> float32
-                
-                # Reshape pour stéréo si nécessaire
-                if segment.channels == 2:
-                    samples = samples.reshape((-1, 2))
-                
-                fs = segment.frame_rate
-                total_duration = len(segment) / 1000.0
-                
-                # Jouer directement avec sounddevice
-                sd.play(samples, fs)
-                start_time = time.time()
-                
-                while self.playing and (time.time() - start_time) < total_duration:
-                    if self.stop_playback.is_set():
-                        sd.stop()
-                        self.playing = False
-                        break
-                    
-                    try:
-                        current_pos_ms = start_ms + (time.time() - start_time) * 1000
-                        if self.winfo_exists():
-                            self.after_idle(lambda ms=current_pos_ms: self.timeline.set_playhead(ms) if self.playing and self.timeline.winfo_exists() else None)
-                    except:
-                        break
-                    
-                    time.sleep(0.03)
-                
-                self.playing = False
-                
-                try:
-                    if self.winfo_exists():
-                        self.after_idle(lambda: self.btn_play.configure(text="▶ Lire (Espace)", fg_color=["#3B8ED0", "#1F6AA5"], hover_color=["#36719F", "#144870"]))
-                except:
-                    pass
-                
+                stream.abort()
+                stream.close()
             except Exception as e:
-                print(f"Erreur lecture: {e}")
-                self.playing = False
-                try:
-                    if self.winfo_exists():
-                        self.after_idle(lambda: self.btn_play.configure(text="▶ Lire (Espace)", fg_color=["#3B8ED0", "#1F6AA5"]))
-                except:
-                    pass
-        
-        threading.Thread(target=run, daemon=True).start()
+                print(f"Erreur arrêt lecture: {e}")
+
+    def _reset_play_button(self):
+        self.btn_play.configure(text="▶ Lire (Espace)", fg_color=["#3B8ED0", "#1F6AA5"], hover_color=["#36719F", "#144870"])
 
     def play_from_cursor(self):
-        self.play_audio_thread(self.timeline.playhead_ms)
+        self.play_audio(self.timeline.playhead_ms)
 
 
     def stop_audio(self):
-        self.stop_playback.set()
-        sd.stop()
-        self.playing = False
-        self.btn_play.configure(text="▶ Lire (Espace)", fg_color=["#3B8ED0", "#1F6AA5"], hover_color=["#36719F", "#144870"])
+        self._close_preview()
+        self._reset_play_button()
         # Remettre le curseur à la position de départ
         self.timeline.set_playhead(self.playback_start_ms)
 
-    def save_trimmed(self):
-        """Sauvegarde le segment trimmé dans un thread séparé pour ne pas bloquer l'UI"""
-        # Désactiver le bouton et afficher un indicateur de progression
-        self.btn_save.configure(state="disabled", text="⏳ Sauvegarde...")
-        self.btn_cancel.configure(state="disabled")
-        
+    def get_trim(self):
+        """Trim courant (secondes), ou None si le fichier entier est gardé sans fondu"""
         start, end = self.timeline.get_selection()
-        
-        def save_thread():
-            try:
-                # Essayer FFmpeg stream copy d'abord (beaucoup plus rapide)
-                if self._try_ffmpeg_trim(start, end):
-                    self.after(0, self._on_save_complete)
-                else:
-                    # Fallback sur pydub si FFmpeg échoue
-                    segment = self.audio[start:end]
-                    segment.export(str(self.audio_path), format=self.audio_path.suffix[1:])
-                    self.after(0, self._on_save_complete)
-                
-            except Exception as e:
-                self.after(0, lambda: self._on_save_error(str(e)))
-        
-        threading.Thread(target=save_thread, daemon=True).start()
-    
-    def _try_ffmpeg_trim(self, start_ms, end_ms):
-        """
-        Utilise FFmpeg avec stream copy pour couper l'audio sans ré-encoder.
-        Retourne True si succès, False sinon.
-        """
+        fade_in = self._read_fade(self.entry_fade_in)
+        fade_out = self._read_fade(self.entry_fade_out)
+        if start <= 0 and end >= self.timeline.duration_ms and not fade_in and not fade_out:
+            return None
+        return {
+            'start': start / 1000,
+            'end': end / 1000 if end < self.timeline.duration_ms else None,
+            'fade_in': fade_in / 1000,
+            'fade_out': fade_out / 1000,
+        }
+
+    @staticmethod
+    def _read_fade(entry):
         try:
-            # Vérifier que ffmpeg est disponible
-            ffmpeg_path = shutil.which('ffmpeg')
-            if not ffmpeg_path:
-                return False
-            
-            # Créer un fichier temporaire pour la sortie
-            temp_output = self.audio_path.parent / f"temp_trim_{uuid.uuid4().hex[:8]}{self.audio_path.suffix}"
-            
-            start_sec = start_ms / 1000
-            duration_sec = (end_ms - start_ms) / 1000
-            
-            # Déterminer le codec en fonction de l'extension
-            ext = self.audio_path.suffix.lower()
-            if ext == '.mp3':
-                codec_args = ['-c:a', 'libmp3lame', '-q:a', '2']  # Qualité VBR haute
-            elif ext == '.wav':
-                codec_args = ['-c:a', 'pcm_s16le']
-            elif ext in ['.ogg', '.opus']:
-                codec_args = ['-c:a', 'libopus', '-b:a', '192k']
-            elif ext == '.flac':
-                codec_args = ['-c:a', 'flac']
-            elif ext == '.aac' or ext == '.m4a':
-                codec_args = ['-c:a', 'aac', '-b:a', '192k']
-            else:
-                codec_args = ['-c:a', 'libmp3lame', '-q:a', '2']  # Fallback MP3
-            
-            cmd = [
-                ffmpeg_path, '-y',
-                '-ss', f'{start_sec:.3f}',
-                '-i', str(self.audio_path),
-                '-t', f'{duration_sec:.3f}',
-                *codec_args,                      # Ré-encoder pour coupe propre
-                '-af', 'afade=t=in:st=0:d=0.01',  # Fade-in 10ms pour éviter pop
-                str(temp_output)
-            ]
-            
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                check=True,
-                creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
-            )
-            
-            # Remplacer le fichier original par le fichier trimmé
-            temp_output.replace(self.audio_path)
-            return True
-            
-        except Exception as e:
-            # Nettoyer le fichier temporaire en cas d'erreur
-            if 'temp_output' in locals() and temp_output.exists():
-                temp_output.unlink(missing_ok=True)
-            return False
+            return max(0, int(entry.get() or 0))
+        except ValueError:
+            return 0
+
+    # --- Régions ---
+
+    def add_region(self, event=None):
+        # La touche M ne doit pas marquer de région pendant la saisie d'un fondu
+        if event is not None and event.widget.winfo_class() == "Entry":
+            return
+        if self.timeline is not None:
+            self.timeline.add_region()
+
+    def on_regions_change(self, event):
+        count = len(self.timeline.regions)
+        self.lbl_regions.configure(text=f"{count} région(s)" if count else "Aucune région")
+        self.btn_export_regions.configure(state="normal" if count and self.loaded else "disabled")
+
+    def _region_target(self, number):
+        """Fichier de sortie d'une région, à côté de la source (sans écraser un fichier existant)"""
+        stem = self.audio_path.stem.replace(' ', '_')
+        path = self.audio_path.with_name(f"{stem}_{number:02d}.wav")
+        while path.exists():
+            path = self.audio_path.with_name(f"{stem}_{number:02d}_{uuid.uuid4().hex[:4]}.wav")
+        return path
+
+    def export_regions(self):
+        """Écrit chaque région dans son propre fichier, depuis le buffer déjà décodé, en parallèle"""
+        regions = list(self.timeline.regions)
+        if not regions or not self.loaded:
+            return
+        if self.playing:
+            self.stop_audio()
+        self.btn_export_regions.configure(state="disabled", text="Export...")
+        self.btn_add_region.configure(state="disabled")
+        self.btn_save.configure(state="disabled")
+        
+        jobs = [(f"{self.audio_path.stem} {number:02d}", self._region_target(number), start, end)
+                for number, (start, end) in enumerate(regions, start=1)]
+        fades = (self._read_fade(self.entry_fade_in), self._read_fade(self.entry_fade_out))
+        threading.Thread(target=self._export_regions_thread, args=(jobs, *fades), daemon=True).start()
+
+    def _write_region(self, path, start_ms, end_ms, fade_in_ms, fade_out_ms):
+        rate = self.sample_rate
+        data = self.samples[int(start_ms * rate / 1000):int(end_ms * rate / 1000)]
+        total = len(data)
+        fade_in = min(total, int(fade_in_ms * rate / 1000))
+        fade_out = min(total - fade_in, int(fade_out_ms * rate / 1000))
+        if fade_in or fade_out:
+            data = data.copy()  # Le buffer sert encore à la prévisualisation
+            _apply_edge_fades(data, 0, total, fade_in, fade_out)
+        sf.write(str(path), data, rate, subtype='PCM_16')
+
+    def _export_regions_thread(self, jobs, fade_in_ms, fade_out_ms):
+        # libsndfile relâche le GIL : les écritures avancent vraiment en parallèle
+        results = [None] * len(jobs)
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 4)) as pool:
+            futures = {pool.submit(self._write_region, path, start, end, fade_in_ms, fade_out_ms): i
+                       for i, (_, path, start, end) in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                try:
+                    future.result()
+                    results[i] = (jobs[i][0], str(jobs[i][1]))
+                except Exception as e:
+                    print(f"Erreur export région '{jobs[i][0]}': {e}")
+                    errors.append(e)
+                self.after(0, lambda d=done: self.btn_export_regions.configure(text=f"Export {d}/{len(jobs)}..."))
+        exported = [result for result in results if result is not None]
+        self.after(0, lambda: self._on_export_complete(exported, errors))
+
+    def _on_export_complete(self, exported, errors):
+        if errors:
+            messagebox.showerror("Erreur", f"{len(errors)} région(s) n'ont pas pu être exportées:\n{errors[0]}")
+        if not exported:
+            self.btn_export_regions.configure(state="normal", text="📤 Exporter les régions")
+            self.btn_add_region.configure(state="normal")
+            self.btn_save.configure(state="normal")
+            return
+        self.on_export_regions(exported)
+        self.destroy()
+
+    def save_trimmed(self):
+        """Enregistre les points d'entrée / sortie (non destructif : le fichier n'est pas modifié)"""
+        self._on_save_complete()
     
     def _on_save_complete(self):
         """Appelé quand la sauvegarde est terminée avec succès"""
         if self.callback:
-            self.callback(str(self.audio_path))
+            self.callback(str(self.audio_path), self.get_trim())
         self.destroy()
-    
-    def _on_save_error(self, error_msg):
-        """Appelé en cas d'erreur de sauvegarde"""
-        self.btn_save.configure(state="normal", text="✓ SAUVEGARDER")
-        self.btn_cancel.configure(state="normal")
-        messagebox.showerror("Erreur", f"Impossible de sauvegarder:\n{error_msg}")
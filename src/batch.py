@@ -0,0 +1,330 @@
+"""
+Traitement par lots de la bibliothèque, sans interface graphique.
+
+Exemples :
+    python batch.py analyze
+    python batch.py trim-silence normalize --peak-db -1
+    python batch.py transcode --format flac --source folder
+
+Les fichiers sont traités en parallèle (un process par cœur). Chaque fichier terminé est
+noté dans un journal : relancer la même commande reprend là où elle s'était arrêtée.
+À lancer de préférence application fermée (les fichiers peuvent être réécrits).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Ensure we can import modules from the same directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from config_writer import write_atomic
+from library_db import SoundLibrary
+from loudness import LoudnessMeter
+from pcm_store import file_hash
+from peaks import PeakPyramid
+from utils import get_app_data_dir
+
+STAGES = ('analyze', 'trim-silence', 'normalize', 'transcode')
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.ogg', '.m4a', '.flac', '.opus', '.webm', '.aiff'}
+# Formats de sortie : écrits directement par soundfile, ou via pydub/FFmpeg
+SOUNDFILE_OUTPUTS = {'wav': ('WAV', 'PCM_16'), 'flac': ('FLAC', 'PCM_16'), 'ogg': ('OGG', 'VORBIS')}
+OUTPUT_FORMATS = (*SOUNDFILE_OUTPUTS, 'mp3')
+SILENCE_PAD_SEC = 0.02  # Marge gardée autour du son lors de la suppression des silences
+JOURNAL_NAME = "batch_journal.jsonl"
+
+
+# --- Travail d'un fichier (exécuté dans un process du pool) ---
+
+def _decode(path):
+    """samples float32 (frames, canaux), fréquence"""
+    try:
+        samples, rate = sf.read(path, dtype='float32', always_2d=True)
+        return samples, rate
+    except Exception:
+        # Formats non gérés par libsndfile (MP3 anciens, M4A...) : miniaudio
+        import miniaudio
+        info = miniaudio.get_file_info(path)  # Sinon decode_file convertit en stéréo 44.1 kHz
+        decoded = miniaudio.decode_file(path, output_format=miniaudio.SampleFormat.FLOAT32,
+                                        nchannels=info.nchannels, sample_rate=info.sample_rate)
+        samples = np.frombuffer(decoded.samples, dtype=np.float32).reshape(-1, decoded.nchannels)
+        return samples, decoded.sample_rate
+
+
+def _write(path, samples, rate, fmt):
+    """Écriture atomique (fichier temporaire puis remplacement)"""
+    path = Path(path)
+    temp_output = path.parent / f"temp_batch_{uuid.uuid4().hex[:8]}{path.suffix}"
+    try:
+        if fmt in SOUNDFILE_OUTPUTS:
+            container, subtype = SOUNDFILE_OUTPUTS[fmt]
+            sf.write(str(temp_output), samples, rate, format=container, subtype=subtype)
+        else:
+            from pydub import AudioSegment
+            pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+            segment = AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=rate, channels=samples.shape[1])
+            segment.export(str(temp_output), format=fmt, bitrate="192k")
+        temp_output.replace(path)
+    except Exception:
+        temp_output.unlink(missing_ok=True)
+        raise
+
+
+def _peak(samples):
+    return float(np.abs(samples).max()) if samples.size else 0.0
+
+
+def _analyze(path, samples, rate, chunk_frames=65536):
+    """
+    Mêmes métadonnées que l'analyse de la bibliothèque (loudness EBU R128, true peak, hash du fichier
+    final) : l'application ne ré-analyse pas le son. La pyramide de pics est construite dans la même passe.
+    """
+    meter = LoudnessMeter(rate, samples.shape[1])
+    peaks = None if PeakPyramid.load(path) else PeakPyramid.Builder(rate)
+    for start in range(0, len(samples), chunk_frames):
+        chunk = samples[start:start + chunk_frames]
+        meter.push(chunk)
+        if peaks is not None:
+            peaks.push(chunk.mean(axis=1))
+    if peaks is not None:
+        peaks.finish().save(path)
+    st = os.stat(path)
+    return {
+        'content_hash': file_hash(path),
+        'file_mtime': st.st_mtime_ns,
+        'file_size': st.st_size,
+        'duration': len(samples) / rate,
+        'sample_rate': rate,
+        'channels': samples.shape[1],
+        'peak': _peak(samples),
+        'loudness': meter.integrated(),
+        'true_peak': meter.true_peak,
+    }
+
+
+def process_file(path, stages, options):
+    """
+    Applique les étapes demandées à un fichier.
+    Retourne {'path', 'output', 'changed', 'metadata', 'error'} (output = chemin final du son).
+    """
+    result = {'path': path, 'output': path, 'changed': False, 'metadata': None, 'error': None}
+    try:
+        samples, rate = _decode(path)
+        changed = False
+
+        if 'trim-silence' in stages and len(samples):
+            threshold = 10 ** (options['silence_db'] / 20)
+            loud = np.flatnonzero(np.abs(samples).max(axis=1) > threshold)
+            if len(loud):
+                pad = int(rate * SILENCE_PAD_SEC)
+                start = max(0, int(loud[0]) - pad)
+                end = min(len(samples), int(loud[-1]) + 1 + pad)
+                if start > 0 or end < len(samples):
+                    samples = samples[start:end]
+                    changed = True
+
+        if 'normalize' in stages:
+            peak = _peak(samples)
+            if peak > 0:
+                gain = 10 ** (options['peak_db'] / 20) / peak
+                if abs(gain - 1) > 1e-3:
+                    samples = samples * np.float32(gain)
+                    changed = True
+
+        output = Path(path)
+        fmt = output.suffix.lower().lstrip('.')
+        if 'transcode' in stages and fmt != options['format']:
+            fmt = options['format']
+            output = output.with_suffix(f".{fmt}")
+            if output.exists():
+                raise FileExistsError(f"{output.name} existe déjà")
+            changed = True
+
+        if changed:
+            if fmt not in OUTPUT_FORMATS:
+                # Réécrire un format non supporté en sortie : passer en WAV
+                fmt = 'wav'
+                output = output.with_suffix('.wav')
+            _write(output, samples, rate, fmt)
+            if output != Path(path):
+                os.remove(path)
+            # La pyramide de pics de l'ancien fichier est périmée
+            Path(PeakPyramid.cache_path(path)).unlink(missing_ok=True)
+            result.update(output=str(output), changed=True)
+
+        if 'analyze' in stages:
+            result['metadata'] = _analyze(result['output'], samples, rate)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+# --- Journal de reprise ---
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_journal(journal_path, pipeline):
+    """{chemin: (mtime, taille)} des fichiers déjà traités par ce même pipeline"""
+    done = {}
+    if not journal_path.exists():
+        return done
+    with open(journal_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Ligne tronquée (interruption pendant l'écriture)
+            if entry.get('pipeline') == pipeline:
+                done[entry['path']] = (entry['mtime'], entry['size'])
+    return done
+
+
+def _is_done(path, done):
+    try:
+        return done.get(path) == _stamp(path)
+    except OSError:
+        return False
+
+
+# --- Entrée ---
+
+def load_config(config_path):
+    """Contenu de config.json ({} s'il n'existe pas)"""
+    if not config_path.exists():
+        return {}
+    with open(config_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def collect_targets(source, data_dir, library, config_sounds=None):
+    """
+    [(nom ou None, chemin)] : sons de la bibliothèque ou fichiers du dossier sounds/.
+    Sans bibliothèque, les noms viennent de config_sounds ({nom: chemin} de config.json).
+    """
+    if source == 'library':
+        sounds, _ = library.load_all()
+        return [(name, path) for name, path in sounds.items() if os.path.exists(path)]
+    sounds = library.load_all()[0] if library is not None else (config_sounds or {})
+    by_path = {os.path.normcase(os.path.abspath(path)): name for name, path in sounds.items()}
+    targets = []
+    for path in sorted((data_dir / "sounds").iterdir()):
+        if path.suffix.lower() in AUDIO_EXTENSIONS and not path.name.startswith("temp_"):
+            targets.append((by_path.get(os.path.normcase(str(path.resolve()))), str(path)))
+    return targets
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Traitement par lots des sons de Soundbien")
+    parser.add_argument('stages', nargs='+', choices=STAGES, help="Étapes, appliquées dans l'ordre : " + ", ".join(STAGES))
+    parser.add_argument('--source', choices=('library', 'folder'), default=None,
+                        help="Sons de la bibliothèque (défaut si library.db existe) ou fichiers du dossier sounds/")
+    parser.add_argument('--data-dir', type=Path, default=None,
+                        help="Dossier de données de l'application (défaut : Documents/Soundbien)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='wav', help="Format de sortie de 'transcode'")
+    parser.add_argument('--peak-db', type=float, default=-1.0, help="Pic visé par 'normalize' (dBFS)")
+    parser.add_argument('--silence-db', type=float, default=-50.0, help="Seuil de silence de 'trim-silence' (dBFS)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de process (défaut : nombre de cœurs)")
+    parser.add_argument('--restart', action='store_true', help="Ignorer le journal et tout retraiter")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.data_dir = args.data_dir or get_app_data_dir()
+    stages = [stage for stage in STAGES if stage in args.stages]
+    options = {'format': args.format, 'peak_db': args.peak_db, 'silence_db': args.silence_db}
+    # Un même pipeline avec d'autres réglages n'est pas considéré comme déjà fait
+    pipeline = json.dumps([stages, options], sort_keys=True)
+
+    db_path = args.data_dir / "library.db"
+    library = SoundLibrary(str(db_path)) if db_path.exists() else None
+    source = args.source or ('library' if library is not None else 'folder')
+    if source == 'library' and library is None:
+        print(f"Erreur: bibliothèque introuvable ({db_path})")
+        return 1
+
+    # Sans bibliothèque, la liste des sons est dans config.json : ses chemins doivent suivre les fichiers
+    config_path = args.data_dir / "config.json"
+    config = load_config(config_path) if library is None else {}
+    config_sounds = config.get('sounds', {})
+    config_changed = False
+
+    journal_path = args.data_dir / JOURNAL_NAME
+    if args.restart and journal_path.exists():
+        journal_path.unlink()
+    done = load_journal(journal_path, pipeline)
+
+    targets = collect_targets(source, args.data_dir, library, config_sounds)
+    pending = [(name, path) for name, path in targets if not _is_done(path, done)]
+    skipped = len(targets) - len(pending)
+    print(f"{len(targets)} sons, {skipped} déjà traités, {len(pending)} à traiter ({', '.join(stages)})")
+    if not pending:
+        return 0
+
+    errors = 0
+    started = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=args.workers)
+    futures = {}
+    try:
+        with open(journal_path, 'a', encoding='utf-8') as journal:
+            futures = {pool.submit(process_file, path, stages, options): name for name, path in pending}
+            for count, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                result = future.result()
+                label = name or Path(result['path']).name
+
+                if result['error']:
+                    errors += 1
+                    status = f"erreur: {result['error']}"
+                else:
+                    if library is not None and name is not None:
+                        if result['changed']:
+                            # Nouveau contenu : métadonnées et trim remis à zéro (recalculés par l'application)
+                            library.add(name, result['output'])
+                        if result['metadata']:
+                            library.update_metadata(name, **result['metadata'])
+                    elif name is not None and result['changed']:
+                        # Même règle dans config.json : nouveau chemin, l'ancien trim ne s'applique plus
+                        config_sounds[name] = result['output']
+                        config.get('trims', {}).pop(name, None)
+                        config_changed = True
+                    mtime, size = _stamp(result['output'])
+                    journal.write(json.dumps({'path': result['output'], 'pipeline': pipeline,
+                                              'mtime': mtime, 'size': size}) + "\n")
+                    journal.flush()
+                    status = "modifié" if result['changed'] else "ok"
+
+                elapsed = time.perf_counter() - started
+                remaining = elapsed / count * (len(pending) - count)
+                print(f"[{count}/{len(pending)}] {label} : {status}  (reste ~{remaining:.0f}s)")
+    except KeyboardInterrupt:
+        print("Interrompu : relancez la même commande pour reprendre.")
+        for future in futures:
+            future.cancel()
+        return 130
+    finally:
+        pool.shutdown()
+        if library is not None:
+            library.close()
+        if config_changed:
+            write_atomic(str(config_path), config)
+
+    print(f"Terminé en {time.perf_counter() - started:.1f}s ({errors} erreur(s))")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+
+
+def write_atomic(path, data):
+    """Écrit data en JSON, de façon synchrone et atomique (fichier temporaire + fsync + rename)"""
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    # Remplacement atomique : jamais de config.json à moitié écrit
+    os.replace(tmp, path)
+
+
+class ConfigWriter:
+    """
+    Sauvegarde différée (write-behind) de config.json.
+    mark_dirty() copie l'état sur le thread appelant (sous le verrou de son propriétaire) :
+    les écritures sont regroupées sur un thread de fond après une fenêtre de debounce,
+    chaque écriture est atomique et une écriture ratée est retentée avec un délai croissant.
+    """
+
+    RETRY_DELAY = 1.0  # Premier délai avant de retenter une écriture ratée (doublé à chaque échec)
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, path, snapshot, debounce=0.5, lock=None):
+        self.path = path
+        self.snapshot = snapshot  # Callable -> dict à sauvegarder (appelé par mark_dirty)
+        self.debounce = debounce
+        # Verrou du propriétaire de l'état, tenu pendant le snapshot (aucune modification en cours de copie)
+        self.lock = lock if lock is not None else threading.Lock()
+
+        self._data = None  # Dernier snapshot pas encore écrit
+        self._last_change = 0.0
+        self._failures = 0
+        self._wake = threading.Event()
+        self._state_lock = threading.Lock()  # _data, _last_change et démarrage du thread
+        self._write_lock = threading.Lock()  # Une seule écriture à la fois (thread de fond / flush)
+        self._thread = None
+
+    def mark_dirty(self):
+        """Signale un changement : l'état est copié maintenant, écrit après la fenêtre de debounce"""
+        with self.lock:
+            data = self.snapshot()
+            # Toujours sous self.lock : deux threads ne peuvent pas inverser l'ordre de leurs snapshots
+            with self._state_lock:
+                self._data = data
+                self._last_change = time.monotonic()
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            # Attendre que les changements se calment (ex: glisser un slider)
+            while True:
+                remaining = self._last_change + self.debounce - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(remaining)
+            if not self.flush():
+                # Disque plein, fichier verrouillé (antivirus, synchro cloud)... : retenter plus tard
+                time.sleep(min(self.MAX_RETRY_DELAY, self.RETRY_DELAY * 2 ** (self._failures - 1)))
+                self._wake.set()
+
+    def flush(self):
+        """
+        Écrit immédiatement le dernier snapshot en attente (ex: à la fermeture).
+        Retourne False si l'écriture a échoué (le snapshot reste en attente).
+        """
+        with self._write_lock:
+            with self._state_lock:
+                data, self._data = self._data, None
+            if data is None:
+                return True
+            try:
+                write_atomic(self.path, data)
+            except Exception as e:
+                with self._state_lock:
+                    if self._data is None:  # Sauf si un snapshot plus récent est arrivé entre-temps
+                        self._data = data
+                self._failures += 1
+                print(f"Erreur sauvegarde config: {e}")
+                return False
+            self._failures = 0
+            return True
@@ -0,0 +1,89 @@
+import customtkinter as ctk
+
+from downloader import DownloadJob
+from utils import center_window
+
+
+class DownloadQueueView(ctk.CTkToplevel):
+    """Fenêtre (non modale) de la file de téléchargements : progression, état, annulation"""
+
+    STATUS_COLORS = {
+        DownloadJob.DONE: "#2b825b",
+        DownloadJob.EXISTING: "#2b825b",
+        DownloadJob.FAILED: "#d13438",
+        DownloadJob.CANCELLED: "gray",
+        DownloadJob.RETRYING: "#d18b2b",
+    }
+
+    def __init__(self, parent, manager):
+        super().__init__(parent)
+        self.manager = manager
+        self.title("Téléchargements")
+        center_window(self, 560, 400, parent)
+
+        self.rows = {}  # id du job -> (cadre, titre, barre, état, bouton)
+
+        self.list_frame = ctk.CTkScrollableFrame(self)
+        self.list_frame.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        self.list_frame.grid_columnconfigure(0, weight=1)
+
+        self.lbl_empty = ctk.CTkLabel(self.list_frame, text="Aucun téléchargement", text_color="gray")
+
+        self.btn_clear = ctk.CTkButton(self, text="Retirer les terminés", command=self.clear_finished,
+                                       fg_color="transparent", border_width=1)
+        self.btn_clear.pack(pady=(0, 10))
+
+        for job in manager.jobs:
+            self.update_job(job)
+        self._update_empty()
+
+    def _create_row(self, job):
+        row = ctk.CTkFrame(self.list_frame)
+        row.pack(fill="x", pady=3)
+        row.grid_columnconfigure(0, weight=1)
+
+        lbl_title = ctk.CTkLabel(row, text="", anchor="w")
+        lbl_title.grid(row=0, column=0, sticky="ew", padx=8, pady=(4, 0))
+
+        btn_cancel = ctk.CTkButton(row, text="✕", width=28, fg_color="transparent", border_width=1,
+                                   command=lambda: self.manager.cancel(job))
+        btn_cancel.grid(row=0, column=1, rowspan=2, padx=8)
+
+        bar = ctk.CTkProgressBar(row, mode="determinate")
+        bar.grid(row=1, column=0, sticky="ew", padx=8, pady=(2, 6))
+
+        lbl_status = ctk.CTkLabel(row, text="", anchor="e", width=110)
+        lbl_status.grid(row=0, column=2, rowspan=2, padx=(0, 8))
+
+        self.rows[job.id] = (row, lbl_title, bar, lbl_status, btn_cancel)
+        return self.rows[job.id]
+
+    def update_job(self, job):
+        """Met à jour (ou crée) la ligne d'un job. À appeler sur le thread UI"""
+        row = self.rows.get(job.id) or self._create_row(job)
+        _, lbl_title, bar, lbl_status, btn_cancel = row
+        label = job.label
+        lbl_title.configure(text=label if len(label) <= 60 else label[:57] + "...")
+        bar.set(job.progress)
+
+        status = job.status
+        if job.status == DownloadJob.DOWNLOADING:
+            status = f"{int(job.progress * 100)}%"
+        elif job.status == DownloadJob.RETRYING:
+            status = f"{job.status} ({job.attempts + 1})"
+        lbl_status.configure(text=status, text_color=self.STATUS_COLORS.get(job.status, ("gray10", "gray90")))
+        btn_cancel.configure(state="disabled" if job.finished else "normal")
+        self._update_empty()
+
+    def clear_finished(self):
+        self.manager.clear_finished()
+        remaining = {job.id for job in self.manager.jobs}
+        for job_id in [job_id for job_id in self.rows if job_id not in remaining]:
+            self.rows.pop(job_id)[0].destroy()
+        self._update_empty()
+
+    def _update_empty(self):
+        if self.rows:
+            self.lbl_empty.pack_forget()
+        else:
+            self.lbl_empty.pack(pady=20)
@@ -1,33 +1,116 @@
+import glob
+import itertools
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 class Downloader:
+    # Identifiant de vidéo YouTube dans les différentes formes d'URL (watch, youtu.be, shorts, embed, live)
+    YOUTUBE_ID = re.compile(r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([\w-]{11})')
+
     def __init__(self, download_path="sounds"):
         self.download_path = download_path
         if not os.path.exists(self.download_path):
             os.makedirs(self.download_path)
+        self._lock = threading.Lock()
+        # Une instance YoutubeDL par thread, gardée d'un téléchargement à l'autre (extracteurs déjà chargés)
+        self._local = threading.local()
+        # URL canonique -> (chemin, titre) des téléchargements de la session
+        self._fetched = {}
+
+    @classmethod
+    def canonical_url(cls, url):
+        """Clé d'une URL : une vidéo YouTube a une seule forme, quelle que soit l'URL collée"""
+        url = url.strip()
+        match = cls.YOUTUBE_ID.search(url)
+        if match:
+            return f"https://www.youtube.com/watch?v={match.group(1)}"
+        return url.split('#')[0]
 
     def download_sound(self, url, filename=None):
         """
         Télécharge l'audio d'une vidéo YouTube et le convertit en mp3.
         Retourne un tuple (path, title) ou (None, None) en cas d'erreur.
         """
+        try:
+            return self.fetch(url, filename)
+        except Exception as e:
+            print(f"Erreur lors du téléchargement : {e}")
+            return (None, None)
+
+    def fetch(self, url, filename=None, progress_hook=None, cancel_event=None):
+        """
+        Comme download_sound, mais lève les erreurs (utilisé par DownloadManager).
+        progress_hook(d) reçoit les événements de progression de yt-dlp (téléchargement puis conversion).
+        cancel_event (threading.Event) : interrompt le téléchargement au prochain événement de progression.
+        Une URL déjà téléchargée pendant la session (fichier toujours présent) n'est pas retéléchargée.
+        Un téléchargement annulé ne laisse pas de fichier partiel (.part) dans le dossier.
+        """
         import yt_dlp
-        import re
-        
+
+        key = self.canonical_url(url)
+        with self._lock:
+            cached = self._fetched.get(key)
+        if cached and os.path.exists(cached[0]):
+            return cached
+
+        partial = set()  # Fichiers temporaires de yt-dlp pour ce téléchargement
+
+        def hook(d):
+            if d.get('tmpfilename'):
+                partial.add(d['tmpfilename'])
+            if cancel_event is not None and cancel_event.is_set():
+                raise yt_dlp.utils.DownloadCancelled()
+            if progress_hook is not None:
+                progress_hook(d)
+
+        # Un seul passage : les infos (titre) et le média arrivent ensemble
+        ydl = self._ydl()
+        self._local.hook = hook
         try:
-            # D'abord, extraire les infos pour avoir le titre
-            with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
-                info = ydl.extract_info(url, download=False)
-                title = info.get('title', 'Sans_titre')
-                # Nettoyer le titre pour en faire un nom de fichier valide
-                clean_title = re.sub(r'[\\/*?:"<>|]', '', title)
-                clean_title = clean_title.replace(' ', '_')[:50]  # Limiter à 50 caractères
-            
-            # Utiliser le titre comme nom de fichier si non fourni
-            if filename is None:
-                filename = clean_title
-            
+            info = ydl.extract_info(url, download=True)
+        except Exception:
+            # Instance dans un état inconnu : le prochain essai repart d'une instance neuve
+            self._local.ydl = None
+            # Annulé : supprimer le partiel (après une erreur, il est gardé pour reprendre au prochain essai)
+            if cancel_event is not None and cancel_event.is_set():
+                self._remove_partial(partial)
+            raise
+        finally:
+            self._local.hook = None
+
+        title = info.get('title') or 'Sans_titre'
+        downloads = info.get('requested_downloads') or [info]
+        downloaded = downloads[0].get('filepath') or os.path.splitext(ydl.prepare_filename(info))[0] + '.mp3'
+
+        # Nettoyer le titre pour en faire un nom de fichier valide
+        clean_title = re.sub(r'[\\/*?:"<>|]', '', title)
+        clean_title = clean_title.replace(' ', '_')[:50]  # Limiter à 50 caractères
+
+        # Utiliser le titre comme nom de fichier si non fourni
+        path = self._store(downloaded, filename or clean_title)
+        with self._lock:
+            self._fetched[key] = (path, title)
+        return path, title
+
+    @staticmethod
+    def _remove_partial(paths):
+        """Supprime les fichiers .part (et leurs fragments .part-FragN) d'un téléchargement interrompu"""
+        for tmp in paths:
+            for path in glob.glob(glob.escape(tmp) + '*'):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Erreur suppression '{path}': {e}")
+
+    def _ydl(self):
+        """Instance YoutubeDL du thread courant (créée au premier téléchargement)"""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            import yt_dlp
+
             ydl_opts = {
                 'format': 'bestaudio/best',
                 'postprocessors': [{
@@ -35,16 +118,202 @@ class Downloader:
                     'preferredcodec': 'mp3',
                     'preferredquality': '192',
                 }],
-                'outtmpl': os.path.join(self.download_path, f'{filename}.%(ext)s'),
+                # Nom temporaire par vidéo, renommé d'après le titre une fois le fichier converti
+                'outtmpl': os.path.join(self.download_path, 'temp_dl_%(id)s.%(ext)s'),
+                'progress_hooks': [self._dispatch_hook],
+                'postprocessor_hooks': [self._dispatch_hook],
+                'noplaylist': True,
                 'quiet': True,
                 'no_warnings': True,
+                'noprogress': True,
             }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-            
-            return (os.path.join(self.download_path, f"{filename}.mp3"), title)
-        
-        except Exception as e:
-            print(f"Erreur lors du téléchargement : {e}")
-            return (None, None)
+            ydl = self._local.ydl = yt_dlp.YoutubeDL(ydl_opts)
+        return ydl
+
+    def _dispatch_hook(self, d):
+        # Les hooks sont fixés à la création de l'instance : relayer vers ceux du téléchargement en cours
+        hook = getattr(self._local, 'hook', None)
+        if hook is not None:
+            hook(d)
+
+    def _store(self, downloaded, filename):
+        """Déplace le fichier téléchargé vers un nom libre dérivé de filename, retourne son chemin"""
+        ext = os.path.splitext(downloaded)[1]
+        with self._lock:
+            candidate, n = filename, 2
+            while os.path.exists(os.path.join(self.download_path, f"{candidate}{ext}")):
+                candidate, n = f"{filename}_{n}", n + 1
+            path = os.path.join(self.download_path, f"{candidate}{ext}")
+            os.replace(downloaded, path)
+        return path
+
+
+class DownloadJob:
+    """Un téléchargement de la file : état lu par l'interface, modifié par le worker"""
+
+    PENDING = "En attente"
+    DOWNLOADING = "Téléchargement"
+    CONVERTING = "Conversion"
+    RETRYING = "Nouvel essai"
+    DONE = "Terminé"
+    FAILED = "Erreur"
+    CANCELLED = "Annulé"
+    EXISTING = "Déjà présent"  # URL déjà dans la bibliothèque : rien n'est téléchargé
+    FINISHED_STATES = (DONE, FAILED, CANCELLED, EXISTING)
+
+    def __init__(self, job_id, url, context=None):
+        self.id = job_id
+        self.url = url
+        self.context = context  # Donnée libre de l'appelant (ex: ouvrir le trimmer à la fin)
+        self.title = None
+        self.status = self.PENDING
+        self.progress = 0.0  # 0..1 (téléchargement)
+        self.attempts = 0
+        self.error = None
+        self.path = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED_STATES
+
+    @property
+    def label(self):
+        return self.title or self.url
+
+
+class DownloadManager:
+    """
+    File de téléchargements au-dessus de Downloader : pool de workers borné,
+    progression par job (hooks yt-dlp), annulation, nouvel essai avec délai croissant.
+    on_update(job) est appelé depuis les workers à chaque changement (à replanifier sur le thread UI).
+    lookup(url) -> (nom, chemin) ou None : son de la bibliothèque déjà issu de cette URL (pas de nouveau fichier).
+    """
+
+    MAX_WORKERS = 3
+    RETRIES = 2           # Nouveaux essais après un échec
+    BACKOFF_SEC = 2.0     # Délai avant le 1er nouvel essai, doublé ensuite
+    PROGRESS_STEP = 0.01  # Pas minimal de progression notifiée
+
+    def __init__(self, downloader, on_update=None, max_workers=MAX_WORKERS, lookup=None):
+        self.downloader = downloader
+        self.on_update = on_update
+        self.lookup = lookup
+        self.jobs = []
+        self._ids = itertools.count(1)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download")
+        # Transitions vers / depuis l'annulation (UI et workers peuvent se croiser)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, url, context=None):
+        """Met une URL en file. Si la même vidéo est déjà en cours, retourne ce job au lieu d'en créer un"""
+        key = self.downloader.canonical_url(url)
+        for job in self.jobs:
+            if not job.finished and self.downloader.canonical_url(job.url) == key:
+                return job
+        job = DownloadJob(next(self._ids), url, context)
+        self.jobs.append(job)
+        self._notify(job)
+        self._pool.submit(self._run, job)
+        return job
+
+    def cancel(self, job):
+        """Annule un job (en attente : immédiatement ; en cours : au prochain événement yt-dlp)"""
+        if job.finished:
+            return
+        with self._lock:
+            job.cancel_event.set()
+            idle = job.status in (DownloadJob.PENDING, DownloadJob.RETRYING)
+        if idle:
+            # Le worker ne démarrera plus d'essai (il vérifie l'annulation sous le même verrou)
+            self._mark_cancelled(job)
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if not job.finished]
+
+    def active_count(self):
+        return sum(1 for job in self.jobs if not job.finished)
+
+    def shutdown(self):
+        """Annule tous les jobs et arrête le pool sans attendre (appels suivants sans effet)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for job in self.jobs:
+                job.cancel_event.set()
+        self._pool.shutdown(wait=False)
+
+    def _mark_cancelled(self, job):
+        """Passe le job à CANCELLED et notifie, une seule fois (annulation UI et fin du worker)"""
+        with self._lock:
+            if job.status == DownloadJob.CANCELLED:
+                return
+            job.status = DownloadJob.CANCELLED
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"Erreur mise à jour téléchargement: {e}")
+
+    def _on_progress(self, job, d):
+        if d.get('info_dict', {}).get('title') and not job.title:
+            job.title = d['info_dict']['title']
+        if d.get('postprocessor'):
+            # Hook de post-traitement (conversion mp3)
+            if job.status != DownloadJob.CONVERTING:
+                job.status = DownloadJob.CONVERTING
+                self._notify(job)
+            return
+        if d.get('status') == 'downloading':
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            progress = min(1.0, d.get('downloaded_bytes', 0) / total) if total else job.progress
+            if job.status != DownloadJob.DOWNLOADING or progress - job.progress >= self.PROGRESS_STEP:
+                job.status = DownloadJob.DOWNLOADING
+                job.progress = progress
+                self._notify(job)
+        elif d.get('status') == 'finished':
+            job.progress = 1.0
+            self._notify(job)
+
+    def _run(self, job):
+        existing = self.lookup(job.url) if self.lookup else None
+        if existing and not job.cancel_event.is_set():
+            job.title, job.path = existing
+            job.progress = 1.0
+            job.status = DownloadJob.EXISTING
+            self._notify(job)
+            return
+        while True:
+            with self._lock:
+                if job.cancel_event.is_set():
+                    break
+                job.attempts += 1
+                job.status = DownloadJob.DOWNLOADING
+                job.progress = 0.0
+            self._notify(job)
+            try:
+                job.path, title = self.downloader.fetch(job.url, progress_hook=lambda d: self._on_progress(job, d),
+                                                        cancel_event=job.cancel_event)
+                job.title = title
+                job.status = DownloadJob.DONE
+                self._notify(job)
+                return
+            except Exception as e:
+                if job.cancel_event.is_set():
+                    break
+                job.error = str(e)
+                print(f"Erreur téléchargement '{job.url}' (essai {job.attempts}): {e}")
+                if job.attempts > self.RETRIES:
+                    job.status = DownloadJob.FAILED
+                    self._notify(job)
+                    return
+                job.status = DownloadJob.RETRYING
+                self._notify(job)
+                # Délai croissant, interrompu par une annulation
+                job.cancel_event.wait(self.BACKOFF_SEC * 2 ** (job.attempts - 1))
+        self._mark_cancelled(job)
@@ -0,0 +1,137 @@
+"""Traitements audio vectorisés (NumPy) : rééchantillonnage, remixage des canaux"""
+
+from math import gcd
+
+import numpy as np
+
+
+def remix(samples, channels):
+    """Convertit samples (frames, ch) vers le nombre de canaux demandé"""
+    src_channels = samples.shape[1]
+    if src_channels == channels:
+        return samples
+    if channels == 1:
+        # Downmix : moyenne des canaux
+        return samples.mean(axis=1, keepdims=True, dtype=np.float32)
+    if src_channels == 1:
+        # Upmix : mono dupliqué sur tous les canaux
+        return np.repeat(samples, channels, axis=1)
+    if src_channels > channels:
+        return np.ascontiguousarray(samples[:, :channels])
+    # Plus de canaux demandés que disponibles : compléter avec le dernier
+    extra = np.repeat(samples[:, -1:], channels - src_channels, axis=1)
+    return np.concatenate([samples, extra], axis=1)
+
+
+def _kaiser(x, beta):
+    """Fenêtre de Kaiser évaluée en x ∈ [-1, 1]"""
+    x = np.clip(x, -1.0, 1.0)
+    return np.i0(beta * np.sqrt(1.0 - x * x)) / np.i0(beta)
+
+
+def resample(samples, src_rate, dst_rate, zero_crossings=16, rolloff=0.945, beta=8.6, max_phases=1024, block=8192):
+    """
+    Rééchantillonnage sinc fenêtré (Kaiser) en polyphase.
+    samples : (frames, channels) float32. Retourne un nouveau tableau (frames', channels) float32.
+
+    Les filtres de chaque phase sont précalculés, puis les sorties sont calculées par blocs
+    (un gather + un produit pondéré par bloc, sans boucle Python par sample).
+    """
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+
+    g = gcd(int(src_rate), int(dst_rate))
+    up, down = int(dst_rate) // g, int(src_rate) // g
+    phases = min(up, max_phases)
+
+    # Fréquence de coupure relative à l'entrée (anti-aliasing si on descend)
+    cutoff = min(1.0, dst_rate / src_rate) * rolloff
+    half = int(np.ceil(zero_crossings / cutoff))
+    offsets = np.arange(-half + 1, half + 1)  # Taps relatifs à floor(t)
+
+    # Banque de filtres : une ligne par phase (fraction de sample)
+    frac = np.arange(phases)[:, None] / phases
+    dist = frac - offsets[None, :]
+    bank = cutoff * np.sinc(cutoff * dist) * _kaiser(dist / half, beta)
+    bank /= bank.sum(axis=1, keepdims=True)  # Gain unitaire en continu
+    bank = bank.astype(np.float32)
+
+    n_in = len(samples)
+    n_out = int(np.ceil(n_in * dst_rate / src_rate))
+    padded = np.concatenate([
+        np.zeros((half, samples.shape[1]), dtype=np.float32),
+        samples.astype(np.float32, copy=False),
+        np.zeros((half + 1, samples.shape[1]), dtype=np.float32),
+    ])
+
+    out = np.empty((n_out, samples.shape[1]), dtype=np.float32)
+    for start in range(0, n_out, block):
+        k = np.arange(start, min(start + block, n_out), dtype=np.int64)
+        # Position de chaque sortie dans l'entrée : t = k * down / up
+        base = (k * down) // up
+        phase = ((k * down) % up) * phases // up
+        idx = base[:, None] + offsets[None, :] + half
+        # (bloc, taps, canaux) pondéré par le filtre de la phase, sommé sur les taps
+        out[start:start + len(k)] = np.einsum('bt,btc->bc', bank[phase], padded[idx])
+    return out
+
+
+def detect_cues(samples, rate, frame=2048, hop=512, silence_db=-40.0, floor_db=-60.0,
+                pre_roll_ms=10, post_roll_ms=50, batch=1024):
+    """
+    Attaques (onsets) et points de coupe suggérés, sans boucle Python par trame :
+    - énergie RMS par trame, depuis la somme cumulée des carrés
+    - flux spectral sur les trames vues par une fenêtre glissante (vue strided, aucune copie)
+    Retourne (attaques en ms, début suggéré en ms, fin suggérée en ms).
+    Silence = trames sous max(floor_db, niveau max + silence_db).
+    """
+    mono = samples.mean(axis=1, dtype=np.float32) if samples.ndim == 2 else np.asarray(samples, dtype=np.float32)
+    n = len(mono)
+    duration_ms = n * 1000 / rate
+    if n < frame:
+        return np.zeros(0), 0.0, duration_ms
+    count = 1 + (n - frame) // hop
+    starts = np.arange(count) * hop
+
+    # Énergie par trame : une soustraction de sommes cumulées
+    squares = np.concatenate(([0.0], np.cumsum(np.square(mono, dtype=np.float64))))
+    rms = np.sqrt((squares[starts + frame] - squares[starts]) / frame)
+    rms_db = 20 * np.log10(np.maximum(rms, 1e-10))
+    threshold_db = max(floor_db, float(rms_db.max()) + silence_db)
+    active = rms_db > threshold_db
+
+    # Flux spectral : hausse du spectre (log) d'une trame à la suivante, FFT par lots
+    frames = np.lib.stride_tricks.sliding_window_view(mono, frame)[::hop]
+    window = np.hanning(frame).astype(np.float32)
+    flux = np.zeros(count)
+    previous = None
+    for first in range(0, count, batch):
+        mag = np.log1p(10 * np.abs(np.fft.rfft(frames[first:first + batch] * window, axis=1)))
+        extended = np.concatenate((mag[:1] if previous is None else previous, mag))
+        flux[first:first + len(mag)] = np.maximum(extended[1:] - extended[:-1], 0).sum(axis=1)
+        previous = mag[-1:]
+    if flux.max() > 0:
+        flux /= flux.max()
+
+    # Attaques : maxima locaux du flux au-dessus de sa moyenne glissante (~0.5 s), hors silence
+    half = max(1, int(0.25 * rate / hop))
+    sums = np.concatenate(([0.0], np.cumsum(np.pad(flux, half, mode='edge'))))
+    local_mean = (sums[2 * half + 1:] - sums[:-2 * half - 1]) / (2 * half + 1)
+    neighborhood = np.lib.stride_tricks.sliding_window_view(np.pad(flux, 3), 7).max(axis=1)
+    onsets = (flux == neighborhood) & (flux > local_mean + 0.05) & active
+    onsets_ms = (starts[onsets] + frame // 2) * 1000 / rate
+
+    # Début / fin suggérés : premier et dernier sample au-dessus du seuil de silence
+    loud = np.flatnonzero(active)
+    if not len(loud):
+        return onsets_ms, 0.0, duration_ms
+    level = 10 ** (threshold_db / 20)
+    head = starts[loud[0]]
+    above = np.flatnonzero(np.abs(mono[head:head + frame]) > level)
+    first_sample = head + (above[0] if len(above) else 0)
+    tail = starts[loud[-1]]
+    above = np.flatnonzero(np.abs(mono[tail:tail + frame]) > level)
+    last_sample = tail + (above[-1] + 1 if len(above) else frame)
+    start_ms = max(0.0, first_sample * 1000 / rate - pre_roll_ms)
+    end_ms = min(duration_ms, last_sample * 1000 / rate + post_roll_ms)
+    return onsets_ms, start_ms, end_ms
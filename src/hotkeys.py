@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+
+import keyboard
+
+from keybinds import KeybindRegistry
+
+
+class HotkeyDispatcher:
+    """
+    Fast path du hook clavier global.
+    Le callback du hook (appelé pour CHAQUE touche du système) ne fait qu'une lookup
+    dans une table précompilée et pousse une commande dans une file bornée ;
+    un thread consommateur se charge ensuite de lancer / arrêter les sons.
+    """
+
+    STOP = object()  # Action "arrêter tout" dans la table
+
+    def __init__(self, on_play, on_stop, max_pending=64):
+        self.on_play = on_play  # on_play(sound_name, trigger_time)
+        self.on_stop = on_stop
+
+        self._table = {}  # touche -> nom du son (ou STOP), remplacée d'un bloc à chaque changement
+        self._held = set()  # Touches enfoncées (filtre l'auto-repeat)
+        # Modificateurs enfoncés (nom canonique -> touches physiques : ctrl gauche et droit sont suivis
+        # séparément, relâcher l'un ne relâche pas l'accord tant que l'autre est tenu)
+        self._mods = {}
+        # deque bornée : append/popleft atomiques, pas de verrou dans le hook
+        self._pending = deque(maxlen=max_pending)
+        self.dropped = 0  # Commandes perdues file pleine (la plus ancienne est écrasée), loggées par le consommateur
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+
+    def compile(self, keybinds, sounds, stop_key):
+        """
+        Reconstruit la table de dispatch (à appeler quand keybinds/sons/touche STOP changent).
+        keybinds : {raccourci normalisé: nom du son} de la couche active.
+        """
+        table = {key: name for key, name in keybinds.items() if name in sounds}
+        if stop_key:
+            table[KeybindRegistry.normalize(stop_key)] = self.STOP
+        self._table = table
+
+    def hook(self, event):
+        """Callback keyboard.hook : doit rester O(1) et ne jamais bloquer"""
+        key = event.name
+        if not key:
+            return
+        key = key.lower()
+        mod = KeybindRegistry.MODIFIERS.get(key)
+        if event.event_type == keyboard.KEY_UP:
+            self._held.discard(key)
+            if mod:
+                sides = self._mods.get(mod)
+                if sides is not None:
+                    sides.discard(key)
+                    if not sides:
+                        del self._mods[mod]
+            return
+        if mod:
+            self._mods.setdefault(mod, set()).add(key)
+
+        # Accord (ctrl+f1...) d'abord, sinon la touche seule
+        action = None
+        if self._mods and not mod:
+            self._drop_released_mods()
+            action = self._table.get(KeybindRegistry.chord(self._mods, key))
+        if action is None:
+            action = self._table.get(key)
+        if action is None:
+            return
+        # Auto-repeat : la touche est déjà enfoncée
+        if key in self._held:
+            return
+        self._held.add(key)
+
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1  # append() va écraser la commande la plus ancienne
+        self._pending.append((action, time.perf_counter()))
+        self._wake.set()
+
+    def _drop_released_mods(self):
+        """
+        Un KEY_UP qui ne correspond pas au KEY_DOWN (nom différent selon la disposition, ex:
+        'right alt' / 'alt gr', ou événement perdu) laisserait un modificateur collé et
+        transformerait F1 en ctrl+F1 : avant de résoudre un accord, revérifier chaque
+        modificateur auprès de l'état clavier tenu par keyboard (par scan code).
+        """
+        for mod, sides in list(self._mods.items()):
+            pressed = {side for side in sides if self._is_pressed(side)}
+            if pressed:
+                self._mods[mod] = pressed
+            else:
+                del self._mods[mod]
+
+    @staticmethod
+    def _is_pressed(key):
+        try:
+            return keyboard.is_pressed(key)
+        except Exception:
+            return True  # Nom inconnu de la disposition, listener indisponible : garder l'état du hook
+
+    def _consume(self):
+        reported = 0
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            dropped = self.dropped
+            if dropped != reported:
+                print(f"Raccourcis clavier: {dropped - reported} commande(s) perdue(s), file pleine")
+                reported = dropped
+            while True:
+                try:
+                    action, trigger_time = self._pending.popleft()
+                except IndexError:
+                    break
+                try:
+                    if action is self.STOP:
+                        self.on_stop()
+                    else:
+                        self.on_play(action, trigger_time)
+                except Exception as e:
+                    print(f"Erreur raccourci clavier: {e}")
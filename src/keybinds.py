@@ -0,0 +1,136 @@
+class KeybindRegistry:
+    """
+    Keybinds indexés dans les deux sens, par couche (layer) :
+    - forward : couche -> {raccourci: nom du son}  (hook clavier)
+    - reverse : couche -> {nom du son: [raccourcis]} (UI)
+    Les deux index sont toujours modifiés ensemble : lookups en O(1) dans les deux sens.
+
+    Un raccourci est une touche ('f1') ou un accord normalisé ('ctrl+shift+f1').
+    """
+
+    BASE_LAYER = 'base'
+
+    # Noms de modificateurs renvoyés par keyboard -> nom canonique
+    MODIFIERS = {
+        'ctrl': 'ctrl', 'left ctrl': 'ctrl', 'right ctrl': 'ctrl',
+        'alt': 'alt', 'left alt': 'alt', 'right alt': 'alt', 'alt gr': 'alt',
+        'shift': 'shift', 'left shift': 'shift', 'right shift': 'shift',
+        'windows': 'windows', 'left windows': 'windows', 'right windows': 'windows',
+    }
+    MODIFIER_ORDER = ('ctrl', 'alt', 'shift', 'windows')
+
+    def __init__(self):
+        self._forward = {self.BASE_LAYER: {}}
+        self._reverse = {self.BASE_LAYER: {}}
+
+    @classmethod
+    def normalize(cls, binding):
+        """'Shift+Ctrl+F1' -> 'ctrl+shift+f1' (modificateurs dans un ordre fixe, touche en dernier)"""
+        parts = [p.strip().lower() for p in binding.split('+') if p.strip()]
+        if len(parts) <= 1:
+            return parts[0] if parts else binding
+        mods = {cls.MODIFIERS.get(p, p) for p in parts[:-1]}
+        ordered = [m for m in cls.MODIFIER_ORDER if m in mods] + sorted(mods - set(cls.MODIFIER_ORDER))
+        return '+'.join(ordered + [parts[-1]])
+
+    @classmethod
+    def chord(cls, mods, key):
+        """Construit l'accord normalisé à partir des modificateurs canoniques enfoncés"""
+        if not mods:
+            return key
+        return '+'.join([m for m in cls.MODIFIER_ORDER if m in mods] + [key])
+
+    # --- Lecture ---
+
+    def layers(self):
+        return list(self._forward)
+
+    def lookup(self, binding, layer=BASE_LAYER):
+        return self._forward.get(layer, {}).get(binding)
+
+    def keys_for(self, name, layer=BASE_LAYER):
+        """Tous les raccourcis d'un son dans une couche (liste, ordre d'assignation)"""
+        return list(self._reverse.get(layer, {}).get(name, ()))
+
+    def key_for(self, name, layer=BASE_LAYER):
+        keys = self._reverse.get(layer, {}).get(name)
+        return keys[0] if keys else None
+
+    def layer_map(self, layer=BASE_LAYER):
+        """Copie de {raccourci: nom} pour une couche"""
+        return dict(self._forward.get(layer, {}))
+
+    def to_config(self):
+        """{couche: {raccourci: nom}} (sérialisable en JSON)"""
+        return {layer: dict(binds) for layer, binds in self._forward.items() if binds or layer == self.BASE_LAYER}
+
+    # --- Écriture ---
+
+    def load(self, layers):
+        """Remplace tout le contenu par {couche: {raccourci: nom}}"""
+        self._forward = {self.BASE_LAYER: {}}
+        self._reverse = {self.BASE_LAYER: {}}
+        for layer, binds in layers.items():
+            for binding, name in binds.items():
+                self.bind(binding, name, layer)
+
+    def bind(self, binding, name, layer=BASE_LAYER, exclusive=False):
+        """
+        Associe un raccourci à un son. Le raccourci est retiré de son ancien son.
+        exclusive=True retire aussi les autres raccourcis du son dans cette couche.
+        Retourne la liste des raccourcis retirés [(couche, raccourci)].
+        """
+        binding = self.normalize(binding)
+        forward = self._forward.setdefault(layer, {})
+        reverse = self._reverse.setdefault(layer, {})
+        removed = []
+
+        if exclusive:
+            for old in list(reverse.get(name, ())):
+                if old != binding:
+                    self._unbind(layer, old)
+                    removed.append((layer, old))
+
+        previous = forward.get(binding)
+        if previous == name:
+            return removed
+        if previous is not None:
+            self._unbind(layer, binding)
+            removed.append((layer, binding))
+
+        forward[binding] = name
+        reverse.setdefault(name, []).append(binding)
+        return removed
+
+    def unbind(self, binding, layer=BASE_LAYER):
+        """Retire un raccourci. Retourne le nom du son qui y était associé (ou None)"""
+        return self._unbind(layer, self.normalize(binding))
+
+    def _unbind(self, layer, binding):
+        name = self._forward.get(layer, {}).pop(binding, None)
+        if name is None:
+            return None
+        keys = self._reverse[layer].get(name)
+        if keys:
+            keys.remove(binding)
+            if not keys:
+                del self._reverse[layer][name]
+        return name
+
+    def unbind_sound(self, name):
+        """Retire tous les raccourcis d'un son, dans toutes les couches"""
+        removed = []
+        for layer, reverse in self._reverse.items():
+            for binding in reverse.pop(name, ()):
+                del self._forward[layer][binding]
+                removed.append((layer, binding))
+        return removed
+
+    def rename_sound(self, old_name, new_name):
+        for layer, reverse in self._reverse.items():
+            keys = reverse.pop(old_name, None)
+            if keys:
+                reverse[new_name] = keys
+                forward = self._forward[layer]
+                for binding in keys:
+                    forward[binding] = new_name
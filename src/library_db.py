@@ -0,0 +1,290 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class SoundLibrary:
+    """
+    Bibliothèque de sons stockée en SQLite (une ligne par son + métadonnées).
+    Chaque modification est une mise à jour d'une seule ligne : plus de réécriture
+    complète de config.json à chaque ajout / renommage / suppression.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sounds (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            path TEXT NOT NULL,
+            content_hash TEXT,
+            file_mtime INTEGER,  -- mtime (ns) et taille du fichier hashé : pas de re-hash s'ils n'ont pas changé
+            file_size INTEGER,
+            duration REAL,
+            sample_rate INTEGER,
+            channels INTEGER,
+            peak REAL,
+            loudness REAL,  -- Loudness intégrée EBU R128 (LUFS)
+            true_peak REAL,  -- True peak (amplitude linéaire, suréchantillonné x4)
+            trim_start REAL,  -- Trim non destructif (secondes)
+            trim_end REAL,
+            fade_in REAL,
+            fade_out REAL,
+            source_url TEXT,  -- URL d'origine (forme canonique) pour les sons téléchargés
+            play_count INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            modified_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sounds_path ON sounds(path);
+        CREATE INDEX IF NOT EXISTS idx_sounds_hash ON sounds(content_hash);
+        CREATE TABLE IF NOT EXISTS keybinds (
+            layer TEXT NOT NULL,
+            binding TEXT NOT NULL,
+            sound_name TEXT NOT NULL,
+            PRIMARY KEY (layer, binding)
+        );
+        CREATE INDEX IF NOT EXISTS idx_keybinds_sound ON keybinds(sound_name);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    # Colonnes de métadonnées modifiables via update_metadata()
+    METADATA_COLUMNS = ('content_hash', 'file_mtime', 'file_size', 'duration', 'sample_rate', 'channels', 'peak', 'loudness', 'true_peak')
+    # Trim non destructif : colonne -> clé du dict de trim
+    TRIM_COLUMNS = {'trim_start': 'start', 'trim_end': 'end', 'fade_in': 'fade_in', 'fade_out': 'fade_out'}
+    # Les lectures sont comptées en mémoire et écrites par lot (pas d'écriture SQLite sur le thread des raccourcis)
+    PLAY_FLUSH_SEC = 2.0
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # Connexion partagée entre threads (UI, hook clavier, analyse), protégée par un verrou
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._plays = {}  # nom -> lectures pas encore écrites
+        self._plays_lock = threading.Lock()
+        self._plays_wake = threading.Event()
+        self._plays_thread = None
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            # Ancienne table keybinds (une touche par son, sans couches) : migrée dans la couche de base
+            columns = [row['name'] for row in self._conn.execute("PRAGMA table_info(keybinds)")]
+            legacy = bool(columns) and 'layer' not in columns
+            if legacy:
+                self._conn.execute("ALTER TABLE keybinds RENAME TO keybinds_legacy")
+            self._conn.executescript(self.SCHEMA)
+            if legacy:
+                self._conn.execute("""INSERT OR IGNORE INTO keybinds (layer, binding, sound_name)
+                                      SELECT 'base', key, sound_name FROM keybinds_legacy""")
+                self._conn.execute("DROP TABLE keybinds_legacy")
+            # Colonnes ajoutées après coup (bases existantes)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(sounds)")}
+            for column in (*self.TRIM_COLUMNS, 'true_peak'):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE sounds ADD COLUMN {column} REAL")
+            if 'source_url' not in columns:
+                self._conn.execute("ALTER TABLE sounds ADD COLUMN source_url TEXT")
+            for column in ('file_mtime', 'file_size'):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE sounds ADD COLUMN {column} INTEGER")
+
+    def close(self):
+        self.flush_plays()
+        with self._lock:
+            self._conn.close()
+
+    # --- Migration ---
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sounds LIMIT 1").fetchone() is None
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_from_config(self, sounds, keybind_layers, trims=None, sources=None):
+        """
+        Migration unique depuis config.json (dict nom -> chemin, dict couche -> {raccourci: nom},
+        dict nom -> trim, dict nom -> URL d'origine)
+        """
+        now = time.time()
+        trims = trims or {}
+        sources = sources or {}
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sounds (name, path, created_at, modified_at) VALUES (?, ?, ?, ?)",
+                [(name, path, now, now) for name, path in sounds.items()]
+            )
+            self._conn.executemany(
+                "UPDATE sounds SET trim_start = ?, trim_end = ?, fade_in = ?, fade_out = ? WHERE name = ?",
+                [(*(trim.get(key) for key in self.TRIM_COLUMNS.values()), name) for name, trim in trims.items()]
+            )
+            self._conn.executemany("UPDATE sounds SET source_url = ? WHERE name = ?",
+                                   [(url, name) for name, url in sources.items()])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO keybinds (layer, binding, sound_name) VALUES (?, ?, ?)",
+                [(layer, binding, name) for layer, binds in keybind_layers.items() for binding, name in binds.items()]
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)", (str(now),))
+
+    # --- Lecture ---
+
+    def load_all(self):
+        """Retourne (sounds, keybind_layers) : {nom: chemin}, {couche: {raccourci: nom}}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, path FROM sounds ORDER BY id").fetchall()
+            bind_rows = self._conn.execute("SELECT layer, binding, sound_name FROM keybinds ORDER BY rowid").fetchall()
+        sounds = {row['name']: row['path'] for row in rows}
+        layers = {}
+        for row in bind_rows:
+            layers.setdefault(row['layer'], {})[row['binding']] = row['sound_name']
+        return sounds, layers
+
+    def load_trims(self):
+        """{nom: {'start', 'end', 'fade_in', 'fade_out'}} pour les sons qui ont un trim"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, trim_start, trim_end, fade_in, fade_out FROM sounds "
+                "WHERE trim_start IS NOT NULL OR trim_end IS NOT NULL OR fade_in IS NOT NULL OR fade_out IS NOT NULL"
+            ).fetchall()
+        return {row['name']: {key: row[column] for column, key in self.TRIM_COLUMNS.items()} for row in rows}
+
+    def load_loudness(self):
+        """{nom: (loudness LUFS ou None, true peak)} pour les sons déjà analysés"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, loudness, true_peak FROM sounds WHERE true_peak IS NOT NULL").fetchall()
+        return {row['name']: (row['loudness'], row['true_peak']) for row in rows}
+
+    def load_hashes(self):
+        """{nom: (hash du contenu, mtime ns, taille)} du fichier au moment de l'analyse"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, content_hash, file_mtime, file_size FROM sounds "
+                                      "WHERE content_hash IS NOT NULL").fetchall()
+        return {row['name']: (row['content_hash'], row['file_mtime'], row['file_size']) for row in rows}
+
+    def load_sources(self):
+        """{nom: URL d'origine} pour les sons téléchargés"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, source_url FROM sounds WHERE source_url IS NOT NULL").fetchall()
+        return {row['name']: row['source_url'] for row in rows}
+
+    def get(self, name):
+        """Toutes les colonnes d'un son (dict) ou None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sounds WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def find_by_hash(self, content_hash):
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM sounds WHERE content_hash = ?", (content_hash,)).fetchall()
+        return [row['name'] for row in rows]
+
+    def missing_metadata(self):
+        """Noms des sons dont les métadonnées n'ont pas encore été calculées"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM sounds WHERE content_hash IS NULL OR duration IS NULL "
+                                      "OR true_peak IS NULL").fetchall()
+        return [row['name'] for row in rows]
+
+    # --- Écriture (une ligne à la fois) ---
+
+    def add(self, name, path, source_url=None):
+        """
+        Ajoute ou remplace un son (garde les keybinds et le compteur si le nom existe déjà).
+        Le fichier a changé : métadonnées et trim sont remis à zéro. L'URL d'origine est gardée si non fournie.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO sounds (name, path, source_url, created_at, modified_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET path = excluded.path, modified_at = excluded.modified_at,
+                   source_url = COALESCE(excluded.source_url, source_url),
+                   content_hash = NULL, file_mtime = NULL, file_size = NULL, duration = NULL, sample_rate = NULL, channels = NULL,
+                   peak = NULL, loudness = NULL, true_peak = NULL,
+                   trim_start = NULL, trim_end = NULL, fade_in = NULL, fade_out = NULL""",
+                (name, path, source_url, now, now)
+            )
+
+    def remove(self, name):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sounds WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM keybinds WHERE sound_name = ?", (name,))
+            with self._plays_lock:
+                self._plays.pop(name, None)
+
+    def rename(self, old_name, new_name):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE sounds SET name = ?, modified_at = ? WHERE name = ?",
+                               (new_name, time.time(), old_name))
+            self._conn.execute("UPDATE keybinds SET sound_name = ? WHERE sound_name = ?", (new_name, old_name))
+            # Lectures pas encore écrites : elles suivent le son
+            with self._plays_lock:
+                if old_name in self._plays:
+                    self._plays[new_name] = self._plays.get(new_name, 0) + self._plays.pop(old_name)
+
+    def update_keybinds(self, removed=(), added=()):
+        """Applique des changements de keybinds : removed = [(couche, raccourci)], added = [(couche, raccourci, nom)]"""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM keybinds WHERE layer = ? AND binding = ?", list(removed))
+            self._conn.executemany("INSERT OR REPLACE INTO keybinds (layer, binding, sound_name) VALUES (?, ?, ?)",
+                                   list(added))
+
+    def update_metadata(self, name, **fields):
+        fields = {k: v for k, v in fields.items() if k in self.METADATA_COLUMNS}
+        if not fields:
+            return
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE sounds SET {assignments}, modified_at = ? WHERE name = ?",
+                               (*fields.values(), time.time(), name))
+
+    def set_trim(self, name, trim):
+        """Enregistre le trim d'un son (dict start/end/fade_in/fade_out en secondes, None = aucun)"""
+        trim = trim or {}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE sounds SET trim_start = ?, trim_end = ?, fade_in = ?, fade_out = ?, modified_at = ? WHERE name = ?",
+                (*(trim.get(key) for key in self.TRIM_COLUMNS.values()), time.time(), name)
+            )
+
+    def record_play(self, name):
+        """Compte une lecture en mémoire (instantané) : écrite par lot sur le thread de fond"""
+        with self._plays_lock:
+            self._plays[name] = self._plays.get(name, 0) + 1
+            if self._plays_thread is None:
+                self._plays_thread = threading.Thread(target=self._run_plays, daemon=True)
+                self._plays_thread.start()
+        self._plays_wake.set()
+
+    def _run_plays(self):
+        while True:
+            self._plays_wake.wait()
+            # Regrouper les lectures rapprochées (spam de touches) en une seule transaction
+            time.sleep(self.PLAY_FLUSH_SEC)
+            self._plays_wake.clear()
+            self.flush_plays()
+
+    def flush_plays(self):
+        """Écrit les compteurs de lectures en attente (thread de fond, et à la fermeture)"""
+        # Sous le verrou de la base : un renommage ne peut pas passer entre la prise et l'écriture
+        with self._lock:
+            with self._plays_lock:
+                plays, self._plays = self._plays, {}
+            if not plays:
+                return
+            try:
+                with self._conn:
+                    self._conn.executemany("UPDATE sounds SET play_count = play_count + ? WHERE name = ?",
+                                           [(count, name) for name, count in plays.items()])
+            except sqlite3.Error as e:
+                print(f"Erreur écriture compteurs de lectures: {e}")
@@ -0,0 +1,167 @@
+import numpy as np
+
+
+class LoudnessMeter:
+    """
+    Mesure de loudness EBU R128 / ITU-R BS.1770 d'un son, au fil du décodage :
+    - loudness intégrée (LUFS) : filtre K, blocs de 400 ms (pas de 100 ms), double gating
+    - true peak : maximum après suréchantillonnage x4
+
+    Le filtre K (deux biquads) est appliqué dans le domaine fréquentiel : sa réponse
+    impulsionnelle tronquée est convoluée par FFT (overlap-add), sans boucle par sample.
+    """
+
+    TARGET_LUFS = -16.0   # Niveau visé à la lecture
+    MAX_TRUE_PEAK_DB = -1.0  # Le gain ne fait jamais dépasser ce true peak
+    MAX_BOOST_DB = 12.0   # Ne pas remonter indéfiniment les sons très faibles
+
+    SEGMENT_SEC = 0.1     # Pas des blocs de gating (75% de recouvrement)
+    BLOCK_SEGMENTS = 4    # Bloc de 400 ms
+    IR_SEC = 0.1          # Réponse impulsionnelle du filtre K gardée (largement amortie)
+    OVERSAMPLE = 4
+    TRUE_PEAK_TAPS = 48
+
+    _filters = {}  # fréquence -> réponse impulsionnelle du filtre K (partagée entre mesures)
+
+    def __init__(self, sample_rate, channels):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.ir = self._k_weighting_ir(sample_rate)
+        self._spectra = {}  # taille FFT -> spectre du filtre
+        self._carry = np.zeros((len(self.ir) - 1, channels))  # Queue de convolution vers le bloc suivant
+
+        self.segment_len = max(1, int(round(sample_rate * self.SEGMENT_SEC)))
+        self._rest = np.zeros((0, channels))  # Samples filtrés en attente d'un segment complet
+        self._segments = []  # Énergie (somme des carrés) par segment de 100 ms et par canal
+        self.frames = 0
+
+        self._tp_filter = self._true_peak_filter()
+        self._history = np.zeros((self.TRUE_PEAK_TAPS // self.OVERSAMPLE - 1, channels), dtype=np.float32)
+        self.true_peak = 0.0  # Amplitude linéaire
+
+        # Pondération des canaux (surround arrière +1.5 dB en 5.1)
+        self.weights = np.ones(channels)
+        if channels >= 5:
+            self.weights[3:5] = 1.41
+
+    # --- Filtres ---
+
+    @staticmethod
+    def _k_coefficients(rate):
+        """Biquads du filtre K (pré-filtre en plateau + passe-haut RLB) pour une fréquence quelconque"""
+        f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+        k = np.tan(np.pi * f0 / rate)
+        vh = 10 ** (gain_db / 20)
+        vb = vh ** 0.4996667741545416
+        a0 = 1 + k / q + k * k
+        shelf = (np.array([vh + vb * k / q + k * k, 2 * (k * k - vh), vh - vb * k / q + k * k]) / a0,
+                 np.array([1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]))
+
+        f0, q = 38.13547087602444, 0.5003270373238773
+        k = np.tan(np.pi * f0 / rate)
+        a0 = 1 + k / q + k * k
+        highpass = (np.array([1.0, -2.0, 1.0]),
+                    np.array([1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]))
+        return shelf, highpass
+
+    @classmethod
+    def _k_weighting_ir(cls, rate):
+        """Réponse impulsionnelle tronquée, obtenue depuis la réponse en fréquence des deux biquads"""
+        ir = cls._filters.get(rate)
+        if ir is None:
+            taps = int(rate * cls.IR_SEC)
+            n = 1 << int(np.ceil(np.log2(taps * 4)))  # Grille fine : repliement temporel négligeable
+            z = np.exp(-1j * np.pi * np.arange(n // 2 + 1) / (n // 2))  # z^-1 sur le cercle unité
+            response = np.ones(len(z), dtype=complex)
+            for b, a in cls._k_coefficients(rate):
+                response *= (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+            ir = cls._filters[rate] = np.fft.irfft(response, n)[:taps]
+        return ir
+
+    def _spectrum(self, size):
+        spectrum = self._spectra.get(size)
+        if spectrum is None:
+            spectrum = self._spectra[size] = np.fft.rfft(self.ir, size)[:, None]
+        return spectrum
+
+    def _true_peak_filter(self):
+        """Interpolateur x4 (sinc fenêtré), une ligne par phase"""
+        n = np.arange(self.TRUE_PEAK_TAPS)
+        h = np.sinc((n - (self.TRUE_PEAK_TAPS - 1) / 2) / self.OVERSAMPLE) * np.kaiser(self.TRUE_PEAK_TAPS, 8.0)
+        phases = h.reshape(-1, self.OVERSAMPLE).T
+        return phases / phases.sum(axis=1, keepdims=True)
+
+    # --- Mesure ---
+
+    def push(self, samples):
+        """Ajoute un bloc (frames, canaux) float32"""
+        if not len(samples):
+            return
+        self.frames += len(samples)
+        self._push_true_peak(samples)
+
+        # Filtre K par FFT, la queue de convolution déborde sur le bloc suivant
+        total = len(samples) + len(self.ir) - 1
+        size = 1 << int(np.ceil(np.log2(total)))
+        filtered = np.fft.irfft(np.fft.rfft(samples, size, axis=0) * self._spectrum(size), size, axis=0)[:total]
+        filtered[:len(self._carry)] += self._carry
+        self._carry = filtered[len(samples):]
+        filtered = filtered[:len(samples)]
+
+        # Énergie par segment de 100 ms
+        data = np.concatenate((self._rest, filtered)) if len(self._rest) else filtered
+        full = len(data) - len(data) % self.segment_len
+        if full:
+            segments = data[:full].reshape(-1, self.segment_len, self.channels)
+            self._segments.append(np.einsum('sfc,sfc->sc', segments, segments))
+        self._rest = data[full:]
+
+    def _push_true_peak(self, samples):
+        taps = self._tp_filter.shape[1]
+        data = np.concatenate((self._history, samples))
+        peak = float(np.abs(samples).max())
+        for channel in range(self.channels):
+            for phase in self._tp_filter:
+                peak = max(peak, float(np.abs(np.convolve(data[:, channel], phase, mode='valid')).max()))
+        self.true_peak = max(self.true_peak, peak)
+        self._history = data[len(data) - (taps - 1):]
+
+    def integrated(self):
+        """Loudness intégrée en LUFS, ou None (silence)"""
+        if self._segments:
+            segments = np.concatenate(self._segments)
+        else:
+            segments = np.zeros((0, self.channels))
+
+        if len(segments) < self.BLOCK_SEGMENTS:
+            # Son plus court qu'un bloc (bruitages) : un seul bloc sur toute la durée
+            rest = np.einsum('fc,fc->c', self._rest, self._rest)
+            if not self.frames:
+                return None
+            energies = np.array([(segments.sum(axis=0) + rest) @ self.weights / self.frames])
+        else:
+            # Blocs de 400 ms glissants = sommes de 4 segments consécutifs
+            cumulative = np.concatenate((np.zeros((1, self.channels)), np.cumsum(segments, axis=0)))
+            blocks = cumulative[self.BLOCK_SEGMENTS:] - cumulative[:-self.BLOCK_SEGMENTS]
+            energies = blocks @ self.weights / (self.BLOCK_SEGMENTS * self.segment_len)
+
+        # Gating absolu (-70 LUFS) puis relatif (-10 LU sous la moyenne)
+        gated = energies[energies > 10 ** ((-70 + 0.691) / 10)]
+        if not len(gated):
+            return None
+        relative = gated.mean() * 0.1
+        gated = gated[gated >= relative]
+        return -0.691 + 10 * np.log10(gated.mean())
+
+    def true_peak_db(self):
+        return 20 * np.log10(self.true_peak) if self.true_peak > 0 else None
+
+    @classmethod
+    def playback_gain(cls, loudness, true_peak):
+        """Gain linéaire à appliquer à la lecture pour atteindre TARGET_LUFS sans saturer"""
+        if loudness is None:
+            return 1.0
+        gain_db = min(cls.TARGET_LUFS - loudness, cls.MAX_BOOST_DB)
+        if true_peak:
+            gain_db = min(gain_db, cls.MAX_TRUE_PEAK_DB - 20 * np.log10(true_peak))
+        return float(10 ** (gain_db / 20))
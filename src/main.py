@@ -40,10 +40,11 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
 from sound_manager import SoundManager
-from downloader import Downloader
+from downloader import Downloader, DownloadManager, DownloadJob
 from tts_generator import TTSGenerator
 from updater import Updater
-from utils import center_window
+from utils import center_window, get_app_data_dir
+from sound_grid import SoundGrid
 
 # Version info
 try:
@@ -54,59 +55,39 @@ except ImportError:
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
-def get_app_data_dir():
-    """Retourne le chemin vers le dossier de données de l'application dans Documents."""
-    # Utiliser Path.home() pour obtenir le dossier utilisateur
-    user_docs = Path.home() / "Documents" / "Soundbien"
-    user_docs.mkdir(parents=True, exist_ok=True)
-    return user_docs
-
 class AddSoundDialog(ctk.CTkToplevel):
-    def __init__(self, parent, callback, downloader):
+    def __init__(self, parent, on_submit):
         super().__init__(parent)
-        self.callback = callback
-        self.downloader = downloader
+        self.on_submit = on_submit  # on_submit([urls]) : mis en file, la fenêtre se ferme aussitôt
         self.title("Ajouter un son depuis YouTube")
-        center_window(self, 400, 180, parent)
+        center_window(self, 440, 280, parent)
         
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
 
-        self.lbl_url = ctk.CTkLabel(self, text="URL YouTube:")
+        self.lbl_url = ctk.CTkLabel(self, text="URL YouTube (une par ligne) :")
         self.lbl_url.pack(pady=5)
-        self.entry_url = ctk.CTkEntry(self, width=300, placeholder_text="https://youtube.com/watch?v=...")
-        self.entry_url.pack(pady=5)
+        self.text_urls = ctk.CTkTextbox(self, width=380, height=110)
+        self.text_urls.pack(pady=5)
+        self.text_urls.focus_set()
         
         self.lbl_info = ctk.CTkLabel(self, text="Le nom sera automatiquement extrait de la vidéo", 
                                       font=("Arial", 9), text_color="#888")
         self.lbl_info.pack(pady=5)
 
         self.btn_download = ctk.CTkButton(self, text="Télécharger", command=self.on_download)
-        self.btn_download.pack(pady=20)
+        self.btn_download.pack(pady=15)
 
     def on_download(self):
-        url = self.entry_url.get().strip()
+        urls = [line.strip() for line in self.text_urls.get("1.0", "end").splitlines() if line.strip()]
         
-        if not url:
+        if not urls:
             messagebox.showwarning("Erreur", "Veuillez entrer une URL YouTube")
             return
 
-        self.btn_download.configure(state="disabled", text="Téléchargement en cours...")
-        
-        # Thread pour ne pas bloquer l'UI
-        threading.Thread(target=self._download_thread, args=(url,), daemon=True).start()
-
-    def _download_thread(self, url):
-        # Télécharger et récupérer le titre automatiquement
-        download_path, title = self.downloader.download_sound(url)
-        
-        if download_path and title:
-            # Fermer d'abord, puis callback avec le titre extrait
-            self.after(0, self.destroy)
-            self.after(100, lambda: self.callback(title, download_path))
-        else:
-            self.after(0, lambda: messagebox.showerror("Erreur", "Échec du téléchargement"))
-            self.after(0, lambda: self.btn_download.configure(state="normal", text="Télécharger"))
+        # Les téléchargements continuent dans la file (fenêtre Téléchargements)
+        self.destroy()
+        self.on_submit(urls)
 class SoundBoardApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -120,8 +101,15 @@ class SoundBoardApp(ctk.CTk):
         sounds_dir = self.app_data_dir / "sounds"
         sounds_dir.mkdir(exist_ok=True)
 
-        self.sound_manager = SoundManager(config_file=str(config_path))
+        self.sound_manager = SoundManager(config_file=str(config_path),
+                                          library_db=str(self.app_data_dir / "library.db"))
         self.downloader = Downloader(download_path=str(sounds_dir))
+        # File de téléchargements : les mises à jour arrivent des workers, l'UI est mise à jour sur le thread Tk
+        # Une URL déjà présente dans la bibliothèque n'est pas retéléchargée
+        self.download_manager = DownloadManager(
+            self.downloader, on_update=lambda job: self.after(0, lambda: self._on_download_update(job)),
+            lookup=self.sound_manager.find_by_source)
+        self.download_queue_view = None
         self.tts_generator = TTSGenerator(output_dir=str(sounds_dir))
         
         # Vérifier les mises à jour en arrière-plan
@@ -138,9 +126,9 @@ class SoundBoardApp(ctk.CTk):
             print("Mode dev: Thread auto-update désactivé.")
         
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(1, weight=1)
-        # Row 2 pour le footer TTS
-        self.grid_rowconfigure(2, weight=0)
+        self.grid_rowconfigure(2, weight=1)
+        # Row 3 pour le footer TTS
+        self.grid_rowconfigure(3, weight=0)
 
         # --- Header (Contrôles globaux & Settings) ---
         self.header_frame = ctk.CTkFrame(self)
@@ -151,6 +139,10 @@ class SoundBoardApp(ctk.CTk):
         
         self.btn_add_file = ctk.CTkButton(self.header_frame, text="+ Ajouter Fichier", command=self.open_file_import, fg_color="#2b825b", hover_color="#1f5d42")
         self.btn_add_file.pack(side="left", padx=5)
+        
+        self.btn_downloads = ctk.CTkButton(self.header_frame, text="⬇ Téléchargements", command=self.open_download_queue,
+                                           fg_color="transparent", border_width=1, width=150)
+        self.btn_downloads.pack(side="left", padx=5)
 
         self.btn_stop = ctk.CTkButton(self.header_frame, text="STOP TOUT", fg_color="red", hover_color="darkred", command=self.sound_manager.stop_sound)
         self.btn_stop.pack(side="left", padx=10)
@@ -184,16 +176,24 @@ class SoundBoardApp(ctk.CTk):
         if self.sound_manager.monitoring:
             self.switch_monitoring.select()
         
-        # --- Sound Grid ---
-        self.scrollable_frame = ctk.CTkScrollableFrame(self, label_text="Mes Sons")
-        self.scrollable_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
-        self.scrollable_frame.grid_columnconfigure((0, 1, 2, 3), weight=1) # 4 colonnes
+        # --- Recherche (filtre la grille à chaque frappe) ---
+        self._search_query = ""
+        self.entry_search = ctk.CTkEntry(self, placeholder_text="🔍 Rechercher un son...")
+        self.entry_search.grid(row=1, column=0, sticky="ew", padx=10)
+        self.entry_search.bind("<KeyRelease>", self.on_search_changed)
+        self.entry_search.bind("<Escape>", self.clear_search)
+
+        # --- Sound Grid (virtualisée : seuls les boutons visibles existent) ---
+        self.sound_grid = SoundGrid(self, label_for=self._sound_label,
+                                    on_play=self.sound_manager.play_sound,
+                                    on_context=self.show_sound_context_menu)
+        self.sound_grid.grid(row=2, column=0, sticky="nsew", padx=10, pady=10)
 
         self.refresh_sounds()
 
         # --- Footer (TTS Generator) ---
         self.footer_frame = ctk.CTkFrame(self)
-        self.footer_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=10)
+        self.footer_frame.grid(row=3, column=0, sticky="ew", padx=10, pady=10)
 
         self.lbl_tts = ctk.CTkLabel(self.footer_frame, text="TTS Rapide :", font=("Arial", 12, "bold"))
         self.lbl_tts.pack(side="left", padx=10)
@@ -238,6 +238,9 @@ class SoundBoardApp(ctk.CTk):
             # Intercepter fermeture et minimisation
             self.protocol("WM_DELETE_WINDOW", self._hide_to_tray)
             self.bind("<Unmap>", self._on_minimize)
+        else:
+            # Sans tray, fermer la fenêtre quitte : même chemin d'arrêt (téléchargements, config) que le menu
+            self.protocol("WM_DELETE_WINDOW", self._quit_app)
 
     def _setup_tray_icon(self):
         """Configure l'icône de la barre d'état système"""
@@ -291,6 +294,10 @@ class SoundBoardApp(ctk.CTk):
         if self.tray_icon:
             self.tray_icon.stop()
         
+        # Écrire la config en attente avant de forcer la sortie
+        self.download_manager.shutdown()
+        self.sound_manager.shutdown()
+        
         # Quitter proprement en évitant les callbacks Tkinter pendants
         try:
             self.quit()  # Arrête mainloop
@@ -349,9 +356,8 @@ class SoundBoardApp(ctk.CTk):
 
     def toggle_monitoring(self):
         enabled = self.switch_monitoring.get()
+        # Sauvegardé par set_monitoring
         self.sound_manager.set_monitoring(bool(enabled))
-        # Sauvegarder la préférence
-        self.sound_manager.save_config()
 
     def _update_stop_button_text(self):
         """Met à jour le texte du bouton STOP avec la touche assignée"""
@@ -418,16 +424,41 @@ class SoundBoardApp(ctk.CTk):
     # Note: on_key_press supprimé car géré globablement par SoundManager
 
 
-    def _open_trimmer_dialog(self, name, path):
-        """Ouvre le dialogue de trimming de manière centralisée"""
-        def on_trim_complete(trimmed_path):
-            self.on_sound_added(name, trimmed_path)
+    def _open_trimmer_dialog(self, name, path, edit=False, source_url=None):
+        """
+        Ouvre le dialogue de trimming de manière centralisée.
+        La coupe est enregistrée comme métadonnée du son (le fichier n'est pas modifié).
+        edit=True : son déjà dans la bibliothèque, on reprend son trim actuel.
+        source_url : URL dont le son a été téléchargé (mémorisée avec le son).
+        """
+        def on_trim_complete(trimmed_path, trim):
+            if not edit:
+                self.on_sound_added(name, trimmed_path, source_url)
+            self.sound_manager.set_trim(name, trim)
+        
+        def on_regions_exported(regions):
+            # Une région = un nouveau son
+            for region_name, region_path in regions:
+                self.on_sound_added(self._unique_sound_name(region_name), region_path)
         
         from audio_trimmer import AudioTrimDialog
         # Utiliser self comme parent
-        trimmer = AudioTrimDialog(self, str(path), on_trim_complete)
+        trim = self.sound_manager.get_trim(name) if edit else None
+        trimmer = AudioTrimDialog(self, str(path), on_trim_complete, trim=trim, on_export_regions=on_regions_exported)
         trimmer.grab_set()
 
+    def edit_trim(self, name):
+        path = self.sound_manager.sounds.get(name)
+        if path:
+            self._open_trimmer_dialog(name, path, edit=True)
+
+    def bake_trim(self, name):
+        """Applique la coupe au fichier en arrière-plan"""
+        def on_done(ok):
+            if not ok:
+                self.after(0, lambda: messagebox.showerror("Erreur", f"Impossible d'appliquer la coupe de '{name}'"))
+        self.sound_manager.bake_trim(name, on_done)
+
     def open_file_import(self):
         """Ouvre un dialogue pour importer un fichier audio local"""
         filetypes = [
@@ -457,10 +488,47 @@ class SoundBoardApp(ctk.CTk):
                 messagebox.showerror("Erreur", f"Impossible d'importer le fichier:\n{e}")
     
     def open_add_dialog(self):
-        # Le callback sera appelé avec (name, path) une fois téléchargé
-        dialog = AddSoundDialog(self, self._open_trimmer_dialog, self.downloader)
+        dialog = AddSoundDialog(self, self.submit_downloads)
         dialog.grab_set()
 
+    def submit_downloads(self, urls):
+        """Met les URLs en file. Une seule : le trimmer s'ouvre à la fin ; plusieurs : ajoutées directement"""
+        open_trimmer = len(urls) == 1
+        for url in urls:
+            self.download_manager.submit(url, context={'open_trimmer': open_trimmer})
+        self.open_download_queue()
+
+    def open_download_queue(self):
+        if self.download_queue_view is not None and self.download_queue_view.winfo_exists():
+            self.download_queue_view.lift()
+            return
+        from download_queue import DownloadQueueView
+        self.download_queue_view = DownloadQueueView(self, self.download_manager)
+
+    def _on_download_update(self, job):
+        """Appelé sur le thread UI à chaque changement d'un téléchargement"""
+        if self.download_queue_view is not None and self.download_queue_view.winfo_exists():
+            self.download_queue_view.update_job(job)
+        active = self.download_manager.active_count()
+        self.btn_downloads.configure(text=f"⬇ Téléchargements ({active})" if active else "⬇ Téléchargements")
+        
+        if job.status == DownloadJob.DONE and job.path:
+            name = self._unique_sound_name(job.title)
+            if job.context and job.context.get('open_trimmer'):
+                self._open_trimmer_dialog(name, job.path, source_url=job.url)
+            else:
+                self.on_sound_added(name, job.path, job.url)
+        elif job.status == DownloadJob.EXISTING and job.context and job.context.get('open_trimmer'):
+            # Déjà dans la bibliothèque : reprendre sa coupe plutôt que créer un doublon
+            self.edit_trim(job.title)
+
+    def _unique_sound_name(self, name):
+        """name, suffixé si un son porte déjà ce nom"""
+        unique, n = name, 2
+        while unique in self.sound_manager.sounds:
+            unique, n = f"{name} ({n})", n + 1
+        return unique
+
     def _generate_tts_thread(self, text, name):
         # Si direct play, on utilise un nom temporaire ou fixe
         path = self.tts_generator.generate(text, name)
@@ -491,35 +559,37 @@ class SoundBoardApp(ctk.CTk):
 
 
 
-    def on_sound_added(self, name, path):
-        self.sound_manager.add_sound(name, path)
-        self.refresh_sounds()
+    def on_sound_added(self, name, path, source_url=None):
+        self.sound_manager.add_sound(name, path, source_url)
+        # Ne l'afficher que s'il correspond à la recherche en cours
+        if self.sound_manager.search_index.matches(name, self._search_query):
+            self.sound_grid.insert(name)
 
     def refresh_sounds(self):
-        # Nettoyer
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-
-        sounds = self.sound_manager.sounds
-        row = 0
-        col = 0
-        
-        for name, path in sounds.items():
-            # Afficher la touche assignée si existante
-            key = self.sound_manager.get_sound_key(name)
-            display_name = f"{name} [{key}]" if key else name
-            
-            btn = ctk.CTkButton(self.scrollable_frame, text=display_name, height=80, 
-                                command=lambda n=name: self.sound_manager.play_sound(n))
-            btn.grid(row=row, column=col, padx=10, pady=10, sticky="ew")
-            
-            # Clic droit pour menu contextuel
-            btn.bind("<Button-3>", lambda event, n=name, b=btn: self.show_sound_context_menu(event, n, b))
-
-            col += 1
-            if col > 3:
-                col = 0
-                row += 1
+        """Resynchronise toute la grille avec la bibliothèque (sans recréer de widgets)"""
+        self.sound_grid.refresh_labels()
+        self.apply_search(reset_scroll=False)
+
+    def on_search_changed(self, event=None):
+        query = self.entry_search.get()
+        if query != self._search_query:
+            self._search_query = query
+            self.apply_search()
+
+    def clear_search(self, event=None):
+        self.entry_search.delete(0, "end")
+        self.on_search_changed()
+
+    def apply_search(self, reset_scroll=True):
+        """Filtre la grille avec la recherche en cours (les boutons sont réutilisés)"""
+        self.sound_grid.set_items(self.sound_manager.search_sounds(self._search_query))
+        if reset_scroll:
+            self.sound_grid.scroll_to(0)
+
+    def _sound_label(self, name):
+        # Afficher les touches assignées si existantes
+        keys = self.sound_manager.get_sound_keys(name)
+        return f"{name} [{', '.join(keys)}]" if keys else name
     
     def show_sound_context_menu(self, event, name, button):
         """Affiche le menu contextuel pour un son"""
@@ -529,11 +599,16 @@ class SoundBoardApp(ctk.CTk):
                        activebackground='#1f6aa5', activeforeground='white',
                        font=('Segoe UI', 10))
         
-        # Afficher la touche actuelle si définie
-        current_key = self.sound_manager.get_sound_key(name)
-        key_label = f" ({current_key})" if current_key else ""
+        # Afficher les touches actuelles si définies
+        current_keys = self.sound_manager.get_sound_keys(name)
+        key_label = f" ({', '.join(current_keys)})" if current_keys else ""
         
         menu.add_command(label=f"⌨️ Assigner une touche{key_label}", command=lambda: self.assign_keybind(name))
+        if current_keys:
+            menu.add_command(label="➕ Ajouter une touche", command=lambda: self.assign_keybind(name, add=True))
+        menu.add_command(label="✂️ Modifier la coupe", command=lambda: self.edit_trim(name))
+        if self.sound_manager.get_trim(name):
+            menu.add_command(label="💾 Appliquer la coupe au fichier", command=lambda: self.bake_trim(name))
         menu.add_command(label="✏️ Renommer", command=lambda: self.rename_sound(name))
         menu.add_command(label="🗑️ Supprimer", command=lambda: self.delete_sound(name))
         
@@ -542,20 +617,20 @@ class SoundBoardApp(ctk.CTk):
         finally:
             menu.grab_release()
     
-    def assign_keybind(self, sound_name):
-        """Dialogue pour assigner une touche à un son"""
+    def assign_keybind(self, sound_name, add=False):
+        """Dialogue pour assigner une touche (ou un accord, ex: ctrl+f1) à un son"""
         dialog = ctk.CTkToplevel(self)
-        dialog.title("Assigner une touche")
+        dialog.title("Ajouter une touche" if add else "Assigner une touche")
         center_window(dialog, 400, 200, self)
         dialog.grab_set()
         
-        lbl = ctk.CTkLabel(dialog, text=f"Appuyez sur une touche pour '{sound_name}'\nou Echap pour annuler",
+        lbl = ctk.CTkLabel(dialog, text=f"Appuyez sur une touche ou un accord pour '{sound_name}'\nou Echap pour annuler",
                           font=("Arial", 12))
         lbl.pack(pady=30)
         
-        current_key = self.sound_manager.get_sound_key(sound_name)
-        if current_key:
-            lbl_current = ctk.CTkLabel(dialog, text=f"Touche actuelle: {current_key}",
+        current_keys = self.sound_manager.get_sound_keys(sound_name)
+        if current_keys:
+            lbl_current = ctk.CTkLabel(dialog, text=f"Touche(s) actuelle(s): {', '.join(current_keys)}",
                                       font=("Arial", 10), text_color="#888")
             lbl_current.pack(pady=5)
         
@@ -565,18 +640,20 @@ class SoundBoardApp(ctk.CTk):
             while keyboard.is_pressed('enter'):
                 pass
                 
-            event = keyboard.read_event(suppress=True)
-            if event.event_type == keyboard.KEY_DOWN:
-                key = event.name
-                
-                if key == 'esc':
-                    dialog.after(0, dialog.destroy)
-                    return
-                
-                # Assigner la touche
+            # Touche seule ou accord (retourné une fois toutes les touches relâchées)
+            key = keyboard.read_hotkey(suppress=True)
+            
+            if key == 'esc':
+                dialog.after(0, dialog.destroy)
+                return
+            
+            # Assigner la touche
+            if add:
+                self.sound_manager.add_keybind(key, sound_name)
+            else:
                 self.sound_manager.set_keybind(key, sound_name)
-                # Revenir thread UI pour fermer
-                self.after(0, lambda: [dialog.destroy(), self.refresh_sounds()])
+            # Revenir thread UI pour fermer (la touche a pu être retirée à un autre son)
+            self.after(0, lambda: [dialog.destroy(), self.sound_grid.refresh_labels()])
 
         # Lancer l'écoute dans un thread pour ne pas bloquer l'UI
         threading.Thread(target=wait_for_key, daemon=True).start()
@@ -597,19 +674,18 @@ class SoundBoardApp(ctk.CTk):
                 messagebox.showerror("Erreur", f"Un son nommé '{new_name}' existe déjà")
                 return
             
-            # Renommer dans le dictionnaire
-            path = self.sound_manager.sounds[old_name]
-            del self.sound_manager.sounds[old_name]
-            self.sound_manager.sounds[new_name] = path
-            self.sound_manager.save_config()
-            
-            # Rafraîchir l'affichage
-            self.refresh_sounds()
+            # Renommer (bibliothèque + keybind)
+            if self.sound_manager.rename_sound(old_name, new_name):
+                # Mettre à jour uniquement la case concernée (ou la retirer si elle ne correspond plus à la recherche)
+                if self.sound_manager.search_index.matches(new_name, self._search_query):
+                    self.sound_grid.rename(old_name, new_name)
+                else:
+                    self.sound_grid.remove(old_name)
 
     def delete_sound(self, name):
         if messagebox.askyesno("Supprimer", f"Voulez-vous supprimer le son '{name}' ?"):
             self.sound_manager.remove_sound(name)
-            self.refresh_sounds()
+            self.sound_grid.remove(name)
 
     def _check_updates(self):
         """Vérifie les mises à jour en arrière-plan"""
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+
+
+def file_hash(path):
+    """Hash SHA-1 du contenu d'un fichier (clé des sidecars et colonne content_hash de la bibliothèque)"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PCMStore:
+    """
+    Sidecars PCM "canoniques" : chaque son de la bibliothèque est transcodé une fois
+    au format natif du périphérique de sortie (fréquence + canaux), en float32 (.npy).
+    La lecture devient une simple copie, sans conversion de format à chaque play.
+
+    Les sidecars sont indexés par hash du contenu du fichier source et ouverts en
+    memmap : après un redémarrage, le premier play lit directement les pages du cache
+    de l'OS, sans décoder le MP3.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        # Index chemin -> (mtime, taille, hash) pour ne pas re-hasher un fichier inchangé
+        self._index_path = os.path.join(self.store_dir, self.INDEX_FILE)
+        self._index = {}
+        self._index_lock = threading.Lock()
+        self._load_index()
+
+        self._queue = queue.Queue()
+        self._generation = 0  # Incrémenté quand le format cible change (les anciennes tâches sont ignorées)
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r') as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _save_index_locked(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path)
+
+    def content_hash(self, path):
+        """Hash SHA-1 du contenu (recalculé uniquement si mtime/taille ont changé)"""
+        abs_path = os.path.abspath(path)
+        st = os.stat(abs_path)
+        with self._index_lock:
+            entry = self._index.get(abs_path)
+            if entry and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size:
+                return entry['hash']
+
+        digest = file_hash(abs_path)
+
+        with self._index_lock:
+            self._index[abs_path] = {'mtime': st.st_mtime_ns, 'size': st.st_size, 'hash': digest}
+            try:
+                self._save_index_locked()
+            except OSError as e:
+                print(f"Erreur sauvegarde index PCM: {e}")
+        return digest
+
+    def forget(self, path):
+        """Oublie un fichier source (supprimé de la bibliothèque)"""
+        with self._index_lock:
+            if self._index.pop(os.path.abspath(path), None) is not None:
+                try:
+                    self._save_index_locked()
+                except OSError:
+                    pass
+
+    def sidecar_path(self, path, sample_rate, nchannels):
+        """Chemin du sidecar pour ce contenu source et ce format"""
+        digest = self.content_hash(path)
+        return os.path.join(self.store_dir, f"{digest}_{sample_rate}_{nchannels}.npy")
+
+    def load(self, path, sample_rate, nchannels):
+        """
+        Retourne les samples canoniques (frames, ch) en memmap lecture seule
+        si le sidecar existe, sinon None.
+        """
+        import numpy as np
+
+        try:
+            sidecar = self.sidecar_path(path, sample_rate, nchannels)
+            if not os.path.exists(sidecar):
+                return None
+            return np.load(sidecar, mmap_mode='r')
+        except Exception as e:
+            print(f"Erreur lecture sidecar: {e}")
+            return None
+
+    def build(self, path, sample_rate, nchannels):
+        """Transcode un fichier vers le format canonique (si pas déjà fait)"""
+        import miniaudio
+        import numpy as np
+        from dsp import remix, resample
+
+        sidecar = self.sidecar_path(path, sample_rate, nchannels)
+        if os.path.exists(sidecar):
+            return sidecar
+
+        # Décodage au format d'origine, conversion faite ici (rééchantillonneur haute qualité) ;
+        # sans format explicite, decode_file convertirait en stéréo 44.1 kHz
+        info = miniaudio.get_file_info(path)
+        decoded = miniaudio.decode_file(path, output_format=miniaudio.SampleFormat.FLOAT32,
+                                        nchannels=info.nchannels, sample_rate=info.sample_rate)
+        samples = np.frombuffer(decoded.samples, dtype=np.float32).reshape((-1, decoded.nchannels))
+        samples = remix(samples, nchannels)
+        samples = resample(samples, decoded.sample_rate, sample_rate)
+
+        # Écriture atomique : un sidecar à moitié écrit ne doit jamais être lu (ni mappé)
+        tmp = sidecar + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, np.ascontiguousarray(samples, dtype=np.float32))
+        os.replace(tmp, sidecar)
+        return sidecar
+
+    # --- Pipeline en arrière-plan ---
+
+    def schedule(self, paths, sample_rate, nchannels, on_built=None, new_format=False):
+        """
+        Met des fichiers en file pour transcodage en arrière-plan.
+        new_format=True annule les tâches en attente pour l'ancien format.
+        """
+        with self._lock:
+            if new_format:
+                self._generation += 1
+            generation = self._generation
+            for path in paths:
+                self._queue.put((generation, path, sample_rate, nchannels, on_built))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            generation, path, sample_rate, nchannels, on_built = self._queue.get()
+            if generation != self._generation or not os.path.exists(path):
+                continue
+            try:
+                self.build(path, sample_rate, nchannels)
+                if on_built:
+                    on_built(path)
+            except Exception as e:
+                print(f"Erreur transcodage '{path}': {e}")
+
+    def prune(self, keep_paths, sample_rate, nchannels):
+        """Supprime les sidecars dont le contenu n'est plus dans la bibliothèque (ou à l'ancien format)"""
+        keep = set()
+        for path in keep_paths:
+            try:
+                keep.add(os.path.basename(self.sidecar_path(path, sample_rate, nchannels)))
+            except OSError:
+                pass
+        for name in os.listdir(self.store_dir):
+            if name.endswith('.npy') and name not in keep:
+                try:
+                    os.remove(os.path.join(self.store_dir, name))
+                except OSError:
+                    pass
+
+        # Nettoyer l'index des fichiers sources disparus
+        with self._index_lock:
+            keep_abs = {os.path.abspath(p) for p in keep_paths}
+            for abs_path in [p for p in self._index if p not in keep_abs]:
+                del self._index[abs_path]
+            try:
+                self._save_index_locked()
+            except OSError:
+                pass
@@ -0,0 +1,196 @@
+import os
+
+import numpy as np
+
+
+class PeakPyramid:
+    """
+    Pyramide de pics (mipmap) d'un son : min/max du signal mono par blocs de
+    BASE samples (niveau 0), puis par blocs 2x plus grands à chaque niveau.
+    L'affichage de la waveform lit le niveau adapté au zoom, sans jamais
+    garder tous les samples en mémoire.
+
+    Sauvegardée une fois à côté du son (<son>.peaks.npz), invalidée si le fichier
+    source change (mtime / taille).
+    """
+
+    BASE = 64        # Samples par bin au niveau 0 (~1.5 ms à 44.1 kHz)
+    MIN_BINS = 256   # On arrête de décimer sous ce nombre de bins
+    VERSION = 1
+    SUFFIX = ".peaks.npz"
+
+    def __init__(self, levels, sample_rate, frames, extras=None):
+        self.levels = levels  # [(mins, maxs)] float16, niveau k = blocs de BASE * 2**k samples
+        self.sample_rate = sample_rate
+        self.frames = frames
+        self.extras = extras or {}  # Analyses annexes mises en cache avec les pics (ex: 'onsets', 'cues')
+
+    @property
+    def duration_ms(self):
+        return self.frames * 1000 / self.sample_rate if self.sample_rate else 0
+
+    # --- Construction ---
+
+    class Builder:
+        """Construction incrémentale du niveau 0 à partir de blocs de samples mono"""
+
+        def __init__(self, sample_rate):
+            self.sample_rate = sample_rate
+            self.frames = 0
+            self._mins = []
+            self._maxs = []
+            self._rest = np.zeros(0, dtype=np.float32)  # Samples en attente (< BASE)
+
+        def push(self, mono):
+            self.frames += len(mono)
+            data = np.concatenate((self._rest, mono)) if len(self._rest) else mono
+            full = len(data) - len(data) % PeakPyramid.BASE
+            if full:
+                blocks = data[:full].reshape(-1, PeakPyramid.BASE)
+                self._mins.append(blocks.min(axis=1).astype(np.float16))
+                self._maxs.append(blocks.max(axis=1).astype(np.float16))
+            self._rest = np.array(data[full:], dtype=np.float32)
+
+        def _level0(self):
+            mins = list(self._mins)
+            maxs = list(self._maxs)
+            if len(self._rest):
+                mins.append(np.array([self._rest.min()], dtype=np.float16))
+                maxs.append(np.array([self._rest.max()], dtype=np.float16))
+            if not mins:
+                return np.zeros(1, dtype=np.float16), np.zeros(1, dtype=np.float16)
+            return np.concatenate(mins), np.concatenate(maxs)
+
+        def finish(self):
+            mins, maxs = self._level0()
+            return PeakPyramid(PeakPyramid._decimate(mins, maxs), self.sample_rate, self.frames)
+
+        def snapshot(self, total_frames):
+            """Pyramide partielle pour l'affichage progressif (la partie pas encore décodée est à zéro)"""
+            mins, maxs = self._level0()
+            frames = max(self.frames, total_frames)
+            missing = -(-frames // PeakPyramid.BASE) - len(mins)
+            if missing > 0:
+                pad = np.zeros(missing, dtype=np.float16)
+                mins = np.concatenate((mins, pad))
+                maxs = np.concatenate((maxs, pad))
+            return PeakPyramid(PeakPyramid._decimate(mins, maxs), self.sample_rate, frames)
+
+    @classmethod
+    def _decimate(cls, mins, maxs):
+        levels = [(mins, maxs)]
+        while len(mins) > cls.MIN_BINS:
+            if len(mins) % 2:
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+            mins = mins.reshape(-1, 2).min(axis=1)
+            maxs = maxs.reshape(-1, 2).max(axis=1)
+            levels.append((mins, maxs))
+        return levels
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate):
+        """Depuis un tableau (frames,) ou (frames, canaux) déjà décodé"""
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 2:
+            samples = samples.mean(axis=1)
+        builder = cls.Builder(sample_rate)
+        builder.push(samples)
+        return builder.finish()
+
+    @classmethod
+    def from_file(cls, path, chunk_frames=65536):
+        """Décodage en streaming (mémoire constante), mixé en mono"""
+        import miniaudio
+
+        info = miniaudio.get_file_info(str(path))
+        builder = cls.Builder(info.sample_rate)
+        for chunk in miniaudio.stream_file(str(path), output_format=miniaudio.SampleFormat.FLOAT32,
+                                           nchannels=1, sample_rate=info.sample_rate,
+                                           frames_to_read=chunk_frames):
+            builder.push(np.frombuffer(chunk, dtype=np.float32))
+        return builder.finish()
+
+    # --- Cache disque ---
+
+    @classmethod
+    def cache_path(cls, path):
+        return str(path) + cls.SUFFIX
+
+    @staticmethod
+    def _source_stamp(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def save(self, path):
+        """Écrit le cache à côté du son (écriture atomique)"""
+        mtime, size = self._source_stamp(path)
+        arrays = {'meta': np.array([self.VERSION, self.sample_rate, self.frames, mtime, size], dtype=np.int64)}
+        for k, (mins, maxs) in enumerate(self.levels):
+            arrays[f'min{k}'] = mins
+            arrays[f'max{k}'] = maxs
+        for key, value in self.extras.items():
+            arrays[f'x_{key}'] = np.asarray(value)
+        target = self.cache_path(path)
+        tmp = target + ".tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, target)
+        except OSError as e:
+            print(f"Erreur sauvegarde pics '{target}': {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path):
+        """Pyramide en cache, ou None si absente / périmée"""
+        target = cls.cache_path(path)
+        if not os.path.exists(target):
+            return None
+        try:
+            with np.load(target) as data:
+                version, sample_rate, frames, mtime, size = (int(v) for v in data['meta'])
+                if version != cls.VERSION or (mtime, size) != cls._source_stamp(path):
+                    return None
+                levels = []
+                while f'min{len(levels)}' in data:
+                    k = len(levels)
+                    levels.append((data[f'min{k}'], data[f'max{k}']))
+                extras = {key[2:]: data[key] for key in data.files if key.startswith('x_')}
+            return cls(levels, sample_rate, frames, extras) if levels else None
+        except Exception as e:
+            print(f"Erreur lecture pics '{target}': {e}")
+            return None
+
+    @classmethod
+    def load_or_build(cls, path):
+        peaks = cls.load(path)
+        if peaks is None:
+            peaks = cls.from_file(path)
+            peaks.save(path)
+        return peaks
+
+    # --- Lecture ---
+
+    def envelope(self, start_frame, end_frame, width):
+        """Min/max (float32) pour width colonnes entre deux positions, au niveau de détail adapté"""
+        width = max(1, int(width))
+        span = max(1, end_frame - start_frame)
+        samples_per_pixel = span / width
+
+        # Niveau le plus grossier qui garde au moins un bin par pixel
+        level = 0
+        while level + 1 < len(self.levels) and self.BASE * 2 ** (level + 1) <= samples_per_pixel:
+            level += 1
+        mins, maxs = self.levels[level]
+        block = self.BASE * 2 ** level
+
+        first = min(len(mins) - 1, max(0, int(start_frame // block)))
+        last = min(len(mins), max(first + 1, int(-(-end_frame // block))))
+        starts = first + (np.arange(width) * ((last - first) / width)).astype(np.int64)
+        starts = np.minimum(starts, last - 1) - first
+        view_mins = mins[first:last]
+        view_maxs = maxs[first:last]
+        return (np.minimum.reduceat(view_mins, starts).astype(np.float32),
+                np.maximum.reduceat(view_maxs, starts).astype(np.float32))
@@ -0,0 +1,118 @@
+import unicodedata
+
+
+class SearchIndex:
+    """
+    Index de recherche en mémoire sur les noms de sons (et leurs tags éventuels).
+    - préfixes de mots : 'exp' -> sons dont un mot commence par 'exp'
+    - trigrammes : recherche de sous-chaînes ('plos' dans 'explosion')
+    Mis à jour son par son (ajout / suppression / renommage), jamais reconstruit.
+    """
+
+    def __init__(self):
+        self._order = {}     # nom -> numéro d'ajout (résultats dans l'ordre de la bibliothèque)
+        self._next = 0
+        self._text = {}      # nom -> texte normalisé (nom + tags)
+        self._prefixes = {}  # préfixe de mot -> {noms}
+        self._trigrams = {}  # trigramme -> {noms}
+
+    @staticmethod
+    def normalize(text):
+        """Minuscules, sans accents, séparateurs '_' / '-' remplacés par des espaces"""
+        text = unicodedata.normalize('NFKD', text.lower())
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+        for sep in '_-.':
+            text = text.replace(sep, ' ')
+        return ' '.join(text.split())
+
+    @staticmethod
+    def _word_prefixes(text):
+        prefixes = set()
+        for word in text.split():
+            for i in range(1, len(word) + 1):
+                prefixes.add(word[:i])
+        return prefixes
+
+    @staticmethod
+    def _trigrams_of(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    # --- Mises à jour incrémentales ---
+
+    def add(self, name, tags=()):
+        if name in self._text:
+            self.remove(name)
+        text = self.normalize(' '.join([name, *tags]))
+        self._text[name] = text
+        self._order[name] = self._next
+        self._next += 1
+        for prefix in self._word_prefixes(text):
+            self._prefixes.setdefault(prefix, set()).add(name)
+        for trigram in self._trigrams_of(text):
+            self._trigrams.setdefault(trigram, set()).add(name)
+
+    def add_many(self, names):
+        for name in names:
+            self.add(name)
+
+    def remove(self, name):
+        text = self._text.pop(name, None)
+        if text is None:
+            return
+        del self._order[name]
+        for index, keys in ((self._prefixes, self._word_prefixes(text)), (self._trigrams, self._trigrams_of(text))):
+            for key in keys:
+                bucket = index.get(key)
+                if bucket is not None:
+                    bucket.discard(name)
+                    if not bucket:
+                        del index[key]
+
+    def rename(self, old_name, new_name, tags=()):
+        """Le son garde sa place dans l'ordre de la bibliothèque"""
+        order = self._order.get(old_name)
+        self.remove(old_name)
+        self.add(new_name, tags)
+        if order is not None:
+            self._order[new_name] = order
+
+    # --- Recherche ---
+
+    def _candidates(self, token):
+        """Noms contenant token (préfixe de mot pour les tokens courts, sous-chaîne sinon)"""
+        if len(token) < 3:
+            return self._prefixes.get(token, set())
+        result = None
+        for trigram in self._trigrams_of(token):
+            bucket = self._trigrams.get(trigram)
+            if not bucket:
+                return set()
+            result = set(bucket) if result is None else result & bucket
+        # Les trigrammes peuvent être présents sans être contigus : vérifier
+        return {name for name in result if token in self._text[name]}
+
+    def search(self, query):
+        """Noms correspondant à tous les mots de la requête, dans l'ordre de la bibliothèque"""
+        tokens = self.normalize(query).split()
+        if not tokens:
+            return sorted(self._order, key=self._order.get)
+        # Commencer par le token le plus sélectif
+        result = None
+        for token in sorted(tokens, key=len, reverse=True):
+            candidates = self._candidates(token)
+            result = set(candidates) if result is None else result & candidates
+            if not result:
+                return []
+        return sorted(result, key=self._order.get)
+
+    def matches(self, name, query):
+        """Le son correspond-il à la requête ? (sans passer par l'index, pour un seul son)"""
+        text = self._text.get(name)
+        if text is None:
+            return False
+        words = text.split()
+        for token in self.normalize(query).split():
+            found = any(word.startswith(token) for word in words) if len(token) < 3 else token in text
+            if not found:
+                return False
+        return True
@@ -0,0 +1,215 @@
+import math
+import sys
+
+import customtkinter as ctk
+
+
+class SoundGrid(ctk.CTkFrame):
+    """
+    Grille de sons virtualisée.
+    Seuls les boutons visibles dans la fenêtre de défilement existent ; ils sont recyclés
+    (texte / commande reconfigurés) quand on fait défiler. Les ajouts, suppressions et
+    renommages modifient la liste des noms et ne reconfigurent que les cases visibles.
+    """
+
+    COLUMNS = 4
+    BUTTON_HEIGHT = 80
+    PAD = 10
+    ROW_HEIGHT = BUTTON_HEIGHT + 2 * PAD
+    SCROLL_STEP = ROW_HEIGHT // 2  # Défilement par cran de molette
+
+    def __init__(self, parent, label_for, on_play, on_context, title="Mes Sons", **kwargs):
+        super().__init__(parent, **kwargs)
+        self.label_for = label_for    # label_for(name) -> texte affiché sur le bouton
+        self.on_play = on_play        # on_play(name)
+        self.on_context = on_context  # on_context(event, name, button)
+
+        self._items = []    # Noms affichés, dans l'ordre
+        self._index = {}    # nom -> position dans _items
+        self._labels = {}   # Cache nom -> texte du bouton
+        self._slots = []    # Boutons recyclés : [bouton, nom affiché, texte affiché, case]
+        self._offset = 0    # Défilement (unités CTk, avant mise à l'échelle DPI)
+        self._button_width = None
+        self._redraw_pending = False
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.lbl_title = ctk.CTkLabel(self, text=title)
+        self.lbl_title.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(5, 0))
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 5), pady=5)
+
+        self.viewport.bind("<Configure>", lambda e: self._schedule_redraw())
+        self._bind_wheel(self.viewport)
+
+    # --- Modifications incrémentales ---
+
+    def set_items(self, names):
+        """Remplace la liste affichée (sans recréer de widgets)"""
+        self._items = list(names)
+        self._index = {name: i for i, name in enumerate(self._items)}
+        self._clamp_offset()
+        self._schedule_redraw()
+
+    def insert(self, name, position=None):
+        """Ajoute un son (à la fin par défaut). Si le nom existe déjà, met juste à jour son texte"""
+        if name in self._index:
+            self.update_item(name)
+            return
+        if position is None or position >= len(self._items):
+            self._index[name] = len(self._items)
+            self._items.append(name)
+        else:
+            self._items.insert(position, name)
+            self._reindex(position)
+        self._schedule_redraw()
+
+    def remove(self, name):
+        i = self._index.pop(name, None)
+        self._labels.pop(name, None)
+        if i is None:
+            return
+        del self._items[i]
+        self._reindex(i)
+        self._clamp_offset()
+        self._schedule_redraw()
+
+    def rename(self, old_name, new_name):
+        i = self._index.pop(old_name, None)
+        self._labels.pop(old_name, None)
+        if i is None:
+            return
+        self._items[i] = new_name
+        self._index[new_name] = i
+        self._schedule_redraw()
+
+    def update_item(self, name):
+        """Le texte d'un son a changé (ex: nouvelle touche)"""
+        self._labels.pop(name, None)
+        if name in self._index:
+            self._schedule_redraw()
+
+    def refresh_labels(self):
+        """Invalide tous les textes (ex: une touche a été retirée d'un autre son)"""
+        self._labels.clear()
+        self._schedule_redraw()
+
+    def _reindex(self, start):
+        for i in range(start, len(self._items)):
+            self._index[self._items[i]] = i
+
+    # --- Défilement ---
+
+    def _view_size(self):
+        """Taille du viewport en unités CTk (place() et les widgets CTk appliquent eux-mêmes le scaling DPI)"""
+        scaling = self._get_widget_scaling()
+        return self.viewport.winfo_width() / scaling, self.viewport.winfo_height() / scaling
+
+    def _content_height(self):
+        return math.ceil(len(self._items) / self.COLUMNS) * self.ROW_HEIGHT
+
+    def _clamp_offset(self):
+        max_offset = max(0, self._content_height() - self._view_size()[1])
+        self._offset = int(max(0, min(self._offset, max_offset)))
+
+    def scroll_to(self, offset):
+        self._offset = int(offset)
+        self._clamp_offset()
+        self._redraw()
+
+    def _on_scrollbar(self, *args):
+        height = self._content_height()
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * height)
+        elif args[0] == "scroll":
+            step = self._view_size()[1] if args[2] == "pages" else self.SCROLL_STEP
+            self.scroll_to(self._offset + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.scroll_to(self._offset + delta * self.SCROLL_STEP)
+
+    def _bind_wheel(self, widget):
+        if sys.platform.startswith("linux"):
+            widget.bind("<Button-4>", self._on_wheel)
+            widget.bind("<Button-5>", self._on_wheel)
+        else:
+            widget.bind("<MouseWheel>", self._on_wheel)
+
+    # --- Rendu ---
+
+    def _schedule_redraw(self):
+        # Regroupe plusieurs modifications en un seul rendu
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+    def _ensure_slots(self, count):
+        """Crée les boutons manquants (une seule fois, la réserve ne fait que grandir)"""
+        while len(self._slots) < count:
+            slot = [None, None, None, None]
+            btn = ctk.CTkButton(self.viewport, text="", height=self.BUTTON_HEIGHT, width=self._button_width or 140,
+                                command=lambda s=slot: s[1] is not None and self.on_play(s[1]))
+            btn.bind("<Button-3>", lambda event, s=slot: s[1] is not None and self.on_context(event, s[1], s[0]))
+            self._bind_wheel(btn)
+            slot[0] = btn
+            self._slots.append(slot)
+
+    def _redraw(self):
+        self._redraw_pending = False
+        view_width, view_height = self._view_size()
+        self._clamp_offset()
+        col_width = view_width / self.COLUMNS
+
+        first_row = self._offset // self.ROW_HEIGHT
+        visible_rows = int(view_height // self.ROW_HEIGHT) + 2
+        first = first_row * self.COLUMNS
+        last = min(len(self._items), first + visible_rows * self.COLUMNS)
+        self._ensure_slots(visible_rows * self.COLUMNS)
+
+        # Largeur des boutons : uniquement quand la fenêtre change de taille
+        button_width = max(40, int(col_width) - 2 * self.PAD)
+        if button_width != self._button_width:
+            self._button_width = button_width
+            for slot in self._slots:
+                slot[0].configure(width=button_width)
+                slot[3] = None
+
+        for slot_index, slot in enumerate(self._slots):
+            btn = slot[0]
+            i = first + slot_index
+            if i >= last:
+                if slot[3] is not None:
+                    btn.place_forget()
+                    slot[1] = slot[2] = slot[3] = None
+                continue
+
+            name = self._items[i]
+            text = self._labels.get(name)
+            if text is None:
+                text = self._labels[name] = self.label_for(name)
+            slot[1] = name
+            if slot[2] != text:
+                btn.configure(text=text)
+                slot[2] = text
+
+            row, col = divmod(i, self.COLUMNS)
+            cell = (int(col * col_width) + self.PAD, row * self.ROW_HEIGHT - self._offset + self.PAD)
+            if slot[3] != cell:
+                btn.place(x=cell[0], y=cell[1])
+                slot[3] = cell
+
+        height = self._content_height()
+        if height <= view_height or height == 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._offset / height, (self._offset + view_height) / height)
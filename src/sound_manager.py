@@ -1,11 +1,158 @@
 import threading
 import json
 import os
+from collections import OrderedDict
 import keyboard
 
+from hotkeys import HotkeyDispatcher
+from keybinds import KeybindRegistry
+from audio_engine import AudioEngine
+from pcm_store import PCMStore
+from config_writer import ConfigWriter
+from library_db import SoundLibrary
+from search_index import SearchIndex
+from peaks import PeakPyramid
+from loudness import LoudnessMeter
+from downloader import Downloader
+
+
+class PCMCache:
+    """Cache LRU des samples décodés (float32), borné par un budget mémoire en octets"""
+
+    def __init__(self, budget_bytes=256 * 1024 * 1024, store=None):
+        self.budget_bytes = budget_bytes
+        self.store = store  # PCMStore optionnel : sidecars déjà au bon format
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # (path, mtime, size, rate, ch) -> (samples, sample_rate, nchannels)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(path, sample_rate, nchannels):
+        """Clé = chemin absolu + mtime + taille (un fichier réécrit change de clé) + format demandé"""
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size, sample_rate, nchannels)
+
+    def peek(self, path, sample_rate=None, nchannels=None):
+        """Retourne l'entrée si elle est déjà en cache (sans décoder), sinon None"""
+        key = self._make_key(path, sample_rate, nchannels)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def get(self, path, sample_rate=None, nchannels=None):
+        """
+        Retourne (samples, sample_rate, nchannels), en décodant si absent du cache.
+        samples est toujours de forme (frames, channels).
+        Si sample_rate/nchannels sont donnés, le son est converti à ce format au décodage.
+        """
+        key = self._make_key(path, sample_rate, nchannels)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Décodage hors du verrou pour ne pas bloquer les autres lectures
+        entry = self._decode(path, sample_rate, nchannels)
+        self._put(key, entry)
+        return entry
+
+    def _decode(self, path, sample_rate=None, nchannels=None):
+        import miniaudio
+        import numpy as np
+
+        # Sidecar canonique disponible : memmap, aucun décodage ni conversion
+        if self.store is not None and sample_rate and nchannels:
+            samples = self.store.load(path, sample_rate, nchannels)
+            if samples is not None:
+                samples.flags.writeable = False
+                return (samples, sample_rate, nchannels)
+
+        # Décoder le fichier avec miniaudio (beaucoup plus rapide que pydub/soundfile)
+        # Format non demandé : garder celui du fichier (decode_file ne sait pas le déduire seul)
+        if not (sample_rate and nchannels):
+            info = miniaudio.get_file_info(path)
+            sample_rate = sample_rate or info.sample_rate
+            nchannels = nchannels or info.nchannels
+        decoded = miniaudio.decode_file(path, nchannels=nchannels, sample_rate=sample_rate)
+        samples = np.frombuffer(decoded.samples, dtype=np.int16).astype(np.float32)
+        samples /= 32768.0
+
+        # Reshape (frames, channels), même en mono
+        samples = samples.reshape((-1, decoded.nchannels))
+
+        # Partagé entre plusieurs lectures : lecture seule
+        samples.flags.writeable = False
+        return (samples, decoded.sample_rate, decoded.nchannels)
+
+    @staticmethod
+    def _entry_bytes(samples):
+        """Mémoire comptée dans le budget (un memmap vit dans le cache de pages de l'OS)"""
+        import numpy as np
+        return 0 if isinstance(samples, np.memmap) else samples.nbytes
+
+    def _put(self, key, entry):
+        size = self._entry_bytes(entry[0])
+        if size > self.budget_bytes:
+            return  # Trop gros pour le cache, on ne le garde pas
+
+        with self._lock:
+            # Supprimer les anciennes versions du même fichier
+            self._remove_path_locked(key[0])
+            self._entries[key] = entry
+            self.used_bytes += size
+            while self.used_bytes > self.budget_bytes and self._entries:
+                _, (old_samples, _, _) = self._entries.popitem(last=False)
+                self.used_bytes -= self._entry_bytes(old_samples)
+                self.evictions += 1
+
+    def _remove_path_locked(self, abs_path):
+        for key in [k for k in self._entries if k[0] == abs_path]:
+            samples = self._entries.pop(key)[0]
+            self.used_bytes -= self._entry_bytes(samples)
+
+    def invalidate(self, path):
+        """Retire toutes les entrées d'un fichier (ajout, suppression, trim)"""
+        with self._lock:
+            self._remove_path_locked(os.path.abspath(path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def set_budget(self, budget_bytes):
+        """Change le budget mémoire et évince si nécessaire"""
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            while self.used_bytes > self.budget_bytes and self._entries:
+                _, (old_samples, _, _) = self._entries.popitem(last=False)
+                self.used_bytes -= self._entry_bytes(old_samples)
+                self.evictions += 1
+
+    def stats(self):
+        """Statistiques du cache (pour debug / affichage)"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'used_bytes': self.used_bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
 
 class SoundManager:
-    def __init__(self, config_file="config.json"):
+    def __init__(self, config_file="config.json", library_db=None):
         self.config_file = config_file
         self.sounds = {}
         self.current_device = None
@@ -16,45 +163,90 @@ class SoundManager:
         self.vol_monitoring = 1.0
         
         # Playback state
-        self.current_play_id = 0
+        # Incrémenté à chaque stop : un décodage lancé avant un stop ne doit pas démarrer après
+        self.stop_generation = 0
         self.lock = threading.Lock()
-        self.fade_out = False  # Flag pour fade out progressif
         
-        # Keybinds (touche -> nom du son)
-        self.keybinds = {}  # Ex: {'f1': 'mon_son', '1': 'autre_son'}
+        # Polyphonie (nombre de sons simultanés et politique de vol de voice)
+        self.max_voices = 8
+        self.voice_steal_policy = 'oldest'  # 'oldest' ou 'quietest'
+        
+        # Keybinds indexés dans les deux sens, par couche (touche ou accord <-> nom du son)
+        self.keybinds = KeybindRegistry()  # Ex: 'f1' -> 'mon_son', 'ctrl+1' -> 'autre_son'
+        self.active_layer = KeybindRegistry.BASE_LAYER
         self.stop_key = None  # Touche pour arrêter tout
         
-        self.playing_thread = None
-        self.stop_event = threading.Event()
+        # Trim non destructif par son : {'start', 'end', 'fade_in', 'fade_out'} en secondes (end None = fin du fichier)
+        self.trims = {}
+        
+        # Gain de normalisation par son (loudness EBU R128 analysée une fois, stockée dans la bibliothèque)
+        self.loudness_gains = {}
+        
+        # URL d'origine (forme canonique) des sons téléchargés : ré-ajouter la même URL réutilise le son
+        self.sources = {}
+        self._by_source = {}  # Index inverse : URL canonique -> {noms} (tenu à jour avec self.sources)
+        
+        # Cache des sons décodés (budget en Mo, configurable)
+        self.cache_budget_mb = 256
+        # Sidecars PCM au format natif du périphérique (à côté de config.json et sounds/)
+        self.pcm_store = PCMStore(os.path.join(os.path.dirname(os.path.abspath(config_file)), "pcm"))
+        self.pcm_cache = PCMCache(store=self.pcm_store)
+        
+        # Sons plus longs que ce seuil : décodage en streaming (pas de cache, mémoire constante)
+        self.stream_threshold_sec = 30
+        self._durations = {}  # (path, mtime, size) -> durée en secondes
+        
+        # Moteur audio : streams persistants par périphérique
+        self.engine = AudioEngine()
+        
+        # Sauvegarde différée de config.json (pas d'I/O disque sur le thread UI).
+        # Verrou de l'état sauvegardé : le snapshot est pris sous ce verrou, sur le thread qui modifie
+        self._state_lock = threading.RLock()
+        self.config_writer = ConfigWriter(config_file, self._config_snapshot, lock=self._state_lock)
+        
+        # Bibliothèque SQLite optionnelle (sinon sons et keybinds restent dans config.json)
+        self.library = SoundLibrary(library_db) if library_db else None
         
         # Charger la config (APRÈS l'initialisation des variables)
         self.load_config()
+        if self.library:
+            self._load_library()
+        for name, url in self.sources.items():
+            self._by_source.setdefault(url, set()).add(name)
+        # Index de recherche (construit une seule fois, puis mis à jour son par son)
+        self.search_index = SearchIndex()
+        self.search_index.add_many(self.sounds)
+        self.pcm_cache.set_budget(self.cache_budget_mb * 1024 * 1024)
+        self.engine.set_max_voices(self.max_voices)
+        self.engine.set_steal_policy(self.voice_steal_policy)
+        self._apply_gains()
+        
+        # Ouvrir les streams en background (ne pas bloquer le démarrage de l'UI)
+        threading.Thread(target=self._update_engine_devices, daemon=True).start()
         
-        # Démarrer le listener global
+        # Démarrer le listener global (table de dispatch + file vers le thread de lecture)
+        self.hotkeys = HotkeyDispatcher(on_play=self.play_sound, on_stop=self.stop_sound)
+        self._compile_hotkeys()
         self._start_global_listener()
 
     def _start_global_listener(self):
         """Démarre l'écoute globale du clavier"""
         try:
-            keyboard.hook(self._on_global_key)
+            keyboard.hook(self.hotkeys.hook)
         except Exception as e:
             print(f"Erreur init clavier global: {e}")
 
-    def _on_global_key(self, event):
-        """Callback appelé à chaque événement clavier global"""
-        if event.event_type == keyboard.KEY_DOWN:
-            key = event.name
-            
-            # Stop ?
-            if self.stop_key and key == self.stop_key:
-                self.stop_sound()
-                return
+    def _compile_hotkeys(self):
+        """Met à jour la table de dispatch du hook (après tout changement de keybind / son)"""
+        # La couche active se superpose à la couche de base
+        table = self.keybinds.layer_map(KeybindRegistry.BASE_LAYER)
+        if self.active_layer != KeybindRegistry.BASE_LAYER:
+            table.update(self.keybinds.layer_map(self.active_layer))
+        self.hotkeys.compile(table, self.sounds, self.stop_key)
 
-            # Sound ?
-            if key in self.keybinds:
-                sound_name = self.keybinds[key]
-                if sound_name in self.sounds:
-                    self.play_sound(sound_name)
+    def get_latency_stats(self):
+        """Histogramme des latences touche -> premier sample"""
+        return self.engine.latency.summary()
 
     def load_config(self):
         if os.path.exists(self.config_file):
@@ -66,35 +258,193 @@ class SoundManager:
                     self.monitoring = data.get('monitoring', False)
                     self.vol_output = data.get('vol_output', 1.0)
                     self.vol_monitoring = data.get('vol_monitoring', 1.0)
-                    self.keybinds = data.get('keybinds', {})
+                    layers = dict(data.get('keybind_layers', {}))
+                    layers[KeybindRegistry.BASE_LAYER] = data.get('keybinds', {})
+                    self.keybinds.load(layers)
+                    self.active_layer = data.get('active_layer', KeybindRegistry.BASE_LAYER)
                     self.stop_key = data.get('stop_key', None)
+                    self.trims = {name: self._normalize_trim(trim) for name, trim in data.get('trims', {}).items()}
+                    self.sources = data.get('sources', {})
+                    self.cache_budget_mb = data.get('cache_budget_mb', 256)
+                    self.max_voices = data.get('max_voices', 8)
+                    self.voice_steal_policy = data.get('voice_steal_policy', 'oldest')
+                    self.stream_threshold_sec = data.get('stream_threshold_sec', 30)
             except Exception as e:
                 print(f"Erreur chargement config: {e}")
                 self.sounds = {}
 
+    def _load_library(self):
+        """Charge la bibliothèque SQLite (migration unique depuis config.json si la base est vide)"""
+        if self.library.is_empty() and self.sounds:
+            print(f"Migration de {len(self.sounds)} sons vers la bibliothèque SQLite...")
+            self.library.import_from_config(self.sounds, self.keybinds.to_config(), self.trims, self.sources)
+            # Réécrire config.json sans la liste des sons
+            self.save_config()
+        self.sounds, layers = self.library.load_all()
+        self.keybinds.load(layers)
+        self.trims = {name: self._normalize_trim(trim) for name, trim in self.library.load_trims().items()}
+        self.sources = self.library.load_sources()
+        self.loudness_gains = {name: LoudnessMeter.playback_gain(loudness, true_peak)
+                               for name, (loudness, true_peak) in self.library.load_loudness().items()}
+        
+        # Calculer en arrière-plan les métadonnées manquantes ou périmées (durée, hash, loudness...)
+        threading.Thread(target=self._refresh_metadata, daemon=True).start()
+
+    def _refresh_metadata(self):
+        """Analyse les sons jamais analysés et ceux dont le fichier a changé depuis (hash différent)"""
+        names = set(self.library.missing_metadata())
+        for name, (stored_hash, mtime, size) in self.library.load_hashes().items():
+            path = self.sounds.get(name)
+            if name in names or not path or not os.path.exists(path):
+                continue
+            try:
+                st = os.stat(path)
+                if (st.st_mtime_ns, st.st_size) == (mtime, size):
+                    continue  # Fichier inchangé depuis l'analyse : pas de lecture
+                if self.pcm_store.content_hash(path) != stored_hash:
+                    # Ne plus appliquer le gain de l'ancien contenu
+                    self.loudness_gains.pop(name, None)
+                    names.add(name)
+                else:
+                    # Touché mais identique (copie, synchro...) : ne plus le re-hasher au prochain lancement
+                    self.library.update_metadata(name, file_mtime=st.st_mtime_ns, file_size=st.st_size)
+            except OSError as e:
+                print(f"Erreur hash '{name}': {e}")
+        if names:
+            self._update_metadata([name for name in self.sounds if name in names])
+
+    def _update_metadata(self, names):
+        """Analyse les fichiers et enregistre leurs métadonnées dans la bibliothèque (thread de fond)"""
+        import miniaudio
+        import numpy as np
+        
+        for name in names:
+            path = self.sounds.get(name)
+            if not path or not os.path.exists(path):
+                continue
+            try:
+                st = os.stat(path)  # Avant le décodage : un fichier modifié pendant l'analyse sera revu
+                info = miniaudio.get_file_info(path)
+                # Niveaux mesurés au fil du décodage : mémoire constante même pour les longs sons
+                # (même passe : pyramide de pics pour l'éditeur, si pas déjà en cache)
+                peaks = None if PeakPyramid.load(path) else PeakPyramid.Builder(info.sample_rate)
+                meter = LoudnessMeter(info.sample_rate, info.nchannels)
+                peak = 0.0
+                for chunk in miniaudio.stream_file(path, output_format=miniaudio.SampleFormat.FLOAT32,
+                                                   nchannels=info.nchannels, sample_rate=info.sample_rate,
+                                                   frames_to_read=65536):
+                    data = np.frombuffer(chunk, dtype=np.float32).reshape(-1, info.nchannels)
+                    if len(data):
+                        peak = max(peak, float(np.abs(data).max()))
+                        meter.push(data)
+                        if peaks is not None:
+                            peaks.push(data.mean(axis=1))
+                if peaks is not None:
+                    peaks.finish().save(path)
+                loudness = meter.integrated()
+                self.library.update_metadata(
+                    name,
+                    content_hash=self.pcm_store.content_hash(path),
+                    file_mtime=st.st_mtime_ns,
+                    file_size=st.st_size,
+                    duration=info.duration,
+                    sample_rate=info.sample_rate,
+                    channels=info.nchannels,
+                    peak=peak,
+                    loudness=loudness,
+                    true_peak=meter.true_peak,
+                )
+                if self.sounds.get(name) == path:
+                    self.loudness_gains[name] = LoudnessMeter.playback_gain(loudness, meter.true_peak)
+            except Exception as e:
+                print(f"Erreur analyse '{name}': {e}")
+
     def save_config(self):
+        """Marque la config comme modifiée : écrite en arrière-plan (debounce, écriture atomique)"""
+        self.config_writer.mark_dirty()
+
+    def flush_config(self):
+        """Écrit immédiatement les changements en attente (à appeler avant de quitter)"""
+        self.config_writer.flush()
+
+    def shutdown(self):
+        """Sauvegarde la config et ferme les streams audio"""
+        self.flush_config()
+        self.engine.close()
+        if self.library:
+            self.library.close()
+
+    def _config_snapshot(self):
+        """Copie de l'état à sauvegarder (appelé par save_config, sous _state_lock)"""
         data = {
-            'sounds': self.sounds,
+            'sounds': dict(self.sounds),
             'device_id': self.current_device,
             'monitoring': self.monitoring,
             'vol_output': self.vol_output,
             'vol_monitoring': self.vol_monitoring,
-            'keybinds': self.keybinds,
-            'stop_key': self.stop_key
+            'keybinds': self.keybinds.layer_map(KeybindRegistry.BASE_LAYER),
+            'keybind_layers': {layer: binds for layer, binds in self.keybinds.to_config().items()
+                               if layer != KeybindRegistry.BASE_LAYER},
+            'active_layer': self.active_layer,
+            'stop_key': self.stop_key,
+            'trims': {name: dict(trim) for name, trim in self.trims.items()},
+            'sources': dict(self.sources),
+            'cache_budget_mb': self.cache_budget_mb,
+            'max_voices': self.max_voices,
+            'voice_steal_policy': self.voice_steal_policy,
+            'stream_threshold_sec': self.stream_threshold_sec
         }
-        with open(self.config_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        if self.library:
+            # Sons, keybinds, trims et URLs d'origine vivent dans la base SQLite
+            del data['sounds']
+            del data['keybinds']
+            del data['keybind_layers']
+            del data['trims']
+            del data['sources']
+        return data
 
     def set_volume_output(self, vol):
         """Définit le volume de sortie (0.0 à 1.0)"""
         self.vol_output = max(0.0, min(1.0, float(vol)))
+        self._apply_gains()
         self.save_config()
         
     def set_volume_monitoring(self, vol):
         """Définit le volume de monitoring (0.0 à 1.0)"""
         self.vol_monitoring = max(0.0, min(1.0, float(vol)))
+        self._apply_gains()
         self.save_config()
 
+    def _apply_gains(self):
+        """Transmet les volumes au moteur audio (lus par le callback à chaque bloc)"""
+        self.engine.set_gain('main', self.vol_output)
+        self.engine.set_gain('monitor', self.vol_monitoring if self.monitoring else 0.0)
+
+    def _update_engine_devices(self):
+        """(Re)configure les streams du moteur : sortie principale + monitoring (périphérique par défaut)"""
+        try:
+            import sounddevice as sd
+            device_out = self.current_device if self.current_device is not None else sd.default.device[1]
+            device_mon = sd.default.device[1]
+            old_format = (self.engine.samplerate, self.engine.channels)
+            self.engine.set_devices(device_out, device_mon)
+        except Exception as e:
+            print(f"Erreur init moteur audio: {e}")
+            return
+        
+        # Nouveau format natif : (re)transcoder la bibliothèque en arrière-plan
+        new_format = (self.engine.samplerate, self.engine.channels)
+        if new_format != old_format and self.engine.samplerate:
+            self._canonicalize(list(self.sounds.values()), new_format=True)
+            self.pcm_store.prune(list(self.sounds.values()), *new_format)
+
+    def _canonicalize(self, paths, new_format=False):
+        """Transcode les sons au format du moteur (hors longs sons, lus en streaming)"""
+        if not self.engine.samplerate:
+            return
+        paths = [p for p in paths if os.path.exists(p) and not self._should_stream(p)]
+        self.pcm_store.schedule(paths, self.engine.samplerate, self.engine.channels, new_format=new_format)
+
     def get_devices(self):
         """Retourne la liste des périphériques de sortie disponibles (MME uniquement pour éviter doublons)."""
         import sounddevice as sd
@@ -118,188 +468,345 @@ class SoundManager:
         """Définit le périphérique de sortie actif."""
         self.current_device = device_id
         self.save_config()
+        # Reconstruire les streams hors du thread UI
+        threading.Thread(target=self._update_engine_devices, daemon=True).start()
+
+    def set_cache_budget(self, mb):
+        """Définit le budget mémoire du cache de sons décodés (en Mo)"""
+        self.cache_budget_mb = max(0, int(mb))
+        self.pcm_cache.set_budget(self.cache_budget_mb * 1024 * 1024)
+        self.save_config()
 
-    def add_sound(self, name, path):
-        """Ajoute un son à la bibliothèque"""
-        self.sounds[name] = path
+    def set_max_voices(self, max_voices):
+        """Définit le nombre maximum de sons joués simultanément"""
+        self.max_voices = max(1, int(max_voices))
+        self.engine.set_max_voices(self.max_voices)
         self.save_config()
 
+    def set_voice_steal_policy(self, policy):
+        """Quand le pool est plein : remplacer le son le plus ancien ('oldest') ou le plus faible ('quietest')"""
+        if policy in AudioEngine.STEAL_POLICIES:
+            self.voice_steal_policy = policy
+            self.engine.set_steal_policy(policy)
+            self.save_config()
+
+    def invalidate_file(self, path):
+        """À appeler quand un fichier son est réécrit (ex: trim)"""
+        self.pcm_cache.invalidate(path)
+
+    def add_sound(self, name, path, source_url=None):
+        """Ajoute un son à la bibliothèque (source_url : URL dont il a été téléchargé)"""
+        # Peut venir d'un thread de travail (bake_trim) : modifications groupées sous le verrou de l'état
+        with self._state_lock:
+            if name not in self.sounds:
+                self.search_index.add(name)
+            self.sounds[name] = path
+            if source_url:
+                source_url = Downloader.canonical_url(source_url)
+                self._unindex_source(name)
+                self.sources[name] = source_url
+                self._by_source.setdefault(source_url, set()).add(name)
+            # Nouveau fichier : l'ancien trim et l'ancien gain ne s'appliquent plus
+            self.trims.pop(name, None)
+            self.loudness_gains.pop(name, None)
+        # Le fichier a pu être (ré)écrit : ne pas servir une ancienne version
+        self.pcm_cache.invalidate(path)
+        if self.library:
+            self.library.add(name, path, source_url)
+            threading.Thread(target=self._update_metadata, args=([name],), daemon=True).start()
+        else:
+            self.save_config()
+        self._compile_hotkeys()
+        self._canonicalize([path])
+
+    def rename_sound(self, old_name, new_name):
+        """Renomme un son (le keybind suit le son). Retourne False si le nouveau nom existe déjà"""
+        with self._state_lock:
+            if old_name not in self.sounds or new_name in self.sounds:
+                return False
+            self.sounds[new_name] = self.sounds.pop(old_name)
+            if old_name in self.trims:
+                self.trims[new_name] = self.trims.pop(old_name)
+            if old_name in self.loudness_gains:
+                self.loudness_gains[new_name] = self.loudness_gains.pop(old_name)
+            if old_name in self.sources:
+                self._unindex_source(old_name)
+                self.sources[new_name] = self.sources.pop(old_name)
+                self._by_source.setdefault(self.sources[new_name], set()).add(new_name)
+            self.search_index.rename(old_name, new_name)
+            self.keybinds.rename_sound(old_name, new_name)
+        if self.library:
+            self.library.rename(old_name, new_name)
+        else:
+            self.save_config()
+        self._compile_hotkeys()
+        return True
+
     def remove_sound(self, name):
         """Supprime un son de la bibliothèque"""
-        if name in self.sounds:
-            # Nettoyer le keybind si existant
-            for key, sound_name in list(self.keybinds.items()):
-                if sound_name == name:
-                    del self.keybinds[key]
-            del self.sounds[name]
+        with self._state_lock:
+            if name not in self.sounds:
+                return
+            # Nettoyer les keybinds (toutes couches)
+            self.keybinds.unbind_sound(name)
+            path = self.sounds.pop(name)
+            self.trims.pop(name, None)
+            self.loudness_gains.pop(name, None)
+            self._unindex_source(name)
+            self.sources.pop(name, None)
+            self.search_index.remove(name)
+        self.pcm_cache.invalidate(path)
+        self.pcm_store.forget(path)
+        if self.library:
+            self.library.remove(name)
+        else:
             self.save_config()
+        self._compile_hotkeys()
     
-    def set_keybind(self, key, sound_name):
-        """Assigne une touche à un son"""
-        # 1. Nettoyer l'ancien keybind pour ce son (un son = une touche max)
-        for k, v in list(self.keybinds.items()):
-            if v == sound_name:
-                del self.keybinds[k]
-                
-        # 2. Supprimer l'ancien binding de la NOUVELLE touche si elle était prise
-        if key in self.keybinds:
-            del self.keybinds[key]
-            
-        # 3. Assigner
-        if sound_name:  # Si None, on supprime juste (déjà fait étape 1)
-            self.keybinds[key] = sound_name
-            
+    def set_keybind(self, key, sound_name, layer=KeybindRegistry.BASE_LAYER):
+        """Assigne une touche (ou un accord) à un son, en remplaçant ses autres touches dans la couche"""
+        binding = KeybindRegistry.normalize(key)
+        if sound_name:
+            removed = self.keybinds.bind(binding, sound_name, layer, exclusive=True)
+            added = [(layer, binding, sound_name)]
+        else:
+            # Si None, on supprime juste la touche
+            self.keybinds.unbind(binding, layer)
+            removed, added = [(layer, binding)], []
+        self._persist_keybinds(removed, added)
+
+    def add_keybind(self, key, sound_name, layer=KeybindRegistry.BASE_LAYER):
+        """Ajoute une touche supplémentaire à un son (un son peut avoir plusieurs touches)"""
+        binding = KeybindRegistry.normalize(key)
+        removed = self.keybinds.bind(binding, sound_name, layer)
+        self._persist_keybinds(removed, [(layer, binding, sound_name)])
+
+    def remove_keybind(self, key, layer=KeybindRegistry.BASE_LAYER):
+        binding = KeybindRegistry.normalize(key)
+        if self.keybinds.unbind(binding, layer) is not None:
+            self._persist_keybinds([(layer, binding)], [])
+
+    def _persist_keybinds(self, removed, added):
+        if self.library:
+            self.library.update_keybinds(removed, added)
+        else:
+            self.save_config()
+        self._compile_hotkeys()
+
+    def set_active_layer(self, layer):
+        """Change la couche de keybinds active (superposée à la couche de base)"""
+        self.active_layer = layer
         self.save_config()
-    
+        self._compile_hotkeys()
+
     def get_sound_key(self, sound_name):
         """Retourne la touche assignée à un son (ou None)"""
-        for key, name in self.keybinds.items():
-            if name == sound_name:
-                return key
-        return None
+        keys = self.get_sound_keys(sound_name)
+        return keys[0] if keys else None
+
+    def get_sound_keys(self, sound_name):
+        """Toutes les touches d'un son : couche active puis couche de base (O(1) par couche)"""
+        keys = []
+        if self.active_layer != KeybindRegistry.BASE_LAYER:
+            keys = self.keybinds.keys_for(sound_name, self.active_layer)
+        return keys + self.keybinds.keys_for(sound_name, KeybindRegistry.BASE_LAYER)
     
     def set_stop_key(self, key):
         """Définit la touche pour arrêter"""
         self.stop_key = key
         self.save_config()
+        self._compile_hotkeys()
     
 
-    def play_sound(self, name):
+    def search_sounds(self, query):
+        """Noms des sons correspondant à la recherche (tous si la requête est vide)"""
+        return self.search_index.search(query)
+
+    # --- Trim non destructif ---
+
+    @staticmethod
+    def _normalize_trim(trim):
+        """Valeurs par défaut et types (les colonnes / clés absentes valent None)"""
+        return {
+            'start': max(0.0, float(trim.get('start') or 0.0)),
+            'end': float(trim['end']) if trim.get('end') is not None else None,
+            'fade_in': max(0.0, float(trim.get('fade_in') or 0.0)),
+            'fade_out': max(0.0, float(trim.get('fade_out') or 0.0)),
+        }
+
+    def find_by_source(self, url):
+        """(nom, chemin) du son déjà téléchargé depuis cette URL (fichier toujours présent), sinon None"""
+        for name in list(self._by_source.get(Downloader.canonical_url(url), ())):
+            path = self.sounds.get(name)
+            if path and os.path.exists(path):
+                return name, path
+        return None
+
+    def _unindex_source(self, name):
+        """Retire un son de l'index inverse des URLs (avant de changer ou supprimer sa source)"""
+        names = self._by_source.get(self.sources.get(name))
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._by_source[self.sources[name]]
+
+    def get_trim(self, name):
+        trim = self.trims.get(name)
+        return dict(trim) if trim else None
+
+    def set_trim(self, name, trim):
+        """
+        Enregistre les points d'entrée / sortie et fondus d'un son (écriture instantanée, fichier intact).
+        trim : dict start/end/fade_in/fade_out en secondes, ou None pour jouer le fichier entier.
+        """
+        if name not in self.sounds:
+            return
+        if trim:
+            self.trims[name] = self._normalize_trim(trim)
+        else:
+            self.trims.pop(name, None)
+        if self.library:
+            self.library.set_trim(name, self.trims.get(name))
+        else:
+            self.save_config()
+
+    def bake_trim(self, name, on_done=None):
+        """
+        Applique le trim au fichier lui-même, en arrière-plan (le trim est ensuite remis à zéro).
+        on_done(succès) est appelé depuis le thread de travail.
+        """
+        trim = self.get_trim(name)
+        path = self.sounds.get(name)
+        if not trim or not path:
+            if on_done:
+                on_done(False)
+            return
+
+        def run():
+            ok = False
+            try:
+                from audio_trimmer import trim_file
+                end = trim['end']
+                if end is None:
+                    import miniaudio
+                    end = miniaudio.get_file_info(path).duration
+                ok = trim_file(path, trim['start'] * 1000, end * 1000,
+                               fade_in_ms=trim['fade_in'] * 1000, fade_out_ms=trim['fade_out'] * 1000)
+                if ok and self.sounds.get(name) == path:
+                    # Fichier réécrit : invalide caches, métadonnées et trim
+                    self.add_sound(name, path)
+            except Exception as e:
+                print(f"Erreur application du trim '{name}': {e}")
+            if on_done:
+                on_done(ok)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def play_sound(self, name, trigger_time=None):
         if name not in self.sounds:
             print(f"Son '{name}' introuvable.")
             return
 
         path = self.sounds[name]
-        self.play_file(path)
+        self.play_file(path, trigger_time, self.trims.get(name), self.loudness_gains.get(name, 1.0))
+        if self.library:
+            self.library.record_play(name)
 
-    def play_file(self, path):
+    def play_file(self, path, trigger_time=None, trim=None, gain=1.0):
         if not os.path.exists(path):
             print(f"Fichier '{path}' introuvable.")
             return
 
-        # Play ID system: Incrémenter l'ID pour invalider les anciens threads
-        with self.lock:
-            self.current_play_id += 1
-            play_id = self.current_play_id
+        generation = self.stop_generation
         
-        # Reset stop event pour autoriser la lecture
-        self.stop_event.clear()
+        # Chemin rapide : streams ouverts et son déjà décodé -> pas de thread
+        if self.engine.samplerate is not None:
+            entry = self.pcm_cache.peek(path, self.engine.samplerate, self.engine.channels)
+            if entry is not None and self.engine.ensure_running():
+                self._play_samples(entry[0], trim, trigger_time, gain)
+                return
         
         # Pas de .join() ici -> Non bloquant pour le spam !
-        self.playing_thread = threading.Thread(target=self._play_thread, args=(path, play_id))
-        self.playing_thread.start()
+        threading.Thread(target=self._play_thread, args=(path, generation, trigger_time, trim, gain), daemon=True).start()
+
+    def _trim_frames(self, trim):
+        """(frame de début, nombre de frames ou None) du trim, au format du moteur"""
+        rate = self.engine.samplerate
+        start = int(trim['start'] * rate)
+        end = trim.get('end')
+        return start, (max(0, int(end * rate) - start) if end is not None else None)
+
+    def _play_samples(self, samples, trim, trigger_time, gain=1.0):
+        """Joue des samples du cache ; le trim est une simple vue (aucune copie)"""
+        if not trim:
+            self.engine.play(samples, trigger_time, gain=gain)
+            return
+        start, length = self._trim_frames(trim)
+        view = samples[start:start + length] if length is not None else samples[start:]
+        self.engine.play(view, trigger_time, fade_in_sec=trim['fade_in'], fade_out_sec=trim['fade_out'], gain=gain)
 
     def set_monitoring(self, enabled):
         """Active ou désactive le monitoring (écouter le son joué)."""
         self.monitoring = enabled
+        self._apply_gains()
         self.save_config()
 
-    def _play_thread(self, path, play_id):
-        """Thread de lecture audio avec miniaudio streaming (ultra-rapide, RAM minimale)"""
-        self.fade_out = False
-        
+    def _play_thread(self, path, generation, trigger_time=None, trim=None, gain=1.0):
+        """Décode (ou récupère du cache) puis confie le son au moteur audio"""
         try:
-            import miniaudio
-            import sounddevice as sd
-            import numpy as np
-            
-            # Décoder le fichier avec miniaudio (beaucoup plus rapide que pydub/soundfile)
-            decoded = miniaudio.decode_file(path)
-            samples = np.frombuffer(decoded.samples, dtype=np.int16).astype(np.float32) / 32768.0
-            
-            # Copie contiguë pour éviter les artefacts de buffer
-            samples = np.ascontiguousarray(samples)
-            
-            # Reshape pour multi-canaux
-            if decoded.nchannels > 1:
-                samples = samples.reshape((-1, decoded.nchannels))
+            # Streams persistants : ne sont recréés que si un périphérique a disparu
+            if not self.engine.ensure_running():
+                print("Aucun stream audio disponible.")
+                return
             
-            # Fade-in de 10ms pour éliminer le "pop" au démarrage
-            fade_in_samples = min(int(decoded.sample_rate * 0.01), len(samples))
-            fade_in_curve = np.linspace(0, 1, fade_in_samples).astype(np.float32)
-            if decoded.nchannels > 1:
-                fade_in_curve = fade_in_curve.reshape(-1, 1)
-            samples[:fade_in_samples] *= fade_in_curve
+            # Longs sons : streaming avec buffer borné plutôt que décodage complet
+            if self._should_stream(path):
+                if trim:
+                    start, length = self._trim_frames(trim)
+                    if trim['fade_out'] and length is None:
+                        # Le fondu de fin a besoin de la longueur jouée
+                        length = max(0, int(self._duration_of(path) * self.engine.samplerate) - start)
+                    voice = self.engine.play_stream(path, trigger_time=trigger_time, start_frame=start, length=length,
+                                                    fade_in_sec=trim['fade_in'], fade_out_sec=trim['fade_out'], gain=gain)
+                else:
+                    voice = self.engine.play_stream(path, trigger_time=trigger_time, gain=gain)
+                if self.stop_generation != generation:
+                    voice.stop(fade=False)
+                return
             
-            fs = decoded.sample_rate
-            channels = decoded.nchannels
+            # Samples décodés au format du moteur (depuis le cache si déjà joué)
+            samples, _, _ = self.pcm_cache.get(path, self.engine.samplerate, self.engine.channels)
             
-            # Périphérique principal (ex: Cable)
-            device_out = self.current_device if self.current_device is not None else sd.default.device[1]
-            # Périphérique de monitoring (ex: Casque)
-            device_mon = sd.default.device[1]
+            # Un stop est arrivé pendant le décodage
+            if self.stop_generation != generation:
+                return
             
-            streams = []
-            main_stream = None
-            mon_stream = None
-
-            try:
-                # Création des streams
-                try:
-                    main_stream = sd.OutputStream(samplerate=fs, device=device_out, channels=channels)
-                    main_stream.start()
-                    streams.append(main_stream)
-                except Exception as e:
-                    print(f"Erreur main stream: {e}")
-
-                if device_out != device_mon:
-                    try:
-                        mon_stream = sd.OutputStream(samplerate=fs, device=device_mon, channels=channels)
-                        mon_stream.start()
-                        streams.append(mon_stream)
-                    except Exception as e:
-                        print(f"Erreur mon stream: {e}")
-
-                # Écriture par blocs
-                block_size = 1024
-                position = 0
-                
-                # Boucle de lecture optimisée
-                fade_factor = 1.0
-                while position < len(samples):
-                    # Check rapide si on doit arrêter (spam ou stop button)
-                    stopping = self.stop_event.is_set() or self.current_play_id != play_id
-                    
-                    if stopping:
-                        if self.fade_out:
-                            fade_factor = max(0, fade_factor - 0.10)
-                        else:
-                            fade_factor = 0
-                        
-                    end = min(position + block_size, len(samples))
-                    chunk = samples[position:end]
-                    
-                    # Écriture Main
-                    if main_stream:
-                        main_stream.write(chunk * self.vol_output * fade_factor)
-                    
-                    # Écriture Monitoring
-                    if mon_stream:
-                        if self.monitoring:
-                            mon_stream.write(chunk * self.vol_monitoring * fade_factor)
-                        else:
-                            mon_stream.write(chunk * 0)
-                            
-                    # Si on est en arrêt et qu'on a atteint le silence, on coupe
-                    if stopping and fade_factor == 0:
-                        sd.sleep(10)
-                        break
-                    
-                    position = end
-
-
-            finally:
-                for s in streams:
-                    s.stop()
-                    s.close()
+            # Polyphonie : le moteur mixe ce son avec ceux déjà en cours
+            self._play_samples(samples, trim, trigger_time, gain)
                     
         except Exception as e:
             print(f"Erreur lecture audio: {e}")
 
+    def _duration_of(self, path):
+        """Durée du fichier en secondes (mise en cache par chemin / mtime / taille)"""
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        duration = self._durations.get(key)
+        if duration is None:
+            import miniaudio
+            duration = miniaudio.get_file_info(path).duration
+            self._durations[key] = duration
+        return duration
+
+    def _should_stream(self, path):
+        """True si le fichier dépasse le seuil de durée pour le streaming"""
+        try:
+            return self._duration_of(path) > self.stream_threshold_sec
+        except Exception:
+            return False
+
     def stop_sound(self):
-        """Arrête avec un fade out doux"""
-        self.fade_out = True
-        self.stop_event.set()
-        # Invalider aussi l'ID courant pour être sûr
+        """Arrête tous les sons avec un fade out doux"""
         with self.lock:
-            self.current_play_id += 1
+            self.stop_generation += 1
+        self.engine.stop_all(fade=True)
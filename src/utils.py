@@ -1,3 +1,14 @@
+from pathlib import Path
+
+
+def get_app_data_dir():
+    """Retourne le chemin vers le dossier de données de l'application dans Documents."""
+    # Utiliser Path.home() pour obtenir le dossier utilisateur
+    user_docs = Path.home() / "Documents" / "Soundbien"
+    user_docs.mkdir(parents=True, exist_ok=True)
+    return user_docs
+
+
 def center_window(window, width, height, parent=None):
     """
     Centre la fenêtre sur son parent ou sur l'écran.
@@ -0,0 +1,170 @@
+"""
+Tests du mixeur (AudioEngine._callback) sans périphérique audio : le callback est appelé
+directement, bloc par bloc, sur une sortie 'main' fictive.
+
+Les sons sont des constantes (0.5, 0.25, 0.125...) : chaque somme du mix se lit directement.
+Lancer avec : python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+from audio_engine import AudioEngine
+
+RATE = 48000
+BLOCK = 512
+FADE_IN = int(RATE * AudioEngine.FADE_IN_SEC)  # 480 frames : fini dès le premier bloc
+
+
+def constant(value, frames=RATE):
+    return np.full((frames, 2), value, dtype=np.float32)
+
+
+class MixerTest(unittest.TestCase):
+
+    def engine(self, max_voices=8, steal_policy='oldest'):
+        engine = AudioEngine(blocksize=BLOCK, max_voices=max_voices, steal_policy=steal_policy)
+        engine.samplerate, engine.channels = RATE, 2
+        engine._streams = {'main': None}  # Sortie fictive : seul le callback est utilisé
+        return engine
+
+    def render(self, engine, blocks=1):
+        """Sortie de plusieurs blocs (frames, 2)"""
+        time_info = SimpleNamespace(outputBufferDacTime=0.0, currentTime=0.0)
+        out = []
+        for _ in range(blocks):
+            block = np.full((BLOCK, 2), np.nan, dtype=np.float32)
+            engine._callback('main', block, BLOCK, time_info, None)
+            out.append(block)
+        return np.concatenate(out)
+
+    def test_silence(self):
+        np.testing.assert_array_equal(self.render(self.engine(), 2), 0)
+
+    def test_single_voice_with_fade_in(self):
+        engine = self.engine()
+        engine.play(constant(0.5))
+        out = self.render(engine, 2)
+        self.assertEqual(out[0, 0], 0)  # Fondu anti-pop depuis 0
+        self.assertTrue(np.all(np.diff(out[:FADE_IN, 0]) > 0))
+        np.testing.assert_allclose(out[FADE_IN:], 0.5, rtol=1e-6)
+
+    def test_sum_with_voice_gains(self):
+        engine = self.engine()
+        engine.play(constant(0.25))
+        engine.play(constant(0.125), gain=2.0)  # Gain du son (loudness) appliqué dans la pondération
+        engine.play(constant(0.0625))
+        out = self.render(engine, 2)
+        np.testing.assert_allclose(out[FADE_IN:], 0.25 + 0.25 + 0.0625, rtol=1e-6)
+        self.assertEqual(engine.active_voices(), 3)
+
+    def test_output_gain_ramp(self):
+        engine = self.engine()
+        engine.play(constant(0.5))
+        self.render(engine, 2)
+        engine.set_gain('main', 0.5)
+        out = self.render(engine, 2)
+        # Rampe sur le bloc où le volume change (pas de saut), puis niveau stable
+        np.testing.assert_allclose(out[0], 0.5, rtol=1e-6)
+        np.testing.assert_allclose(out[BLOCK - 1], 0.25, rtol=1e-6)
+        self.assertTrue(np.all(np.diff(out[:BLOCK, 0]) <= 0))
+        np.testing.assert_allclose(out[BLOCK:], 0.25, rtol=1e-6)
+
+    def test_voice_end(self):
+        engine = self.engine()
+        voice = engine.play(constant(0.5, frames=BLOCK + 100))
+        out = self.render(engine, 3)
+        np.testing.assert_allclose(out[FADE_IN:BLOCK + 100], 0.5, rtol=1e-6)
+        np.testing.assert_array_equal(out[BLOCK + 100:], 0)
+        self.assertTrue(voice.finished)
+        self.assertEqual(engine.active_voices(), 0)
+
+    def test_muted_output_keeps_advancing(self):
+        engine = self.engine()
+        voice = engine.play(constant(0.5, frames=BLOCK * 4))
+        engine.set_gain('main', 0.0)
+        self.render(engine, 2)  # Rampe vers 0, puis sortie muette
+        engine.set_gain('main', 1.0)
+        out = self.render(engine, 3)
+        self.assertEqual(voice.pos['main'], BLOCK * 4)
+        np.testing.assert_array_equal(out[BLOCK * 2:], 0)
+
+    def test_stop_all_fades_out(self):
+        engine = self.engine()
+        voices = [engine.play(constant(0.25)) for _ in range(2)]
+        self.render(engine, 2)
+        engine.stop_all()
+        fade_blocks = int(np.ceil(RATE * AudioEngine.FADE_OUT_SEC / BLOCK))
+        out = self.render(engine, fade_blocks + 2)
+        self.assertAlmostEqual(float(out[0, 0]), 0.5, places=5)
+        self.assertTrue(np.all(np.diff(out[:, 0]) <= 1e-7))
+        np.testing.assert_array_equal(out[fade_blocks * BLOCK:], 0)
+        self.assertTrue(all(v.finished for v in voices))
+
+    def test_steal_oldest(self):
+        engine = self.engine(max_voices=2)
+        first = engine.play(constant(0.5))
+        second = engine.play(constant(0.25))
+        self.render(engine, 2)
+        third = engine.play(constant(0.125))
+
+        self.assertTrue(first.stopping)
+        self.assertIs(engine._stolen[engine._slots.index(third)], first)
+        out = self.render(engine, 2)
+        # Le voice volé descend vers 0 sur un bloc, sur sa propre ligne du mix : pas de coupure sèche
+        self.assertAlmostEqual(float(out[0, 0]), 0.5 + 0.25, places=5)
+        self.assertAlmostEqual(float(out[BLOCK - 1, 0]), 0.25 + 0.125, places=5)
+        self.assertTrue(np.all(np.abs(np.diff(out[:BLOCK, 0])) < 0.01))
+        np.testing.assert_allclose(out[BLOCK:], 0.25 + 0.125, rtol=1e-6)
+        self.assertTrue(first.finished)
+        self.assertFalse(second.finished or third.finished)
+
+    def test_steal_quietest(self):
+        engine = self.engine(max_voices=2, steal_policy='quietest')
+        loud = engine.play(constant(0.5))
+        quiet = engine.play(constant(0.01))
+        self.render(engine, 2)
+        engine.play(constant(0.25))
+        self.assertTrue(quiet.stopping)
+        self.render(engine, 2)
+        self.assertTrue(quiet.finished)
+        self.assertFalse(loud.stopping or loud.finished)
+
+    def test_steal_quietest_counts_voice_gain(self):
+        # Même niveau de samples, mais un gain de loudness 10x plus faible : c'est lui qui est volé
+        engine = self.engine(max_voices=2, steal_policy='quietest')
+        attenuated = engine.play(constant(0.5), gain=0.1)
+        normal = engine.play(constant(0.1))
+        self.render(engine, 2)
+        engine.play(constant(0.25))
+        self.assertTrue(attenuated.stopping)
+        self.assertFalse(normal.stopping)
+
+    def test_new_voice_not_stolen_before_heard(self):
+        engine = self.engine(max_voices=2, steal_policy='quietest')
+        engine.play(constant(0.5))
+        self.render(engine, 2)
+        fresh = engine.play(constant(0.01))  # Pas encore rendu : niveau inconnu
+        loud = engine._slots[0]
+        engine.play(constant(0.25))
+        self.assertTrue(loud.stopping)
+        self.assertFalse(fresh.stopping)
+
+    def test_shrink_pool_keeps_newest(self):
+        engine = self.engine(max_voices=4)
+        voices = [engine.play(constant(0.125)) for _ in range(4)]
+        engine.set_max_voices(2)
+        self.assertEqual(engine._slots, voices[2:])
+        self.assertTrue(voices[0].finished and voices[1].finished)
+        out = self.render(engine, 2)
+        np.testing.assert_allclose(out[FADE_IN:], 0.25, rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
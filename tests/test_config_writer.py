@@ -0,0 +1,152 @@
+"""
+Tests de la sauvegarde différée de config.json (ConfigWriter) : écriture atomique,
+regroupement des changements et nouvel essai après un échec.
+
+Lancer avec : python -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import config_writer
+from config_writer import ConfigWriter, write_atomic
+
+
+class WriteAtomicTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'config.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_write(self):
+        write_atomic(self.path, {'volume': 0.5})
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'volume': 0.5})
+        self.assertEqual(os.listdir(self.tmp_dir), ['config.json'])
+
+    def test_failed_write_keeps_previous_file(self):
+        write_atomic(self.path, {'volume': 0.5})
+        # Donnée non sérialisable : échec en cours d'écriture du fichier temporaire
+        with self.assertRaises(TypeError):
+            write_atomic(self.path, {'volume': object()})
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'volume': 0.5})
+
+    def test_failed_replace_keeps_previous_file(self):
+        write_atomic(self.path, {'volume': 0.5})
+        with mock.patch.object(config_writer.os, 'replace', side_effect=PermissionError("verrouillé")):
+            with self.assertRaises(PermissionError):
+                write_atomic(self.path, {'volume': 1.0})
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'volume': 0.5})
+
+
+class ConfigWriterTest(unittest.TestCase):
+
+    DEBOUNCE = 0.1
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'config.json')
+        self.state = {'volume': 0}
+        self.writes = []  # Données passées à write_atomic, dans l'ordre
+        self.written = threading.Event()
+
+        def record(path, data):
+            write_atomic(path, data)
+            self.writes.append(data)
+            self.written.set()
+
+        patcher = mock.patch.object(config_writer, 'write_atomic', side_effect=record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.writer = ConfigWriter(self.path, lambda: dict(self.state), debounce=self.DEBOUNCE)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def read(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_coalesces_changes(self):
+        for volume in range(1, 21):
+            self.state['volume'] = volume
+            self.writer.mark_dirty()
+        self.assertTrue(self.written.wait(2))
+        time.sleep(self.DEBOUNCE * 3)
+        # Une seule écriture, avec le dernier état
+        self.assertEqual(self.writes, [{'volume': 20}])
+        self.assertEqual(self.read(), {'volume': 20})
+
+    def test_debounce_waits_for_quiet(self):
+        start = time.monotonic()
+        for volume in range(5):
+            self.state['volume'] = volume
+            self.writer.mark_dirty()
+            time.sleep(self.DEBOUNCE / 2)
+        self.assertTrue(self.written.wait(2))
+        # Pas d'écriture tant que les changements continuent
+        self.assertGreaterEqual(time.monotonic() - start, self.DEBOUNCE * 2.5)
+        self.assertEqual(self.writes, [{'volume': 4}])
+
+    def test_snapshot_taken_on_mark(self):
+        # L'état est copié au moment de mark_dirty, pas au moment de l'écriture
+        self.state['volume'] = 1
+        self.writer.mark_dirty()
+        self.state['volume'] = 2
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(self.read(), {'volume': 1})
+
+    def test_flush_writes_immediately(self):
+        self.state['volume'] = 3
+        self.writer.mark_dirty()
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(self.read(), {'volume': 3})
+        # Rien en attente : pas de nouvelle écriture
+        self.assertTrue(self.writer.flush())
+        time.sleep(self.DEBOUNCE * 3)
+        self.assertEqual(len(self.writes), 1)
+
+    def test_failed_write_is_retried(self):
+        self.writer.RETRY_DELAY = 0.05
+        calls = []
+
+        def flaky(path, data):
+            calls.append(data)
+            if len(calls) <= 2:
+                raise OSError("disque plein")
+            write_atomic(path, data)
+            self.written.set()
+
+        self.state['volume'] = 7
+        with mock.patch.object(config_writer, 'write_atomic', side_effect=flaky), mock.patch('builtins.print'):
+            self.writer.mark_dirty()
+            self.assertTrue(self.written.wait(3))
+        self.assertEqual(self.read(), {'volume': 7})
+        self.assertEqual(len(calls), 3)
+
+    def test_failed_flush_keeps_data_pending(self):
+        self.state['volume'] = 5
+        self.writer.mark_dirty()
+        with mock.patch.object(config_writer, 'write_atomic', side_effect=OSError("verrouillé")), \
+                mock.patch('builtins.print'):
+            self.assertFalse(self.writer.flush())
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(self.read(), {'volume': 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
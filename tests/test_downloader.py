@@ -0,0 +1,205 @@
+"""
+Tests de la file de téléchargements (DownloadManager) contre un serveur HTTP local.
+
+Le serveur sert un petit WAV généré au lancement : l'extracteur générique de yt-dlp le
+télécharge comme n'importe quel média. Lancer avec : python -m unittest discover tests
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import wave
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    import yt_dlp  # noqa: F401
+except ImportError:
+    yt_dlp = None
+
+from downloader import Downloader, DownloadJob, DownloadManager
+
+
+def make_wav(seconds=2.0, rate=8000):
+    """WAV mono 16 bits (rampe), assez gros pour plusieurs événements de progression"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(bytes(i % 256 for i in range(int(seconds * rate) * 2)))
+    return buffer.getvalue()
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """/clip.wav : fichier complet ; /slow.wav : envoyé lentement ; le reste : 404"""
+
+    fixture = b''
+    requests = {}  # chemin -> nombre de requêtes reçues
+    CHUNK = 1024
+    SLOW_DELAY = 0.05
+
+    def do_GET(self):
+        FixtureHandler.requests[self.path] = FixtureHandler.requests.get(self.path, 0) + 1
+        if self.path not in ('/clip.wav', '/slow.wav'):
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/wav')
+        self.send_header('Content-Length', str(len(self.fixture)))
+        self.end_headers()
+        try:
+            for pos in range(0, len(self.fixture), self.CHUNK):
+                self.wfile.write(self.fixture[pos:pos + self.CHUNK])
+                if self.path == '/slow.wav':
+                    self.wfile.flush()
+                    time.sleep(self.SLOW_DELAY)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client parti (annulation)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@unittest.skipIf(yt_dlp is None, "yt-dlp non installé")
+class DownloadManagerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        FixtureHandler.fixture = make_wav()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FixtureHandler.requests = {}
+        self.download_dir = tempfile.mkdtemp()
+        self.updates = []  # (instant, état, progression, essai) à chaque notification
+        self.manager = DownloadManager(Downloader(self.download_dir), on_update=self._record)
+
+    def tearDown(self):
+        self.manager.shutdown()
+        shutil.rmtree(self.download_dir, ignore_errors=True)
+
+    def _record(self, job):
+        self.updates.append((time.monotonic(), job.status, job.progress, job.attempts))
+
+    def _statuses(self):
+        return [status for _, status, _, _ in self.updates]
+
+    def _wait(self, job, timeout=30):
+        deadline = time.monotonic() + timeout
+        while not job.finished and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertTrue(job.finished, f"job toujours '{job.status}' après {timeout}s")
+
+    def test_progress_callbacks(self):
+        # Sans FFmpeg la conversion mp3 échoue : seule la progression du téléchargement est vérifiée ici
+        self.manager.RETRIES = 0
+        job = self.manager.submit(f"{self.base_url}/clip.wav")
+        self._wait(job)
+
+        progress = [p for _, status, p, _ in self.updates if status == DownloadJob.DOWNLOADING]
+        self.assertEqual(self.updates[0][1], DownloadJob.PENDING)
+        self.assertTrue(any(0 < p < 1 for p in progress), progress)
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(job.progress, 1.0)
+        self.assertEqual(job.title, 'clip')
+
+    @unittest.skipIf(shutil.which('ffmpeg') is None, "FFmpeg non installé")
+    def test_download_completes(self):
+        job = self.manager.submit(f"{self.base_url}/clip.wav")
+        self._wait(job)
+
+        self.assertEqual(job.status, DownloadJob.DONE)
+        self.assertEqual(job.path, os.path.join(self.download_dir, 'clip.mp3'))
+        self.assertTrue(os.path.exists(job.path))
+        self.assertIn(DownloadJob.CONVERTING, self._statuses())
+
+    def test_cancel_while_downloading(self):
+        job = self.manager.submit(f"{self.base_url}/slow.wav")
+        deadline = time.monotonic() + 10
+        while not (job.status == DownloadJob.DOWNLOADING and job.progress > 0) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreater(job.progress, 0)
+
+        self.manager.cancel(job)
+        self._wait(job, timeout=5)
+        self.assertEqual(job.status, DownloadJob.CANCELLED)
+        self.assertLess(job.progress, 1.0)
+        self.assertEqual(job.attempts, 1)  # Une annulation n'est pas retentée
+        self.assertEqual(self._statuses().count(DownloadJob.CANCELLED), 1)
+        # Pas de fichier partiel laissé dans le dossier
+        self.assertEqual([f for f in os.listdir(self.download_dir) if f.startswith('temp_dl_')], [])
+
+    def test_cancel_pending(self):
+        # Un seul worker, occupé : le second job est annulé avant d'avoir commencé
+        self.manager.shutdown()
+        self.manager = DownloadManager(Downloader(self.download_dir), on_update=self._record, max_workers=1)
+        busy = self.manager.submit(f"{self.base_url}/slow.wav")
+        queued = self.manager.submit(f"{self.base_url}/clip.wav")
+        self.manager.cancel(queued)
+        self.assertEqual(queued.status, DownloadJob.CANCELLED)
+
+        self.manager.cancel(busy)
+        self._wait(busy, timeout=5)
+        # Un job après eux dans la file : quand il se termine, le worker est passé sur le job annulé
+        self.manager.RETRIES = 0
+        self._wait(self.manager.submit(f"{self.base_url}/missing.wav"))
+        self.assertEqual(queued.attempts, 0)
+        self.assertNotIn('/clip.wav', FixtureHandler.requests)
+        self.assertEqual(self._statuses().count(DownloadJob.CANCELLED), 2)  # Une fois par job
+
+    def test_cancel_while_retrying(self):
+        self.manager.BACKOFF_SEC = 5.0
+        job = self.manager.submit(f"{self.base_url}/missing.wav")
+        deadline = time.monotonic() + 10
+        while job.status != DownloadJob.RETRYING and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.manager.cancel(job)
+        self.assertEqual(job.status, DownloadJob.CANCELLED)
+
+        # Le worker sort du délai d'attente sans notifier une seconde annulation
+        time.sleep(0.2)
+        self.assertEqual(self._statuses().count(DownloadJob.CANCELLED), 1)
+        self.assertEqual(job.attempts, 1)
+
+    def test_shutdown_twice(self):
+        job = self.manager.submit(f"{self.base_url}/slow.wav")
+        self.manager.shutdown()
+        self.manager.shutdown()
+        self.assertTrue(job.cancel_event.is_set())
+        self._wait(job, timeout=5)
+        self.assertEqual(job.status, DownloadJob.CANCELLED)
+
+    def test_retry_with_backoff(self):
+        self.manager.BACKOFF_SEC = 0.2
+        job = self.manager.submit(f"{self.base_url}/missing.wav")
+        self._wait(job)
+
+        self.assertEqual(job.status, DownloadJob.FAILED)
+        self.assertEqual(job.attempts, self.manager.RETRIES + 1)
+        self.assertIsNotNone(job.error)
+        self.assertEqual(FixtureHandler.requests['/missing.wav'], job.attempts)
+
+        # Délai croissant : BACKOFF_SEC, puis le double
+        starts = {attempt: t for t, status, _, attempt in self.updates if status == DownloadJob.DOWNLOADING}
+        retries = self._statuses().count(DownloadJob.RETRYING)
+        self.assertEqual(retries, self.manager.RETRIES)
+        self.assertGreaterEqual(starts[2] - starts[1], 0.2)
+        self.assertGreaterEqual(starts[3] - starts[2], 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests du rééchantillonneur (dsp.resample) et du remixage des canaux (dsp.remix).
+
+Lancer avec : python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+from dsp import remix, resample
+
+
+def tone(freq, rate, frames, channels=1):
+    t = np.arange(frames) / rate
+    return np.repeat(np.sin(2 * np.pi * freq * t)[:, None], channels, axis=1).astype(np.float32)
+
+
+def rms_db(samples):
+    return 20 * np.log10(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+
+
+class ResampleTest(unittest.TestCase):
+
+    EDGE = 200  # Samples ignorés aux bords (réponse du filtre sur le zéro-padding)
+
+    def assertTone(self, src_rate, dst_rate, freq, tolerance=1e-4):
+        out = resample(tone(freq, src_rate, src_rate), src_rate, dst_rate)
+        self.assertEqual(out.dtype, np.float32)
+        self.assertEqual(out.shape, (dst_rate, 1))
+        expected = tone(freq, dst_rate, len(out))
+        error = np.abs(out - expected)[self.EDGE:-self.EDGE].max()
+        self.assertLess(error, tolerance, (src_rate, dst_rate, freq))
+
+    def test_upsample_accuracy(self):
+        self.assertTone(44100, 48000, 1000)
+        self.assertTone(22050, 48000, 5000)
+        self.assertTone(44100, 48000, 15000)
+
+    def test_downsample_accuracy(self):
+        self.assertTone(48000, 44100, 1000)
+        self.assertTone(48000, 16000, 3000)
+
+    def test_anti_aliasing(self):
+        # 10 kHz au-dessus de la nouvelle fréquence de Nyquist (8 kHz) : supprimé, pas replié
+        out = resample(tone(10000, 48000, 48000), 48000, 16000)
+        self.assertLess(rms_db(out[self.EDGE:-self.EDGE]) - rms_db(tone(10000, 48000, 48000)), -80)
+
+    def test_dc_gain(self):
+        out = resample(np.full((4000, 2), 0.5, dtype=np.float32), 44100, 48000)
+        np.testing.assert_allclose(out[self.EDGE:-self.EDGE], 0.5, atol=1e-5)
+
+    def test_length(self):
+        for frames in (1, 441, 1000, 44101):
+            out = resample(np.zeros((frames, 1), dtype=np.float32), 44100, 48000)
+            self.assertEqual(len(out), int(np.ceil(frames * 48000 / 44100)))
+
+    def test_channels_independent(self):
+        samples = np.concatenate((tone(1000, 44100, 44100), np.zeros((44100, 1), dtype=np.float32)), axis=1)
+        out = resample(samples, 44100, 48000)
+        self.assertEqual(out.shape, (48000, 2))
+        self.assertEqual(np.abs(out[:, 1]).max(), 0)
+        self.assertGreater(np.abs(out[:, 0]).max(), 0.99)
+
+    def test_same_rate_is_noop(self):
+        samples = tone(1000, 48000, 100)
+        self.assertIs(resample(samples, 48000, 48000), samples)
+        empty = np.zeros((0, 2), dtype=np.float32)
+        self.assertIs(resample(empty, 44100, 48000), empty)
+
+
+class RemixTest(unittest.TestCase):
+
+    def test_downmix_to_mono(self):
+        stereo = np.array([[1.0, 0.0], [0.5, 0.5]], dtype=np.float32)
+        np.testing.assert_array_equal(remix(stereo, 1), [[0.5], [0.5]])
+
+    def test_upmix_mono(self):
+        mono = np.array([[0.25], [-0.5]], dtype=np.float32)
+        np.testing.assert_array_equal(remix(mono, 2), [[0.25, 0.25], [-0.5, -0.5]])
+
+    def test_more_and_fewer_channels(self):
+        quad = np.arange(8, dtype=np.float32).reshape(2, 4)
+        np.testing.assert_array_equal(remix(quad, 2), quad[:, :2])
+        stereo = quad[:, :2]
+        np.testing.assert_array_equal(remix(stereo, 3), [[0, 1, 1], [4, 5, 5]])
+        self.assertIs(remix(stereo, 2), stereo)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Tests du dispatcher de raccourcis (HotkeyDispatcher) avec des événements clavier simulés.
+
+Le hook n'est pas installé : les événements sont passés directement à hook().
+Lancer avec : python -m unittest discover tests
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    import keyboard
+    from hotkeys import HotkeyDispatcher
+except ImportError:
+    keyboard = None
+
+
+def down(name):
+    return SimpleNamespace(name=name, event_type='down', scan_code=0)
+
+
+def up(name):
+    return SimpleNamespace(name=name, event_type='up', scan_code=0)
+
+
+@unittest.skipIf(keyboard is None, "keyboard non installé")
+class HotkeyDispatcherTest(unittest.TestCase):
+
+    SOUNDS = {'airhorn', 'applause', 'boo', 'drum', 'laugh', 'tada', 'wow'}
+
+    def setUp(self):
+        self.played = []  # Noms des sons, dans l'ordre de lecture
+        self.stops = 0
+        self.received = threading.Condition()
+        self.dispatcher = self._dispatcher()
+        # Hors hook installé, keyboard ne connaît aucune touche enfoncée : se fier à l'état du hook
+        patcher = mock.patch.object(HotkeyDispatcher, '_is_pressed', staticmethod(lambda key: True))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _dispatcher(self, **kwargs):
+        dispatcher = HotkeyDispatcher(on_play=self._on_play, on_stop=self._on_stop, **kwargs)
+        dispatcher.compile({'f1': 'airhorn', 'ctrl+f1': 'applause', 'f2': 'boo', 'f3': 'missing'},
+                           self.SOUNDS, 'escape')
+        return dispatcher
+
+    def _on_play(self, name, trigger_time):
+        with self.received:
+            self.played.append(name)
+            self.received.notify_all()
+
+    def _on_stop(self):
+        with self.received:
+            self.stops += 1
+            self.received.notify_all()
+
+    def _wait_for(self, count, timeout=2):
+        with self.received:
+            self.received.wait_for(lambda: len(self.played) + self.stops >= count, timeout)
+        time.sleep(0.05)  # Laisser passer une éventuelle commande en trop
+
+    def press(self, *names):
+        for name in names:
+            self.dispatcher.hook(down(name))
+        for name in reversed(names):
+            self.dispatcher.hook(up(name))
+
+    def test_single_key(self):
+        self.press('f1')
+        self.press('f2')
+        self._wait_for(2)
+        self.assertEqual(self.played, ['airhorn', 'boo'])
+
+    def test_unbound_and_missing_sound(self):
+        # 'f3' pointe vers un son absent de la bibliothèque : écarté à la compilation
+        self.press('f3')
+        self.press('f12')
+        self.press('a')
+        self._wait_for(1, timeout=0.2)
+        self.assertEqual(self.played, [])
+
+    def test_auto_repeat_filtered(self):
+        for _ in range(5):
+            self.dispatcher.hook(down('f1'))
+        self.dispatcher.hook(up('f1'))
+        self.press('f1')
+        self._wait_for(2)
+        self.assertEqual(self.played, ['airhorn', 'airhorn'])
+
+    def test_stop_key(self):
+        self.press('Escape')
+        self._wait_for(1)
+        self.assertEqual(self.stops, 1)
+        self.assertEqual(self.played, [])
+
+    def test_chord(self):
+        self.press('ctrl', 'f1')
+        self.press('f1')
+        self._wait_for(2)
+        self.assertEqual(self.played, ['applause', 'airhorn'])
+
+    def test_left_and_right_modifiers(self):
+        # Relâcher ctrl gauche pendant que ctrl droit est tenu ne relâche pas l'accord
+        self.dispatcher.hook(down('left ctrl'))
+        self.dispatcher.hook(down('right ctrl'))
+        self.dispatcher.hook(up('left ctrl'))
+        self.press('f1')
+        self.dispatcher.hook(up('right ctrl'))
+        self.press('f1')
+        self._wait_for(2)
+        self.assertEqual(self.played, ['applause', 'airhorn'])
+
+    def test_stale_modifier_dropped(self):
+        # KEY_UP perdu : keyboard ne voit plus ctrl enfoncé, F1 ne doit pas devenir ctrl+F1
+        self.dispatcher.hook(down('ctrl'))
+        with mock.patch.object(HotkeyDispatcher, '_is_pressed', staticmethod(lambda key: False)):
+            self.press('f1')
+        self.press('f1')
+        self._wait_for(2)
+        self.assertEqual(self.played, ['airhorn', 'airhorn'])
+
+    def test_recompile(self):
+        self.dispatcher.compile({'f1': 'tada'}, self.SOUNDS, None)
+        self.press('f1')
+        self.press('escape')
+        self._wait_for(1)
+        self.assertEqual(self.played, ['tada'])
+        self.assertEqual(self.stops, 0)
+
+    def test_dropped_when_full(self):
+        # Consommateur bloqué sur la première commande : la file (4) déborde de 2
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_play(name, trigger_time):
+            started.set()
+            release.wait(5)
+            self._on_play(name, trigger_time)
+
+        keys = {f'f{n}': name for n, name in enumerate(sorted(self.SOUNDS), start=1)}
+        self.dispatcher = HotkeyDispatcher(on_play=slow_play, on_stop=self._on_stop, max_pending=4)
+        self.dispatcher.compile(keys, self.SOUNDS, None)
+        self.press('f1')
+        self.assertTrue(started.wait(2))
+        for n in range(2, 8):
+            self.press(f'f{n}')
+        self.assertEqual(self.dispatcher.dropped, 2)
+
+        release.set()
+        self._wait_for(5)
+        # Les commandes les plus anciennes sont perdues
+        self.assertEqual(self.played, [keys[f'f{n}'] for n in (1, 4, 5, 6, 7)])
+
+    def test_callback_error_does_not_stop_consumer(self):
+        calls = []
+
+        def failing_play(name, trigger_time):
+            calls.append(name)
+            if len(calls) == 1:
+                raise RuntimeError("périphérique audio perdu")
+            self._on_play(name, trigger_time)
+
+        self.dispatcher = HotkeyDispatcher(on_play=failing_play, on_stop=self._on_stop)
+        self.dispatcher.compile({'f1': 'airhorn', 'f2': 'boo'}, self.SOUNDS, None)
+        with mock.patch('builtins.print'):
+            self.press('f1')
+            self.press('f2')
+            self._wait_for(1)
+        self.assertEqual(calls, ['airhorn', 'boo'])
+        self.assertEqual(self.played, ['boo'])
+
+
+if __name__ == '__main__':
+    unittest.main()
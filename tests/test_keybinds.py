@@ -0,0 +1,118 @@
+"""
+Tests du registre de keybinds (KeybindRegistry) : les index forward et reverse restent cohérents.
+
+Lancer avec : python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from keybinds import KeybindRegistry
+
+
+class KeybindRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = KeybindRegistry()
+
+    def assertConsistent(self):
+        """Chaque raccourci du forward est dans le reverse de son son, et inversement"""
+        for layer in self.registry.layers():
+            forward = self.registry.layer_map(layer)
+            names = set(forward.values())
+            for binding, name in forward.items():
+                self.assertIn(binding, self.registry.keys_for(name, layer))
+            for name in names:
+                for binding in self.registry.keys_for(name, layer):
+                    self.assertEqual(self.registry.lookup(binding, layer), name)
+            self.assertEqual(sum(len(self.registry.keys_for(n, layer)) for n in names), len(forward))
+
+    def test_normalize(self):
+        self.assertEqual(KeybindRegistry.normalize('F1'), 'f1')
+        self.assertEqual(KeybindRegistry.normalize('Shift+Ctrl+F1'), 'ctrl+shift+f1')
+        self.assertEqual(KeybindRegistry.normalize('right ctrl + alt gr + x'), 'ctrl+alt+x')
+        self.assertEqual(KeybindRegistry.chord({'shift', 'ctrl'}, 'f1'), 'ctrl+shift+f1')
+        self.assertEqual(KeybindRegistry.chord({}, 'f1'), 'f1')
+
+    def test_add(self):
+        self.assertEqual(self.registry.bind('F1', 'airhorn'), [])
+        self.registry.bind('ctrl+f1', 'airhorn')
+        self.registry.bind('f2', 'boo')
+        self.assertEqual(self.registry.lookup('f1'), 'airhorn')
+        self.assertEqual(self.registry.keys_for('airhorn'), ['f1', 'ctrl+f1'])
+        self.assertEqual(self.registry.key_for('airhorn'), 'f1')
+        self.assertConsistent()
+
+    def test_add_steals_binding(self):
+        self.registry.bind('f1', 'airhorn')
+        removed = self.registry.bind('f1', 'boo')
+        self.assertEqual(removed, [('base', 'f1')])
+        self.assertEqual(self.registry.lookup('f1'), 'boo')
+        self.assertEqual(self.registry.keys_for('airhorn'), [])
+        # Même raccourci, même son : rien ne change
+        self.assertEqual(self.registry.bind('f1', 'boo'), [])
+        self.assertConsistent()
+
+    def test_add_exclusive(self):
+        self.registry.bind('f1', 'airhorn')
+        self.registry.bind('f2', 'airhorn')
+        removed = self.registry.bind('f3', 'airhorn', exclusive=True)
+        self.assertEqual(sorted(removed), [('base', 'f1'), ('base', 'f2')])
+        self.assertEqual(self.registry.keys_for('airhorn'), ['f3'])
+        self.assertIsNone(self.registry.lookup('f1'))
+        self.assertConsistent()
+
+    def test_layers(self):
+        self.registry.bind('f1', 'airhorn')
+        self.registry.bind('f1', 'boo', layer='streaming')
+        self.assertEqual(self.registry.lookup('f1'), 'airhorn')
+        self.assertEqual(self.registry.lookup('f1', 'streaming'), 'boo')
+        self.assertIsNone(self.registry.lookup('f1', 'absente'))
+        self.assertEqual(self.registry.to_config(), {'base': {'f1': 'airhorn'}, 'streaming': {'f1': 'boo'}})
+        self.assertConsistent()
+
+    def test_rename(self):
+        self.registry.bind('f1', 'airhorn')
+        self.registry.bind('f2', 'airhorn', layer='streaming')
+        self.registry.bind('f3', 'boo')
+        self.registry.rename_sound('airhorn', 'horn')
+        self.assertEqual(self.registry.lookup('f1'), 'horn')
+        self.assertEqual(self.registry.lookup('f2', 'streaming'), 'horn')
+        self.assertEqual(self.registry.keys_for('horn'), ['f1'])
+        self.assertEqual(self.registry.keys_for('airhorn'), [])
+        self.assertEqual(self.registry.lookup('f3'), 'boo')
+        self.assertConsistent()
+
+    def test_remove(self):
+        self.registry.bind('f1', 'airhorn')
+        self.registry.bind('ctrl+f1', 'airhorn')
+        self.registry.bind('f1', 'airhorn', layer='streaming')
+        self.registry.bind('f2', 'boo')
+        removed = self.registry.unbind_sound('airhorn')
+        self.assertEqual(sorted(removed), [('base', 'ctrl+f1'), ('base', 'f1'), ('streaming', 'f1')])
+        self.assertEqual(self.registry.layer_map(), {'f2': 'boo'})
+        self.assertEqual(self.registry.layer_map('streaming'), {})
+        self.assertConsistent()
+
+    def test_unbind(self):
+        self.registry.bind('ctrl+f1', 'airhorn')
+        self.registry.bind('f1', 'airhorn')
+        self.assertEqual(self.registry.unbind('Ctrl+F1'), 'airhorn')
+        self.assertIsNone(self.registry.unbind('ctrl+f1'))
+        self.assertEqual(self.registry.keys_for('airhorn'), ['f1'])
+        self.assertConsistent()
+
+    def test_load_roundtrip(self):
+        config = {'base': {'f1': 'airhorn', 'ctrl+f2': 'boo'}, 'streaming': {'f1': 'boo'}}
+        self.registry.bind('f9', 'old')
+        self.registry.load(config)
+        self.assertEqual(self.registry.to_config(), config)
+        self.assertIsNone(self.registry.lookup('f9'))
+        self.assertConsistent()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests de la mesure de loudness (LoudnessMeter) contre les valeurs de référence
+ITU-R BS.1770 / EBU Tech 3341 (tolérance ±0.1 LU, ±0.2 dB pour le true peak).
+
+Lancer avec : python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+from loudness import LoudnessMeter
+
+
+def tone(freq, rate, seconds, level_db=0.0, channels=1, phase=0.0):
+    t = np.arange(int(rate * seconds)) / rate
+    x = 10 ** (level_db / 20) * np.sin(2 * np.pi * freq * t + phase)
+    return np.repeat(x[:, None], channels, axis=1).astype(np.float32)
+
+
+def measure(samples, rate, chunk=65536):
+    """Mesure au fil de blocs, comme pendant le décodage"""
+    meter = LoudnessMeter(rate, samples.shape[1])
+    for start in range(0, len(samples), chunk):
+        meter.push(samples[start:start + chunk])
+    return meter
+
+
+class LoudnessMeterTest(unittest.TestCase):
+
+    RATES = (44100, 48000)
+
+    def test_997hz_full_scale(self):
+        # BS.1770 : sinus 997 Hz à 0 dBFS sur un canal -> -3.01 LKFS
+        for rate in self.RATES:
+            meter = measure(tone(997, rate, 5), rate)
+            self.assertAlmostEqual(meter.integrated(), -3.01, delta=0.1)
+            self.assertAlmostEqual(meter.true_peak_db(), 0.0, delta=0.2)
+
+            left_only = tone(997, rate, 5, channels=2)
+            left_only[:, 1] = 0
+            self.assertAlmostEqual(measure(left_only, rate).integrated(), -3.01, delta=0.1)
+
+    def test_stereo_reference_level(self):
+        # EBU Tech 3341, cas 1 : sinus 1 kHz stéréo à -23 dBFS -> -23 LUFS
+        for rate in self.RATES:
+            meter = measure(tone(1000, rate, 20, -23, channels=2), rate)
+            self.assertAlmostEqual(meter.integrated(), -23.0, delta=0.1)
+
+    def test_relative_gating(self):
+        # EBU Tech 3341, cas 3 : -36 / -23 / -36 dBFS (10 s, 60 s, 10 s) -> -23 LUFS
+        rate = 48000
+        samples = np.concatenate([tone(1000, rate, 10, -36, 2), tone(1000, rate, 60, -23, 2),
+                                  tone(1000, rate, 10, -36, 2)])
+        self.assertAlmostEqual(measure(samples, rate).integrated(), -23.0, delta=0.1)
+
+    def test_chunking_does_not_change_result(self):
+        rate = 44100
+        samples = tone(440, rate, 3, -12, channels=2)
+        whole = measure(samples, rate, chunk=len(samples)).integrated()
+        self.assertAlmostEqual(measure(samples, rate, chunk=1000).integrated(), whole, places=6)
+
+    def test_short_sound(self):
+        # Plus court qu'un bloc de 400 ms : mesuré sur toute sa durée
+        self.assertAlmostEqual(measure(tone(997, 48000, 0.2), 48000).integrated(), -3.01, delta=0.1)
+
+    def test_silence(self):
+        meter = measure(np.zeros((48000, 2), dtype=np.float32), 48000)
+        self.assertIsNone(meter.integrated())
+        self.assertIsNone(meter.true_peak_db())
+        self.assertIsNone(LoudnessMeter(48000, 2).integrated())
+
+    def test_true_peak_between_samples(self):
+        # fs/4 déphasé de 45° : les samples valent 0.707 mais le signal reconstruit atteint 1.0
+        rate = 48000
+        samples = tone(rate / 4, rate, 1, phase=np.pi / 4)
+        self.assertAlmostEqual(float(np.abs(samples).max()), 0.7071, places=3)
+        self.assertAlmostEqual(measure(samples, rate).true_peak_db(), 0.0, delta=0.2)
+
+    def test_playback_gain(self):
+        self.assertEqual(LoudnessMeter.playback_gain(None, 0.5), 1.0)
+        # -26 LUFS vers -16 : +10 dB
+        self.assertAlmostEqual(LoudnessMeter.playback_gain(-26.0, 0.1), 10 ** (10 / 20))
+        # Remontée plafonnée à MAX_BOOST_DB
+        self.assertAlmostEqual(LoudnessMeter.playback_gain(-60.0, 0.001), 10 ** (LoudnessMeter.MAX_BOOST_DB / 20))
+        # Limitée par le true peak (pic à -3 dBTP : au plus +2 dB)
+        self.assertAlmostEqual(LoudnessMeter.playback_gain(-30.0, 10 ** (-3 / 20)), 10 ** (2 / 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
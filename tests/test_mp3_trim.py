@@ -0,0 +1,93 @@
+"""
+Tests de la coupe MP3 sans ré-encodage (_mp3_frame_trim) : aller-retour décodé avec miniaudio.
+
+data/sweep.mp3 : balayage sinus mono 44.1 kHz de 1.5 s, encodé par LAME sans tag Xing/LAME
+(le flux décodé commence donc au délai de l'encodeur, sans rien retirer).
+Lancer avec : python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+try:
+    import miniaudio
+except ImportError:
+    miniaudio = None
+
+try:
+    import audio_trimmer
+except ImportError:
+    audio_trimmer = None
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sweep.mp3')
+
+
+def decode(data):
+    """Samples float32 (mono) décodés par miniaudio, qui applique le délai/padding du tag LAME"""
+    return np.asarray(miniaudio.mp3_read_f32(data).samples, dtype=np.float32)
+
+
+@unittest.skipIf(miniaudio is None, "miniaudio non installé")
+@unittest.skipIf(audio_trimmer is None, "dépendances de audio_trimmer non installées")
+class Mp3FrameTrimTest(unittest.TestCase):
+
+    RATE = 44100
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = Path(self.tmp_dir) / 'sweep.mp3'
+        shutil.copy(FIXTURE, self.path)
+        self.source = decode(self.path.read_bytes())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _trim(self, start_ms, end_ms):
+        self.assertTrue(audio_trimmer._mp3_frame_trim(self.path, start_ms, end_ms))
+        return self.path.read_bytes()
+
+    def test_sample_range(self):
+        data = self._trim(250, 1000)
+        out = decode(data)
+        # Exactement les samples [250 ms, 1000 ms[ du flux d'origine
+        self.assertEqual(len(out), 750 * self.RATE // 1000)
+        np.testing.assert_allclose(out, self.source[self.RATE // 4:self.RATE], atol=1e-4)
+
+    def test_gapless_fields(self):
+        data = self._trim(250, 1000)
+        frames, fmt = audio_trimmer._mp3_frames(data)
+        self.assertIsNotNone(fmt['gapless'])
+        delay, padding = fmt['gapless']
+        # Délai + samples gardés + padding couvrent exactement les frames audio du fichier
+        self.assertEqual(delay + 750 * self.RATE // 1000 + padding, len(frames) * fmt['spf'])
+        self.assertTrue(0 <= delay < 4096)
+        self.assertTrue(audio_trimmer._MP3_DECODER_DELAY <= padding < 4096)
+        # Pas de ré-encodage : les frames gardées sont celles de la source, octet pour octet
+        last = frames[-1]
+        self.assertIn(data[last[0]:last[0] + last[1]], Path(FIXTURE).read_bytes())
+
+    def test_chained_trim(self):
+        # Recouper un fichier déjà coupé : le délai/padding du tag existant est pris en compte
+        self._trim(250, 1000)
+        out = decode(self._trim(100, 500))
+        start = (250 + 100) * self.RATE // 1000
+        self.assertEqual(len(out), 400 * self.RATE // 1000)
+        np.testing.assert_allclose(out, self.source[start:start + len(out)], atol=1e-4)
+
+    def test_trim_file_uses_frame_copy(self):
+        size = self.path.stat().st_size
+        self.assertTrue(audio_trimmer.trim_file(self.path, 0, 500))
+        self.assertLess(self.path.stat().st_size, size)
+        self.assertEqual(len(decode(self.path.read_bytes())), self.RATE // 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
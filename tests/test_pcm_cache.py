@@ -0,0 +1,133 @@
+"""
+Tests du cache PCM (PCMCache) : éviction LRU contre le budget en octets.
+
+Les sons sont de petits WAV mono 16 bits générés dans un dossier temporaire
+(1000 frames = 4000 octets une fois décodés en float32).
+Lancer avec : python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    import miniaudio  # noqa: F401
+    from sound_manager import PCMCache
+except ImportError:
+    PCMCache = None
+
+FRAMES = 1000
+ENTRY_BYTES = FRAMES * 4  # float32 mono
+
+
+def make_wav(path, frames=FRAMES, rate=8000, value=1000):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(int(value).to_bytes(2, 'little', signed=True) * frames)
+    return path
+
+
+@unittest.skipIf(PCMCache is None, "miniaudio ou keyboard non installé")
+class PCMCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = {name: make_wav(os.path.join(self.tmp_dir, f"{name}.wav")) for name in 'abcd'}
+        # Place pour deux sons et demi
+        self.cache = PCMCache(budget_bytes=int(ENTRY_BYTES * 2.5))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def cached(self, name):
+        return self.cache.peek(self.paths[name]) is not None
+
+    def test_decode_and_hit(self):
+        samples, rate, channels = self.cache.get(self.paths['a'])
+        self.assertEqual(samples.shape, (FRAMES, 1))
+        self.assertEqual((rate, channels), (8000, 1))
+        self.assertAlmostEqual(float(samples[0, 0]), 1000 / 32768, places=6)
+        self.assertFalse(samples.flags.writeable)
+
+        again = self.cache.get(self.paths['a'])
+        self.assertIs(again[0], samples)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['used_bytes'], ENTRY_BYTES)
+
+    def test_lru_eviction(self):
+        self.cache.get(self.paths['a'])
+        self.cache.get(self.paths['b'])
+        self.cache.get(self.paths['a'])  # 'a' devient le plus récent : 'b' sera évincé
+        self.cache.get(self.paths['c'])
+
+        self.assertTrue(self.cached('a'))
+        self.assertFalse(self.cached('b'))
+        self.assertTrue(self.cached('c'))
+        stats = self.cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['used_bytes'], 2 * ENTRY_BYTES)
+        self.assertLessEqual(stats['used_bytes'], stats['budget_bytes'])
+
+    def test_budget_never_exceeded(self):
+        for name in 'abcdabcdca':
+            self.cache.get(self.paths[name])
+            stats = self.cache.stats()
+            self.assertLessEqual(stats['used_bytes'], stats['budget_bytes'])
+            self.assertEqual(stats['used_bytes'], stats['entries'] * ENTRY_BYTES)
+        # Les deux derniers utilisés restent
+        self.assertTrue(self.cached('c') and self.cached('a'))
+
+    def test_entry_larger_than_budget_not_cached(self):
+        big = make_wav(os.path.join(self.tmp_dir, 'big.wav'), frames=FRAMES * 3)
+        samples, _, _ = self.cache.get(big)
+        self.assertEqual(len(samples), FRAMES * 3)
+        self.assertIsNone(self.cache.peek(big))
+        self.assertEqual(self.cache.stats()['used_bytes'], 0)
+
+    def test_shrink_budget_evicts_oldest(self):
+        for name in 'ab':
+            self.cache.get(self.paths[name])
+        self.cache.set_budget(ENTRY_BYTES)
+        self.assertFalse(self.cached('a'))
+        self.assertTrue(self.cached('b'))
+        self.assertEqual(self.cache.stats()['used_bytes'], ENTRY_BYTES)
+
+    def test_rewritten_file_replaces_entry(self):
+        self.cache.get(self.paths['a'])
+        make_wav(self.paths['a'], frames=FRAMES // 2, value=-1000)
+        samples, _, _ = self.cache.get(self.paths['a'])
+        self.assertEqual(len(samples), FRAMES // 2)
+        self.assertLess(float(samples[0, 0]), 0)
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['used_bytes'], ENTRY_BYTES // 2)
+
+    def test_invalidate_and_clear(self):
+        self.cache.get(self.paths['a'])
+        self.cache.get(self.paths['b'])
+        self.cache.invalidate(self.paths['a'])
+        self.assertFalse(self.cached('a'))
+        self.assertEqual(self.cache.stats()['used_bytes'], ENTRY_BYTES)
+        self.cache.clear()
+        self.assertEqual(self.cache.stats(), dict(self.cache.stats(), entries=0, used_bytes=0))
+
+    def test_requested_format(self):
+        samples, rate, channels = self.cache.get(self.paths['a'], 16000, 2)
+        self.assertEqual((rate, channels), (16000, 2))
+        self.assertEqual(samples.shape[1], 2)
+        self.assertAlmostEqual(len(samples), 2 * FRAMES, delta=2)
+        # Format demandé différent : entrée distincte du format natif
+        self.assertIsNone(self.cache.peek(self.paths['a']))
+
+
+if __name__ == '__main__':
+    unittest.main()
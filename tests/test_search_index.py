@@ -0,0 +1,96 @@
+"""
+Tests de l'index de recherche (SearchIndex) : préfixes de mots, trigrammes et ordre des résultats.
+
+Lancer avec : python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from search_index import SearchIndex
+
+
+class SearchIndexTest(unittest.TestCase):
+
+    NAMES = ['Explosion_Big', 'airhorn', 'Rire enregistré', 'big-bang', 'expresso', 'Applause', 'sad trombone']
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add_many(self.NAMES)
+
+    def assertMatchesAgree(self, query):
+        """matches() (un seul son, sans index) donne le même résultat que search()"""
+        found = set(self.index.search(query))
+        for name in self.NAMES:
+            self.assertEqual(self.index.matches(name, query), name in found, (name, query))
+
+    def test_empty_query_lists_library_order(self):
+        self.assertEqual(self.index.search(''), self.NAMES)
+        self.assertEqual(self.index.search('   '), self.NAMES)
+
+    def test_word_prefix(self):
+        # Tokens courts : début de mot uniquement ('ex' n'est pas dans 'sad trombone')
+        self.assertEqual(self.index.search('ex'), ['Explosion_Big', 'expresso'])
+        self.assertEqual(self.index.search('b'), ['Explosion_Big', 'big-bang'])
+        self.assertEqual(self.index.search('xp'), [])
+        for query in ('ex', 'b', 'xp', 'a'):
+            self.assertMatchesAgree(query)
+
+    def test_trigram_substring(self):
+        self.assertEqual(self.index.search('plos'), ['Explosion_Big'])
+        self.assertEqual(self.index.search('orn'), ['airhorn'])
+        self.assertEqual(self.index.search('ress'), ['expresso'])
+        # Trigrammes tous présents mais pas contigus : pas de faux positif
+        self.assertEqual(self.index.search('bigbang'), [])
+        for query in ('plos', 'orn', 'ress', 'bigbang'):
+            self.assertMatchesAgree(query)
+
+    def test_normalization(self):
+        # Accents, casse et séparateurs ignorés
+        self.assertEqual(self.index.search('ENREGISTRE'), ['Rire enregistré'])
+        self.assertEqual(self.index.search('big bang'), ['big-bang'])
+        self.assertEqual(self.index.search('explosion big'), ['Explosion_Big'])
+
+    def test_all_tokens_required(self):
+        self.assertEqual(self.index.search('big ex'), ['Explosion_Big'])
+        self.assertEqual(self.index.search('big trombone'), [])
+        self.assertMatchesAgree('big ex')
+
+    def test_results_in_library_order(self):
+        # Ordre de la bibliothèque, quel que soit le token le plus sélectif
+        self.assertEqual(self.index.search('a'), ['airhorn', 'Applause'])
+        self.assertEqual(self.index.search('on'), [])
+        self.assertEqual(self.index.search('ion'), ['Explosion_Big'])
+        self.assertEqual(self.index.search('big'), ['Explosion_Big', 'big-bang'])
+
+    def test_tags(self):
+        self.index.add('klaxon', tags=['voiture', 'horn'])
+        self.assertEqual(self.index.search('horn'), ['airhorn', 'klaxon'])
+        self.assertEqual(self.index.search('voit'), ['klaxon'])
+
+    def test_remove(self):
+        self.index.remove('expresso')
+        self.index.remove('absent')
+        self.assertEqual(self.index.search('ex'), ['Explosion_Big'])
+        self.assertEqual(self.index.search('ress'), [])
+        # Plus aucun bucket ne référence le son retiré
+        self.assertFalse(any('expresso' in bucket for bucket in self.index._prefixes.values()))
+        self.assertFalse(any('expresso' in bucket for bucket in self.index._trigrams.values()))
+
+    def test_rename_keeps_position(self):
+        self.index.rename('airhorn', 'corne de brume')
+        self.assertEqual(self.index.search('air'), [])
+        self.assertEqual(self.index.search('brume'), ['corne de brume'])
+        self.assertEqual(self.index.search('')[1], 'corne de brume')
+
+    def test_readd_moves_to_end(self):
+        self.index.add('airhorn')
+        self.assertEqual(self.index.search('')[-1], 'airhorn')
+        self.assertEqual(self.index.search('air'), ['airhorn'])
+
+
+if __name__ == '__main__':
+    unittest.main()